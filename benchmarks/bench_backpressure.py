@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+有限任务窗口的内存基准测试
+生成不同文件数的合成仓库，分别以有限窗口（当前实现）和一次提交全部任务（旧实现）两种方式扫描，
+在独立子进程中测量峰值RSS，比较内存占用随文件数的变化
+
+用法:
+    python benchmarks/bench_backpressure.py
+    python benchmarks/bench_backpressure.py --sizes 1000 10000 50000 --mode thread
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 合成文件内容，包含少量违规，保证每个文件都会产生扫描记录
+SAMPLE_SOURCE = '''import sys
+import os
+
+
+def CamelCaseFunction(value):
+    return value * 2  # 注释
+
+
+class sample_class:
+    def method(self):
+        return CamelCaseFunction(1)
+'''
+
+# 每个目录中的文件数
+FILES_PER_DIR = 200
+
+
+def generate_repository(path, file_count):
+    """在path下生成file_count个Python文件"""
+    for index in range(file_count):
+        directory = os.path.join(path, f"pkg{index // FILES_PER_DIR:05d}")
+        if index % FILES_PER_DIR == 0:
+            os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"module{index:07d}.py"), 'w', encoding='utf-8') as f:
+            f.write(SAMPLE_SOURCE)
+
+
+def run_child(project_path, mode, unbounded):
+    """在子进程中执行一次流式扫描，输出耗时和峰值RSS"""
+    sys.path.insert(0, REPO_ROOT)
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    from src.core import engine as engine_module
+    if unbounded:
+        # 模拟旧实现：窗口足够大时所有任务在扫描开始时一次提交
+        engine_module.IN_FLIGHT_TASKS_PER_WORKER = 1 << 30
+
+    engine = engine_module.ScanEngine(project_path, 'PEP8', use_cache=False)
+    start = time.perf_counter()
+    count = 0
+    for _ in engine.iter_scan(max_workers=4, mode=mode, keep_details=False):
+        count += 1
+    elapsed = time.perf_counter() - start
+
+    # Linux下ru_maxrss单位为KB，macOS下为字节
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        max_rss *= 1024
+    print(json.dumps({'files': count, 'seconds': elapsed, 'max_rss': max_rss}))
+
+
+def measure(project_path, mode, unbounded):
+    """启动子进程测量一次扫描"""
+    command = [sys.executable, os.path.abspath(__file__), '--child', project_path, '--mode', mode]
+    if unbounded:
+        command.append('--unbounded')
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='有限任务窗口的峰值RSS基准测试')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 5000, 20000],
+                        help='合成仓库的文件数')
+    parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                        help='执行模式')
+    parser.add_argument('--child', metavar='PATH', help=argparse.SUPPRESS)
+    parser.add_argument('--unbounded', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.mode, args.unbounded)
+        return
+
+    print(f"{'文件数':>10} {'有限窗口RSS(MB)':>16} {'全部提交RSS(MB)':>16} {'有限窗口耗时(s)':>16} {'全部提交耗时(s)':>16}")
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix='codeauditx-bench-')
+        try:
+            generate_repository(workdir, size)
+            bounded = measure(workdir, args.mode, unbounded=False)
+            unbounded = measure(workdir, args.mode, unbounded=True)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+        print(f"{size:>10} {bounded['max_rss'] / 1048576:>16.1f} {unbounded['max_rss'] / 1048576:>16.1f} "
+              f"{bounded['seconds']:>16.2f} {unbounded['seconds']:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,638 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+扫描性能基准测试
+在benchmarks/corpus.py生成的合成代码库上测量:
+    scan: 端到端扫描吞吐量（单线程、多线程、多进程），以及多线程相对单线程的加速比（单核机器上跳过）
+    parsers: 各语言解析器scan()的吞吐量，以及Python解析器在一组较大的标准库模块上的吞吐量
+             （这组指标与合成代码库无关，随Python版本变化，应与同一Python版本的基线比较）
+    reports: ReportGenerator生成各格式报告的耗时（未安装WeasyPrint时跳过PDF）
+    memory: 违规详情中每个违规以字典保存和以ViolationList紧凑保存时占用的字节数，
+            以及解析器扫描一个文件时按行拆分文件内容的次数和内存峰值
+
+每组测试在独立的子进程中运行，子进程的PATH为空目录，外部工具（pylint、cpplint、eslint等）一律视为未安装，
+测试不访问网络，结果只取决于本仓库的代码。结果可以保存为基线，之后与基线比较，超过阈值的变化视为性能回退。
+基线应在同一台机器上生成；与其他机器的基线比较时可以用--normalize按一段固定的纯Python校准负载折算速度差异，
+折算受机器负载波动影响较大，只适合粗略比较
+
+用法:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baselines/reference.json
+    python benchmarks/run_benchmarks.py --compare benchmarks/baselines/reference.json
+    python benchmarks/run_benchmarks.py --suites parsers --files 1000 --long-line-ratio 0.2
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import fnmatch
+import argparse
+import platform
+import datetime
+import statistics
+import subprocess
+import tempfile
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+from corpus import MANIFEST_NAME, generate_corpus, add_corpus_arguments, corpus_parameters  # noqa: E402
+
+# 基线文件格式版本
+BASELINE_FORMAT_VERSION = 1
+
+SUITES = ('scan', 'parsers', 'reports', 'memory')
+
+REPORT_FORMATS = ('json', 'csv', 'html', 'txt', 'pdf')
+
+# 默认的回退阈值：折算后的性能下降超过该比例视为回退，按指标名称的通配符匹配，最长的模式优先
+DEFAULT_THRESHOLDS = {
+    '*': 0.25,
+    # 报告生成耗时较短，测量噪声较大
+    'report.*': 0.40,
+    'scan.thread_speedup': 0.10,
+    # 内存占用与机器速度无关，测量结果基本稳定
+    'memory.*': 0.10
+}
+
+# 与机器速度无关、比较时不按校准负载折算的指标
+UNSCALED_METRICS = ('*_speedup', 'memory.*')
+
+# 并行加速比只在至少有这么多CPU的机器上测量和比较，单核机器上的加速比只反映测量噪声
+SPEEDUP_METRICS = ('*_speedup',)
+SPEEDUP_MIN_CPUS = 2
+
+# 校准负载每次测量的轮数和测量次数，取最快的一次，减少其他进程的干扰
+CALIBRATION_ROUNDS = 500
+CALIBRATION_RUNS = 7
+
+# Python解析器基准使用的标准库模块，都是较大的真实代码，按名称查找源文件，不导入模块本身
+PYTHON_STDLIB_MODULES = ('_pydecimal', 'argparse', 'ast', 'dataclasses', 'enum', 'inspect', 'pydoc',
+                         'subprocess', 'tarfile', 'typing', 'unittest.mock', 'zipfile')
+
+# 指标名称前缀对应的测试组
+METRIC_SUITES = {'scan': 'scan', 'parser': 'parsers', 'report': 'reports', 'memory': 'memory'}
+
+_CALIBRATION_TEXT = '\n'.join(f"    value_{index} = compute(item_{index}, {index})  # 注释 {index}"
+                              for index in range(200))
+
+
+def calibrate():
+    """执行固定的纯Python负载（正则匹配、字符串和字典操作），返回每秒轮数，用于折算不同机器的速度"""
+    pattern = re.compile(r'^(\s*)(\w+)\s*=\s*(\w+)\((.*)\)')
+    best = None
+    for _ in range(CALIBRATION_RUNS):
+        start = time.perf_counter()
+        for _ in range(CALIBRATION_ROUNDS):
+            counts = {}
+            for line in _CALIBRATION_TEXT.split('\n'):
+                match = pattern.match(line)
+                if match:
+                    name = match.group(2)
+                    counts[name[:7]] = counts.get(name[:7], 0) + len(line.strip())
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return CALIBRATION_ROUNDS / best
+
+
+def _metric(value, unit, better, **info):
+    metric = {'value': round(value, 6), 'unit': unit, 'better': better}
+    metric.update(info)
+    return metric
+
+
+def _median_time(fn, repeat):
+    """执行fn repeat次，返回耗时的中位数"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def _new_engine(corpus_path, ruleset):
+    """创建不受本机缓存、耗时历史和git影响的扫描引擎"""
+    from src.core.engine import ScanEngine
+    return ScanEngine(corpus_path, ruleset, use_cache=False, cost_scheduling=False,
+                      respect_gitignore=False, use_git_ls_files=False)
+
+
+def run_scan_suite(corpus_path, manifest, ruleset, repeat, workers):
+    """端到端扫描吞吐量
+
+    CodeScanner.start()只是把扫描交给ScanEngine，这里直接使用ScanEngine，不需要PyQt5
+    """
+    metrics = {}
+
+    def scan(mode, max_workers):
+        engine = _new_engine(corpus_path, ruleset)
+        engine.run(max_workers=max_workers, mode=mode)
+        return engine.results
+
+    # 导入解析器和加载规则不计入测量
+    from src.parsers import preload_parsers
+    _new_engine(corpus_path, ruleset)
+    preload_parsers()
+
+    configurations = (('thread_single', 'thread', 1), ('thread_parallel', 'thread', workers),
+                      ('process_parallel', 'process', workers))
+    for name, mode, max_workers in configurations:
+        seconds = _median_time(lambda: scan(mode, max_workers), repeat)
+        metrics[f"scan.{name}.files_per_sec"] = _metric(manifest['files'] / seconds, 'files/s', 'higher',
+                                                        workers=max_workers)
+        metrics[f"scan.{name}.mb_per_sec"] = _metric(manifest['bytes'] / 1048576 / seconds, 'MB/s', 'higher',
+                                                     workers=max_workers)
+
+    skipped = {}
+    cpus = os.cpu_count() or 1
+    if cpus < SPEEDUP_MIN_CPUS:
+        skipped['scan.thread_speedup'] = f"只有{cpus}个CPU，加速比没有意义"
+    else:
+        metrics['scan.thread_speedup'] = _metric(
+            metrics['scan.thread_parallel.files_per_sec']['value']
+            / metrics['scan.thread_single.files_per_sec']['value'],
+            'x', 'higher', workers=workers)
+    return metrics, skipped
+
+
+def run_parsers_suite(corpus_path, manifest, ruleset, repeat):
+    """各语言解析器scan()的吞吐量，文件内容预先读入内存，只测量解析和规则检查"""
+    from src.core.engine import FILE_EXTENSIONS
+    from src.core.rule_plan import RulePlan, resolve_language_rules
+    from src.parsers import ParserPool
+    from src.rules import rule_manager
+
+    files_by_language = {}
+    for root, _, names in os.walk(corpus_path):
+        for name in sorted(names):
+            language = FILE_EXTENSIONS.get(os.path.splitext(name)[1].lower())
+            if language is not None:
+                file_path = os.path.join(root, name)
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    files_by_language.setdefault(language, []).append((file_path, f.read()))
+
+    rules = rule_manager.get_rules_for_ruleset(ruleset)
+    pool = ParserPool(ruleset)
+    metrics = {}
+    for language, files in sorted(files_by_language.items()):
+        files.sort()
+        plan = RulePlan(language, ruleset, resolve_language_rules(ruleset, rules, language))
+        parser, _ = pool.get(files[0][0], language, plan)
+        total_bytes = sum(len(content.encode('utf-8')) for _, content in files)
+        total_lines = sum(content.count('\n') for _, content in files)
+
+        def scan_all():
+            for file_path, content in files:
+                parser.scan(file_path, content)
+
+        parser.scan(*files[0])
+        seconds = _median_time(scan_all, repeat)
+        key = language.lower().replace('+', 'p')
+        metrics[f"parser.{key}.mb_per_sec"] = _metric(total_bytes / 1048576 / seconds, 'MB/s', 'higher',
+                                                      files=len(files))
+        metrics[f"parser.{key}.lines_per_sec"] = _metric(total_lines / seconds, 'lines/s', 'higher',
+                                                         files=len(files))
+    metrics.update(_measure_python_stdlib(pool, ruleset, rules, repeat))
+    return metrics
+
+
+def _measure_python_stdlib(pool, ruleset, rules, repeat):
+    """Python解析器在标准库模块上的吞吐量
+
+    分别测量scan()（解析、事实表和全部规则检查）和只从已解析的语法树生成事实表的耗时
+    """
+    import ast
+    import importlib.util
+    from src.core.rule_plan import RulePlan, resolve_language_rules
+    from src.parsers.python_facts import collect_python_facts
+
+    files = []
+    for module_name in PYTHON_STDLIB_MODULES:
+        try:
+            spec = importlib.util.find_spec(module_name)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is None or not spec.origin or not spec.origin.endswith('.py'):
+            continue
+        with open(spec.origin, 'r', encoding='utf-8') as f:
+            files.append((spec.origin, f.read()))
+    if not files:
+        return {}
+
+    plan = RulePlan('Python', ruleset, resolve_language_rules(ruleset, rules, 'Python'))
+    parser, _ = pool.get(files[0][0], 'Python', plan)
+    trees = [ast.parse(content) for _, content in files]
+    total_bytes = sum(len(content.encode('utf-8')) for _, content in files)
+    total_lines = sum(content.count('\n') for _, content in files)
+    info = {'files': len(files), 'python': platform.python_version()}
+
+    def scan_all():
+        for file_path, content in files:
+            parser.scan(file_path, content)
+
+    def collect_all():
+        for tree in trees:
+            collect_python_facts(tree)
+
+    parser.scan(*files[0])
+    seconds = _median_time(scan_all, repeat)
+    fact_seconds = _median_time(collect_all, repeat)
+    return {
+        'parser.python_stdlib.mb_per_sec': _metric(total_bytes / 1048576 / seconds, 'MB/s', 'higher', **info),
+        'parser.python_stdlib.lines_per_sec': _metric(total_lines / seconds, 'lines/s', 'higher', **info),
+        'parser.python_stdlib.fact_lines_per_sec': _metric(total_lines / fact_seconds, 'lines/s', 'higher', **info)
+    }
+
+
+def run_reports_suite(corpus_path, manifest, ruleset, repeat):
+    """ReportGenerator生成各格式报告的耗时，输入为一次完整扫描的结果"""
+    from src.core.report_generator import ReportGenerator
+
+    engine = _new_engine(corpus_path, ruleset)
+    results = engine.run(max_workers=1, mode='thread')
+
+    metrics = {}
+    skipped = {}
+    output_dir = tempfile.mkdtemp(prefix='codeauditx-bench-report-')
+    try:
+        for report_format in REPORT_FORMATS:
+            if report_format == 'pdf':
+                try:
+                    import weasyprint  # noqa: F401
+                except Exception as e:
+                    skipped['report.pdf.seconds'] = f"未安装WeasyPrint: {str(e).splitlines()[0] if str(e) else e}"
+                    continue
+            output_path = os.path.join(output_dir, f"report.{report_format}")
+            generator = ReportGenerator(results, ruleset)
+            generator.generate_report(output_path, format=report_format)
+            # 报告生成很快，多重复几次降低噪声
+            seconds = _median_time(lambda: generator.generate_report(output_path, format=report_format),
+                                   max(repeat, 5))
+            metrics[f"report.{report_format}.seconds"] = _metric(seconds, 's', 'lower',
+                                                                 bytes=os.path.getsize(output_path))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return metrics, skipped
+
+
+def run_memory_suite(corpus_path, manifest, ruleset):
+    """违规详情的内存占用，用tracemalloc测量
+
+    第一遍扫描创建解析器并预热各种缓存，第二遍扫描保留下来的违规字典列表即为原来details的占用，
+    再测量把它们转换为ViolationList新分配的内存（包括首次出现的消息模板）
+    """
+    import gc
+    import tracemalloc
+    from src.core.engine import FILE_EXTENSIONS, analyze_file
+    from src.core.rule_plan import RulePlan, resolve_language_rules
+    from src.core.violations import ViolationList, ViolationTables
+    from src.parsers import ParserPool
+    from src.rules import rule_manager
+
+    rules = rule_manager.get_rules_for_ruleset(ruleset)
+    pool = ParserPool(ruleset)
+    plans = {}
+    files = []
+    for root, _, names in os.walk(corpus_path):
+        for name in names:
+            language = FILE_EXTENSIONS.get(os.path.splitext(name)[1].lower())
+            if language is None:
+                continue
+            if language not in plans:
+                plans[language] = RulePlan(language, ruleset, resolve_language_rules(ruleset, rules, language))
+            files.append((os.path.join(root, name), language))
+    files.sort()
+
+    def collect_details():
+        details = {}
+        for file_path, language in files:
+            record = analyze_file(file_path, language, ruleset, plans[language], parser_pool=pool)
+            if record.get('violations'):
+                details[file_path] = record['violations']
+        return details
+
+    collect_details()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        details = collect_details()
+        gc.collect()
+        dict_bytes = tracemalloc.get_traced_memory()[0] - before
+
+        before = tracemalloc.get_traced_memory()[0]
+        # 与扫描结果相同，所有文件共用一份编号表
+        tables = ViolationTables()
+        compact = {file_path: ViolationList.from_dicts(violations, tables)
+                   for file_path, violations in details.items()}
+        gc.collect()
+        compact_bytes = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    metrics = _measure_parser_allocations(files, pool, plans)
+    count = sum(len(violations) for violations in compact.values())
+    if count:
+        metrics.update({
+            'memory.dict_bytes_per_violation': _metric(dict_bytes / count, 'B', 'lower', violations=count),
+            'memory.compact_bytes_per_violation': _metric(compact_bytes / count, 'B', 'lower', violations=count),
+            'memory.compaction_ratio': _metric(dict_bytes / compact_bytes, 'x', 'higher', violations=count)
+        })
+    return metrics
+
+
+def _measure_parser_allocations(files, pool, plans):
+    """解析器扫描一个文件时按行拆分文件内容的次数，以及扫描期间的内存峰值
+
+    拆分次数用sys.setprofile()统计对文件内容（或由它派生的字符串）调用split()的次数，
+    每次拆分都会复制出整个文件的各行
+    """
+    import gc
+    import tracemalloc
+
+    contents = []
+    for file_path, language in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        parser, _ = pool.get(file_path, language, plans[language])
+        if parser is not None and content.strip():
+            contents.append((parser, file_path, content))
+    if not contents:
+        return {}
+
+    splits = 0
+
+    def count_splits(frame, event, arg):
+        nonlocal splits
+        # 只统计拆分整个文件（至少与文件的行数相当）的调用，不统计对单行的拆分
+        if (event == 'c_call' and getattr(arg, '__name__', None) == 'split'
+                and isinstance(getattr(arg, '__self__', None), str) and len(arg.__self__) >= minimum_length):
+            splits += 1
+
+    for parser, file_path, content in contents:
+        minimum_length = len(content) // 2
+        sys.setprofile(count_splits)
+        try:
+            parser.scan(file_path, content)
+        finally:
+            sys.setprofile(None)
+
+    peak_bytes = 0
+    for parser, file_path, content in contents:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            parser.scan(file_path, content)
+            peak_bytes += tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    total_lines = sum(content.count('\n') + 1 for _, _, content in contents)
+    return {
+        'memory.parser_line_splits_per_file': _metric(splits / len(contents), 'splits', 'lower',
+                                                      files=len(contents)),
+        'memory.parser_peak_bytes_per_line': _metric(peak_bytes / total_lines, 'B', 'lower', files=len(contents))
+    }
+
+
+def run_child(args):
+    """在子进程中运行一组测试，把结果以JSON输出到标准输出"""
+    sys.path.insert(0, REPO_ROOT)
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    with open(os.path.join(args.corpus, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    skipped = {}
+    if args.child == 'calibrate':
+        metrics = {'calibration': calibrate()}
+    elif args.child == 'scan':
+        metrics, skipped = run_scan_suite(args.corpus, manifest, args.ruleset, args.repeat, args.workers)
+    elif args.child == 'parsers':
+        metrics = run_parsers_suite(args.corpus, manifest, args.ruleset, args.repeat)
+    elif args.child == 'memory':
+        metrics = run_memory_suite(args.corpus, manifest, args.ruleset)
+    else:
+        metrics, skipped = run_reports_suite(args.corpus, manifest, args.ruleset, args.repeat)
+    print(json.dumps({'metrics': metrics, 'skipped': skipped}, ensure_ascii=False))
+
+
+def run_suite(suite, corpus_path, args, offline_path):
+    """启动子进程运行一组测试"""
+    command = [sys.executable, os.path.abspath(__file__), '--child', suite, '--corpus', corpus_path,
+               '--ruleset', args.ruleset, '--repeat', str(args.repeat), '--workers', str(args.workers)]
+    env = dict(os.environ)
+    if offline_path is not None:
+        # 外部工具都找不到，扫描只运行本仓库的Python代码
+        env['PATH'] = offline_path
+    env['PYTHONHASHSEED'] = '0'
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{suite}测试失败:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _threshold_for(name, thresholds):
+    """按最长匹配的通配符取得指标的阈值"""
+    matches = [pattern for pattern in thresholds if fnmatch.fnmatchcase(name, pattern)]
+    if not matches:
+        return DEFAULT_THRESHOLDS['*']
+    return thresholds[max(matches, key=len)]
+
+
+def compare(current, baseline, threshold=None, normalize=False, suites=SUITES):
+    """与基线比较
+
+    Args:
+        current: 本次结果
+        baseline: 基线结果
+        threshold: 覆盖所有指标的阈值，为None时使用基线中保存的阈值
+        normalize: 是否按校准负载的速度折算机器差异
+        suites: 本次运行的测试组，其他测试组的基线指标不参与比较
+
+    Returns:
+        tuple: (比较结果列表, 是否有回退)
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS, **baseline.get('thresholds', {}))
+    scale = 1.0
+    if normalize and baseline.get('calibration') and current.get('calibration'):
+        scale = current['calibration'] / baseline['calibration']
+
+    # 任一方在单核机器上生成时不比较加速比
+    min_cpus = min(baseline.get('machine', {}).get('cpus') or 1, current.get('machine', {}).get('cpus') or 1)
+    rows = []
+    regressed = False
+    for name, metric in sorted(current['metrics'].items()):
+        base = baseline['metrics'].get(name)
+        if min_cpus < SPEEDUP_MIN_CPUS and any(fnmatch.fnmatchcase(name, pattern) for pattern in SPEEDUP_METRICS):
+            rows.append({'name': name, 'current': metric['value'], 'baseline': base['value'] if base else None,
+                         'status': 'skipped'})
+            continue
+        if base is None or not base['value'] or not metric['value']:
+            rows.append({'name': name, 'current': metric['value'], 'baseline': None, 'status': 'new'})
+            continue
+        # 折算后的速度比，大于1表示比基线快；加速比和内存占用与机器速度无关，不折算
+        ratio = metric['value'] / base['value'] if metric['better'] == 'higher' else base['value'] / metric['value']
+        if not any(fnmatch.fnmatchcase(name, pattern) for pattern in UNSCALED_METRICS):
+            ratio /= scale
+        limit = threshold if threshold is not None else _threshold_for(name, thresholds)
+        status = 'regressed' if ratio < 1 - limit else ('improved' if ratio > 1 + limit else 'ok')
+        regressed = regressed or status == 'regressed'
+        rows.append({'name': name, 'current': metric['value'], 'baseline': base['value'], 'unit': metric['unit'],
+                     'change': ratio - 1, 'threshold': limit, 'status': status})
+    for name in sorted(set(baseline['metrics']) - set(current['metrics'])):
+        if METRIC_SUITES.get(name.split('.', 1)[0]) not in suites:
+            continue
+        rows.append({'name': name, 'current': None, 'baseline': baseline['metrics'][name]['value'],
+                     'status': 'skipped' if name in current.get('skipped', {}) else 'missing'})
+    return rows, regressed
+
+
+def print_results(result):
+    print(f"代码库: {result['corpus']['files']} 个文件，{result['corpus']['bytes'] / 1048576:.1f} MB"
+          f"（摘要 {result['corpus']['digest'][:12]}），校准 {result['calibration']:.1f} 轮/秒")
+    for name, metric in sorted(result['metrics'].items()):
+        extra = ''
+        if 'workers' in metric:
+            extra = f"（{metric['workers']} 个并发）"
+        print(f"  {name:<40} {metric['value']:>12.4f} {metric['unit']}{extra}")
+    for name, reason in sorted(result['skipped'].items()):
+        print(f"  {name:<40} 跳过: {reason}")
+
+
+def print_comparison(rows, scale=None):
+    print("与基线比较:" if scale is None else f"与基线比较（机器速度折算系数 {scale:.2f}）:")
+    labels = {'ok': '正常', 'improved': '提升', 'regressed': '回退', 'new': '新增', 'missing': '缺失',
+              'skipped': '跳过'}
+    for row in rows:
+        if 'change' in row:
+            print(f"  {row['name']:<40} {row['baseline']:>12.4f} -> {row['current']:>12.4f} {row['unit']:<8}"
+                  f" {row['change'] * 100:+7.1f}%（阈值 {row['threshold'] * 100:.0f}%） {labels[row['status']]}")
+        else:
+            print(f"  {row['name']:<40} {labels[row['status']]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CodeAuditX扫描性能基准测试')
+    add_corpus_arguments(parser)
+    parser.add_argument('--corpus', metavar='PATH', default=None,
+                        help='使用已生成的代码库（包含manifest.json），默认在临时目录中按参数生成')
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=list(SUITES), help='运行的测试组')
+    parser.add_argument('--ruleset', default='PEP8', help='扫描使用的规则集')
+    parser.add_argument('--repeat', type=int, default=3, help='每项测量的重复次数，取中位数')
+    parser.add_argument('--workers', type=int, default=max(2, os.cpu_count() or 1),
+                        help='并行测试的线程或进程数')
+    parser.add_argument('--external-tools', action='store_true',
+                        help='允许调用本机安装的外部工具，结果不再与基线可比')
+    parser.add_argument('--output', metavar='PATH', default=None, help='把结果写入JSON文件')
+    parser.add_argument('--save-baseline', metavar='PATH', default=None, help='把结果保存为基线')
+    parser.add_argument('--compare', metavar='PATH', default=None,
+                        help='与基线比较，有指标回退时返回状态码1')
+    parser.add_argument('--threshold', type=float, default=None,
+                        help='回退阈值（比例），覆盖基线中按指标设置的阈值')
+    parser.add_argument('--normalize', action='store_true',
+                        help='比较时按校准负载折算机器速度差异，用于与其他机器生成的基线比较')
+    parser.add_argument('--child', choices=SUITES + ('calibrate',), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('version') != BASELINE_FORMAT_VERSION:
+            print(f"错误: 不支持的基线格式: {args.compare}", file=sys.stderr)
+            return 2
+
+    workdir = None
+    offline_path = None
+    try:
+        if args.corpus:
+            corpus_path = args.corpus
+            with open(os.path.join(corpus_path, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        else:
+            if baseline is not None:
+                # 比较时忽略命令行中的生成参数，使用与基线相同的代码库
+                parameters = dict(baseline['corpus']['parameters'])
+                parameters.pop('files_per_dir', None)
+            else:
+                parameters = corpus_parameters(args)
+            workdir = tempfile.mkdtemp(prefix='codeauditx-bench-')
+            corpus_path = os.path.join(workdir, 'corpus')
+            manifest = generate_corpus(corpus_path, **parameters)
+
+        if baseline is not None and baseline['corpus']['digest'] != manifest['digest']:
+            print("错误: 代码库与基线不同，无法比较，请使用与基线相同的生成参数", file=sys.stderr)
+            return 2
+
+        if not args.external_tools:
+            offline_path = tempfile.mkdtemp(prefix='codeauditx-bench-path-')
+
+        result = {
+            'version': BASELINE_FORMAT_VERSION,
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'machine': {
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count()
+            },
+            'corpus': {key: manifest[key] for key in ('parameters', 'files', 'bytes', 'lines', 'digest')},
+            'ruleset': args.ruleset,
+            'repeat': args.repeat,
+            'external_tools': args.external_tools,
+            'calibration': run_suite('calibrate', corpus_path, args, offline_path)['metrics']['calibration'],
+            'metrics': {},
+            'skipped': {}
+        }
+        for suite in args.suites:
+            print(f"运行 {suite} ...", file=sys.stderr)
+            output = run_suite(suite, corpus_path, args, offline_path)
+            result['metrics'].update(output['metrics'])
+            result['skipped'].update(output['skipped'])
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if offline_path is not None:
+            shutil.rmtree(offline_path, ignore_errors=True)
+
+    print_results(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        result['thresholds'] = dict(DEFAULT_THRESHOLDS)
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"基线已保存到 {args.save_baseline}")
+
+    if baseline is not None:
+        rows, regressed = compare(result, baseline, args.threshold, normalize=args.normalize,
+                                  suites=args.suites)
+        scale = None
+        if args.normalize and baseline.get('calibration'):
+            scale = result['calibration'] / baseline['calibration']
+        print_comparison(rows, scale)
+        if regressed:
+            print("存在性能回退", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
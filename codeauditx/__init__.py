@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CodeAuditX命令行包装包，支持 python -m codeauditx scan PATH
+"""
+
+import os
+import sys
+
+# 添加项目根目录到Python路径，使src包可被导入
+_project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _project_root not in sys.path:
+    sys.path.insert(0, _project_root)
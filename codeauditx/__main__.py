@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import codeauditx  # noqa: F401  设置项目路径
+from src.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main())
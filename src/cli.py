@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+CodeAuditX命令行入口
+无界面运行扫描，适用于CI流水线和服务器环境，不会导入PyQt5
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+# 报告格式与文件扩展名的对应关系
+REPORT_FORMATS = {
+    '.txt': 'txt',
+    '.json': 'json',
+    '.csv': 'csv',
+    '.html': 'html',
+    '.htm': 'html',
+    '.pdf': 'pdf'
+}
+
+# 性能分析摘要中每个表格输出的行数
+PROFILE_TABLE_ROWS = 10
+
+# 跳过原因的显示名称
+SKIP_REASON_LABELS = {
+    'excluded_dir': '排除的目录',
+    'excluded_file': '排除的文件',
+    'ignored': '忽略文件中的规则',
+    'unsupported_type': '不支持的类型',
+    'too_large': '超过大小上限',
+    'unreadable': '无法读取',
+    'timeout': '扫描超时',
+    'error': '扫描出错'
+}
+
+# 内存上限的单位后缀
+SIZE_UNITS = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def _parse_size(value):
+    """解析带K、M、G后缀的字节数，例如512M"""
+    text = value.strip().upper().rstrip('B')
+    multiplier = 1
+    if text and text[-1] in SIZE_UNITS:
+        multiplier = SIZE_UNITS[text[-1]]
+        text = text[:-1]
+    try:
+        size = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的大小: {value}")
+    if size < 0:
+        raise argparse.ArgumentTypeError(f"无效的大小: {value}")
+    return int(size * multiplier)
+
+
+def _json_default(value):
+    """把转存到磁盘的违规详情和紧凑保存的违规列表转换为字典和列表，用于JSON输出"""
+    from src.core.violations import json_default
+    if isinstance(value, Mapping):
+        return dict(value.items())
+    return json_default(value)
+
+
+def _build_parser():
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='codeauditx',
+        description='CodeAuditX 代码规范审计工具（命令行模式）'
+    )
+    subparsers = parser.add_subparsers(dest='command')
+
+    scan_parser = subparsers.add_parser('scan', help='扫描代码目录')
+    scan_parser.add_argument('path', help='要扫描的项目目录')
+    scan_parser.add_argument('--ruleset', default=None,
+                             help='规则集名称（Google/PEP8/Airbnb/Standard），默认使用配置中的规则集')
+    scan_parser.add_argument('--threads', type=int, default=None,
+                             help='线程或进程数，默认根据系统性能自动调整')
+    scan_parser.add_argument('--mode', choices=['auto', 'thread', 'process'], default='auto',
+                             help='执行模式，auto根据仓库大小自动选择线程或进程模式')
+    scan_parser.add_argument('--no-cache', action='store_true',
+                             help='不使用增量扫描缓存，重新解析所有文件')
+    scan_parser.add_argument('--cache-dir', default=None,
+                             help='增量扫描缓存目录，默认使用配置中的目录')
+    scan_parser.add_argument('--no-gitignore', action='store_true',
+                             help='不读取.gitignore和.codeauditxignore中的忽略规则')
+    scan_parser.add_argument('--git-files', action='store_true',
+                             help='项目是git仓库时直接使用git ls-files获取文件列表，不遍历目录')
+    scan_parser.add_argument('--file-timeout', metavar='SECONDS', type=float, default=None,
+                             help='单个文件的扫描时间上限，超时的文件记为跳过，指定时使用多进程模式，0表示不限制')
+    scan_parser.add_argument('--profile', metavar='PATH', nargs='?', const='codeauditx.prof', default=None,
+                             help='记录各阶段、规则和语言的耗时，并把cProfile数据写入PATH（默认codeauditx.prof）')
+    scan_parser.add_argument('--trace', metavar='PATH', default=None,
+                             help='把扫描时间线导出为Chrome Trace Event JSON，可以在chrome://tracing或Perfetto中打开')
+    scan_parser.add_argument('--trace-sample', metavar='RATE', type=float, default=1.0,
+                             help='时间线中记录扫描过程的文件比例，0到1之间，默认记录全部文件')
+    scan_parser.add_argument('--memory-budget', metavar='SIZE', type=_parse_size, default=None,
+                             help='扫描进程的内存上限，例如512M、2G，超出后违规详情转存到临时磁盘文件，0表示不限制')
+    scan_parser.add_argument('--no-schedule', action='store_true',
+                             help='按文件查找顺序扫描，不按预计耗时调度')
+    scan_parser.add_argument('--diff-base', metavar='REF', default=None,
+                             help='只扫描相对该git版本变更的文件，并与扫描基线合并出整个项目的结果')
+    scan_parser.add_argument('--baseline', metavar='PATH', default=None,
+                             help='增量扫描使用的基线文件，默认按项目路径和规则集保存在~/.codeauditx/baselines')
+    scan_parser.add_argument('--save-baseline', metavar='PATH', nargs='?', const='', default=None,
+                             help='扫描完成后保存基线，不指定路径时保存到默认位置')
+    scan_parser.add_argument('--output', '-o', default=None,
+                             help='报告输出路径，不指定时只在终端输出摘要')
+    scan_parser.add_argument('--jsonl', metavar='PATH', default=None,
+                             help='每扫描完一个文件立即以JSON Lines格式输出该文件的记录，PATH为-时输出到标准输出')
+    scan_parser.add_argument('--format', dest='report_format', default=None,
+                             choices=['txt', 'json', 'csv', 'html', 'pdf'],
+                             help='报告格式，默认根据输出文件扩展名推断')
+    scan_parser.add_argument('--verbose', '-v', action='store_true',
+                             help='输出详细日志')
+    return parser
+
+
+def _print_summary(results, file=None):
+    """在终端输出扫描摘要"""
+    file = file or sys.stdout
+    print(f"扫描文件数: {results.get('scanned_files', 0)}/{results.get('total_files', 0)}", file=file)
+    print(f"跳过文件数: {results.get('skipped_files', 0)}", file=file)
+    skipped_by_reason = results.get('skipped_by_reason', {})
+    if skipped_by_reason:
+        reasons = '，'.join(f"{SKIP_REASON_LABELS.get(reason, reason)} {count}"
+                           for reason, count in sorted(skipped_by_reason.items()))
+        print(f"未扫描的文件: {reasons}", file=file)
+    for timeout in results.get('timeouts', [])[:10]:
+        print(f"  超时: {timeout['file_path']}（阶段: {timeout.get('stage')}）", file=file)
+    print(f"代码总行数: {results.get('total_lines', 0)}", file=file)
+    print(f"违规总数: {sum(results.get('violations', {}).values())}", file=file)
+    for severity, count in results.get('violations_by_severity', {}).items():
+        print(f"  {severity}: {count}", file=file)
+    incremental = results.get('incremental')
+    if incremental:
+        print(f"增量扫描: 相对 {incremental.get('diff_ref') or incremental['base_ref']} 变更 {incremental['changed_files']} 个文件，"
+              f"删除 {incremental['deleted_files']} 个文件", file=file)
+    cache = results.get('cache', {})
+    if cache.get('enabled'):
+        print(f"缓存命中: {cache.get('hits', 0)}，未命中: {cache.get('misses', 0)}，"
+              f"节省读取: {cache.get('bytes_saved', 0)} 字节", file=file)
+    concurrency = results.get('concurrency')
+    if concurrency:
+        unit = '进程' if concurrency.get('mode') == 'process' else '线程'
+        if concurrency.get('adaptive'):
+            changes = sum(1 for decision in concurrency.get('decisions', []) if decision['action'] != 'hold')
+            print(f"并发: {concurrency['initial_workers']} -> {concurrency['final_workers']} 个{unit}"
+                  f"（可用CPU {concurrency.get('available_cpus')}，调整 {changes} 次）", file=file)
+        else:
+            print(f"并发: {concurrency['max_workers']} 个{unit}", file=file)
+    schedule = results.get('schedule') or {}
+    if schedule.get('enabled') and 'predicted_wall_seconds' in schedule:
+        print(f"预计耗时: {schedule['predicted_wall_seconds']:.2f} 秒，"
+              f"实际: {schedule.get('actual_wall_seconds', 0):.2f} 秒"
+              f"（{schedule.get('files_with_history', 0)} 个文件有历史耗时）", file=file)
+    profile = results.get('profile')
+    if profile:
+        _print_profile(profile, file)
+    trace = results.get('trace') or {}
+    if trace.get('enabled'):
+        print(f"时间线: {trace['events']} 个时间段，{trace['traced_files']} 个文件"
+              f"（抽样比例 {trace['sample_rate']:g}，丢弃最早的 {trace['dropped_events']} 个时间段）", file=file)
+    memory = results.get('memory') or {}
+    if memory.get('spilled'):
+        print(f"内存: 峰值 {memory['peak_rss'] / 1024 / 1024:.0f} MB 超出上限 "
+              f"{memory['budget'] / 1024 / 1024:.0f} MB，{memory['spilled_files']} 个文件的违规详情已转存到磁盘"
+              f"（{memory['spill_bytes'] / 1024 / 1024:.1f} MB）", file=file)
+    print(f"扫描耗时: {results.get('scan_time', 0):.2f} 秒", file=file)
+
+
+def _print_profile(profile, file, limit=PROFILE_TABLE_ROWS):
+    """输出性能分析摘要：耗时最多的阶段、规则、命名规则缓存命中率和最慢的文件"""
+    for category, title in (('phases', '阶段'), ('languages', '语言'), ('parsers', '解析器'), ('rules', '规则检查'),
+                            ('extractors', '提取'), ('external_tools', '外部工具')):
+        entries = profile.get(category) or {}
+        if not entries:
+            continue
+        print(f"{title}耗时（总计/p50/p95/p99，秒）:", file=file)
+        for name, stats in list(entries.items())[:limit]:
+            print(f"  {name}: {stats['total']:.3f} / {stats['p50']:.4f} / {stats['p95']:.4f} / {stats['p99']:.4f}"
+                  f"（{stats['files']} 个文件）", file=file)
+    naming_memo = profile.get('naming_memo') or {}
+    if naming_memo.get('lookups'):
+        print(f"命名规则缓存: 命中率 {naming_memo['hit_rate']:.1%}（{naming_memo['lookups']} 次查询，"
+              f"{naming_memo['misses']} 次未命中）", file=file)
+    slow_files = profile.get('slow_files') or []
+    if slow_files:
+        print("最慢的文件:", file=file)
+        for entry in slow_files[:limit]:
+            print(f"  {entry['seconds']:.3f} 秒  {entry['file_path']}（{entry.get('size', 0)} 字节）", file=file)
+    if profile.get('cprofile_path'):
+        print(f"cProfile数据: {profile['cprofile_path']}", file=file)
+
+
+def _run_scan(args):
+    """执行scan子命令"""
+    from src.core.engine import ScanEngine
+
+    if not os.path.isdir(args.path):
+        print(f"错误: 目录不存在: {args.path}", file=sys.stderr)
+        return 2
+
+    jsonl_to_stdout = args.jsonl == '-'
+    if jsonl_to_stdout and args.report_format == 'json' and not args.output:
+        print("错误: --jsonl - 与 --format json 不能同时输出到标准输出", file=sys.stderr)
+        return 2
+
+    ruleset = args.ruleset
+    if ruleset is None:
+        from src.core.config_manager import config_manager
+        ruleset = config_manager.get_default_ruleset()
+
+    log_callback = None
+    if args.verbose:
+        log_callback = lambda message: print(message, file=sys.stderr)
+
+    engine = ScanEngine(args.path, ruleset, log_callback=log_callback,
+                        use_cache=False if args.no_cache else None, cache_dir=args.cache_dir,
+                        respect_gitignore=False if args.no_gitignore else None,
+                        use_git_ls_files=True if args.git_files else None,
+                        cost_scheduling=False if args.no_schedule else None,
+                        file_timeout=args.file_timeout,
+                        profile=args.profile is not None, cprofile_path=args.profile or None,
+                        trace=bool(args.trace), trace_sample_rate=args.trace_sample,
+                        memory_budget=args.memory_budget)
+    # 只有工作进程可以在超时后被终止
+    mode = args.mode
+    if args.file_timeout and mode == 'auto':
+        mode = 'process'
+    writer = None
+    try:
+        save_baseline_path = args.save_baseline
+        if save_baseline_path == '':
+            from src.core.baseline import default_baseline_path
+            save_baseline_path = args.baseline or default_baseline_path(args.path, ruleset)
+
+        if args.jsonl:
+            # 流式输出时只有生成报告才需要保留违规详情
+            from src.core.jsonl_writer import JsonLinesWriter
+            writer = JsonLinesWriter(args.jsonl)
+            keep_details = bool(args.output) or args.report_format == 'json'
+            for record in engine.iter_scan(max_workers=args.threads, mode=mode, base_ref=args.diff_base,
+                                           baseline_path=args.baseline, save_baseline_path=save_baseline_path,
+                                           keep_details=keep_details):
+                writer.write_record(record)
+            results = engine.results
+            writer.write_summary(results)
+        else:
+            results = engine.run(max_workers=args.threads, mode=mode, base_ref=args.diff_base,
+                                 baseline_path=args.baseline, save_baseline_path=save_baseline_path)
+    except KeyboardInterrupt:
+        engine.stop()
+        print("扫描已取消", file=sys.stderr)
+        return 130
+    except BrokenPipeError:
+        # 下游程序提前关闭了管道，停止扫描
+        engine.stop()
+        # 把标准输出重定向到空设备，避免解释器退出时刷新缓冲区再次报错
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except Exception as e:
+        logger.error(f"扫描失败: {str(e)}")
+        print(f"扫描失败: {str(e)}", file=sys.stderr)
+        return 1
+    finally:
+        if writer is not None:
+            writer.close()
+
+    try:
+        if args.output:
+            report_format = args.report_format
+            if report_format is None:
+                _, ext = os.path.splitext(args.output)
+                report_format = REPORT_FORMATS.get(ext.lower(), 'txt')
+
+            # ReportGenerator仅在需要输出报告时导入，PDF格式才会加载WeasyPrint
+            from src.core.report_generator import ReportGenerator
+            try:
+                generator = ReportGenerator(results, ruleset)
+                generator.generate_report(args.output, format=report_format)
+                print(f"报告已保存到: {args.output}", file=sys.stderr)
+            except Exception as e:
+                print(f"报告生成失败: {str(e)}", file=sys.stderr)
+                return 1
+        elif args.report_format == 'json':
+            json.dump(results, sys.stdout, ensure_ascii=False, indent=2, default=_json_default)
+            print()
+            return 0
+    finally:
+        # 时间线包含报告生成的耗时，在报告生成之后导出
+        if args.trace and engine.export_trace(args.trace):
+            print(f"扫描时间线已保存到: {args.trace}", file=sys.stderr)
+
+    # JSON Lines写入标准输出时，摘要改为输出到标准错误，避免混入记录流
+    _print_summary(results, file=sys.stderr if jsonl_to_stdout else None)
+    return 0
+
+
+def main(argv=None):
+    """命令行主函数，返回进程退出码"""
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command is None:
+        parser.print_help()
+        return 1
+
+    # 各模块在导入时会把日志级别设置为INFO，这里统一覆盖
+    logging.basicConfig()
+    logging.getLogger().setLevel(logging.DEBUG if getattr(args, 'verbose', False) else logging.WARNING)
+
+    if args.command == 'scan':
+        return _run_scan(args)
+
+    parser.print_help()
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+扫描基线
+保存一次完整扫描中每个文件的扫描记录，增量扫描时用变更文件的新记录替换基线中的旧记录，
+再由全部记录重新汇总出整个项目的统计结果
+"""
+
+import os
+import json
+import hashlib
+import logging
+import datetime
+
+from src.core.violations import json_default
+
+logger = logging.getLogger(__name__)
+
+# 基线文件格式版本
+BASELINE_FORMAT_VERSION = 1
+
+# 默认基线目录
+DEFAULT_BASELINE_DIR = os.path.join(os.path.expanduser('~'), '.codeauditx', 'baselines')
+
+
+def default_baseline_path(project_path, ruleset):
+    """根据项目路径和规则集生成默认基线文件路径"""
+    key = f"{os.path.abspath(project_path)}\0{ruleset}"
+    name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DEFAULT_BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(baseline_path, project_path, ruleset, file_records, revision=None):
+    """保存扫描基线
+
+    文件路径以相对项目目录的形式保存，基线可以在不同位置的检出目录间共用
+
+    Args:
+        baseline_path: 基线文件路径
+        project_path: 项目路径
+        ruleset: 规则集名称
+        file_records: 每个文件的扫描记录，键为文件路径
+        revision: 生成基线时的git提交哈希
+
+    Returns:
+        bool: 是否保存成功
+    """
+    try:
+        files = {}
+        for file_path, record in file_records.items():
+            relative_path = os.path.relpath(file_path, project_path).replace(os.sep, '/')
+            files[relative_path] = record
+
+        data = {
+            'version': BASELINE_FORMAT_VERSION,
+            'ruleset': ruleset,
+            'revision': revision,
+            'created_at': datetime.datetime.now().isoformat(),
+            'files': files
+        }
+
+        baseline_dir = os.path.dirname(baseline_path)
+        if baseline_dir:
+            os.makedirs(baseline_dir, exist_ok=True)
+
+        # 先写临时文件再替换，避免中断时留下损坏的基线
+        temp_path = f"{baseline_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, default=json_default)
+        os.replace(temp_path, baseline_path)
+
+        logger.info(f"扫描基线已保存到 {baseline_path}，共 {len(files)} 个文件")
+        return True
+    except Exception as e:
+        logger.error(f"保存扫描基线失败: {str(e)}")
+        return False
+
+
+def load_baseline(baseline_path, project_path, ruleset):
+    """加载扫描基线
+
+    Args:
+        baseline_path: 基线文件路径
+        project_path: 项目路径，用于把相对路径还原为扫描时使用的路径
+        ruleset: 规则集名称，与基线不一致时视为无效
+
+    Returns:
+        tuple: (file_records, revision)，基线不存在或无效时file_records为None
+    """
+    if not baseline_path or not os.path.exists(baseline_path):
+        return None, None
+
+    try:
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.error(f"读取扫描基线失败: {str(e)}")
+        return None, None
+
+    if data.get('version') != BASELINE_FORMAT_VERSION:
+        logger.warning(f"扫描基线格式版本不匹配: {baseline_path}")
+        return None, None
+
+    if data.get('ruleset') != ruleset:
+        logger.warning(f"扫描基线使用的规则集 {data.get('ruleset')} 与当前规则集 {ruleset} 不一致")
+        return None, None
+
+    file_records = {}
+    for relative_path, record in data.get('files', {}).items():
+        file_path = os.path.join(project_path, *relative_path.split('/'))
+        file_records[file_path] = record
+
+    return file_records, data.get('revision')
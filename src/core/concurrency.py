@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+并发控制
+读取cgroup v1/v2中的CPU配额和内存上限，得到容器中实际可用的CPU核心数；
+扫描过程中按文件吞吐量调整同时执行的任务数（爬山法），每次调整都记录下来写入扫描结果
+"""
+
+import os
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# cgroup文件系统挂载点
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# 吞吐量变化超过该比例才认为有提升或下降，避免测量噪声引起来回调整
+THROUGHPUT_TOLERANCE = 0.05
+
+# 两次调整之间的最短时间（秒）
+ADJUST_INTERVAL = 1.0
+
+# 内存使用超过内存上限的该比例时减少并发
+MEMORY_PRESSURE_RATIO = 0.85
+
+# 扫描结果中最多记录的调整次数
+MAX_RECORDED_DECISIONS = 256
+
+# 在最佳并发数上保持多少个测量周期后重新尝试调整
+PROBE_EVERY_INTERVALS = 5
+
+
+def _read_file(path):
+    """读取cgroup文件内容，不存在或无法读取时返回None"""
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _get_cgroup_paths():
+    """从/proc/self/cgroup读取当前进程所在的cgroup路径
+
+    Returns:
+        dict: v2的路径键为''，v1的路径键为控制器名称，例如'cpu'、'memory'
+    """
+    paths = {}
+    content = _read_file('/proc/self/cgroup')
+    if not content:
+        return paths
+    for line in content.splitlines():
+        parts = line.split(':', 2)
+        if len(parts) != 3:
+            continue
+        _, controllers, path = parts
+        if not controllers:
+            paths[''] = path
+        else:
+            for controller in controllers.split(','):
+                paths[controller] = path
+    return paths
+
+
+def _candidate_dirs(base, path):
+    """cgroup目录的候选位置，容器中/proc/self/cgroup给出的路径可能不在挂载点下"""
+    dirs = []
+    if path and path != '/':
+        dirs.append(os.path.join(base, path.lstrip('/')))
+    dirs.append(base)
+    return dirs
+
+
+def read_cgroup_limits():
+    """读取cgroup中的CPU配额和内存上限
+
+    Returns:
+        dict: version为1、2或None；cpu_quota为可用的CPU核心数（可能是小数），未限制时为None；
+              memory_limit为内存上限（字节），未限制时为None
+    """
+    limits = {'version': None, 'cpu_quota': None, 'memory_limit': None}
+    if not os.path.isdir(CGROUP_ROOT):
+        return limits
+
+    paths = _get_cgroup_paths()
+
+    # cgroup v2：统一层级，根目录下有cgroup.controllers
+    if os.path.exists(os.path.join(CGROUP_ROOT, 'cgroup.controllers')):
+        limits['version'] = 2
+        for directory in _candidate_dirs(CGROUP_ROOT, paths.get('')):
+            cpu_max = _read_file(os.path.join(directory, 'cpu.max'))
+            if cpu_max is None:
+                continue
+            quota, _, period = cpu_max.partition(' ')
+            if quota != 'max':
+                try:
+                    limits['cpu_quota'] = int(quota) / int(period or 100000)
+                except ValueError:
+                    pass
+            break
+        for directory in _candidate_dirs(CGROUP_ROOT, paths.get('')):
+            memory_max = _read_file(os.path.join(directory, 'memory.max'))
+            if memory_max is None:
+                continue
+            if memory_max != 'max':
+                try:
+                    limits['memory_limit'] = int(memory_max)
+                except ValueError:
+                    pass
+            break
+        return limits
+
+    # cgroup v1：每个控制器单独挂载
+    for cpu_dir_name in ('cpu,cpuacct', 'cpu', 'cpuacct,cpu'):
+        cpu_base = os.path.join(CGROUP_ROOT, cpu_dir_name)
+        if not os.path.isdir(cpu_base):
+            continue
+        limits['version'] = 1
+        for directory in _candidate_dirs(cpu_base, paths.get('cpu')):
+            quota = _read_file(os.path.join(directory, 'cpu.cfs_quota_us'))
+            period = _read_file(os.path.join(directory, 'cpu.cfs_period_us'))
+            if quota is None or period is None:
+                continue
+            try:
+                if int(quota) > 0 and int(period) > 0:
+                    limits['cpu_quota'] = int(quota) / int(period)
+            except ValueError:
+                pass
+            break
+        break
+
+    memory_base = os.path.join(CGROUP_ROOT, 'memory')
+    if os.path.isdir(memory_base):
+        limits['version'] = 1
+        for directory in _candidate_dirs(memory_base, paths.get('memory')):
+            memory_limit = _read_file(os.path.join(directory, 'memory.limit_in_bytes'))
+            if memory_limit is None:
+                continue
+            try:
+                value = int(memory_limit)
+                # 未限制时v1给出一个接近2^63的值
+                if 0 < value < (1 << 60):
+                    limits['memory_limit'] = value
+            except ValueError:
+                pass
+            break
+
+    return limits
+
+
+def get_available_cpus(limits=None):
+    """获取当前进程实际可用的CPU核心数，同时考虑CPU亲和性和cgroup配额"""
+    try:
+        cpu_count = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpu_count = os.cpu_count() or 1
+
+    if limits is None:
+        limits = read_cgroup_limits()
+    if limits.get('cpu_quota'):
+        cpu_count = min(cpu_count, max(1, math.ceil(limits['cpu_quota'])))
+    return max(1, cpu_count)
+
+
+def get_memory_usage(include_children=True):
+    """获取当前进程及其子进程占用的物理内存（字节），无法获取时返回None
+
+    Args:
+        include_children: 是否计入子进程，为False时只统计当前进程
+    """
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+
+    if psutil is not None:
+        try:
+            process = psutil.Process()
+            usage = process.memory_info().rss
+            for child in (process.children(recursive=True) if include_children else ()):
+                try:
+                    usage += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return usage
+        except psutil.Error:
+            return None
+
+    # 未安装psutil时读取/proc，只能得到当前进程的内存占用
+    statm = _read_file('/proc/self/statm')
+    if statm:
+        try:
+            return int(statm.split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (ValueError, IndexError, OSError, AttributeError):
+            return None
+    return None
+
+
+class AdaptiveConcurrencyController:
+    """按吞吐量调整并发任务数的控制器
+
+    每个测量周期结束时把本周期的文件吞吐量与目前最佳的吞吐量比较：有明显提升时沿当前方向继续调整，
+    否则回到最佳并发数，并定期向两个方向重新尝试。内存使用接近cgroup上限时优先减少并发。
+    控制器只在收集结果的线程中使用，不需要加锁
+    """
+
+    def __init__(self, initial_workers, min_workers=1, max_workers=None, adaptive=True,
+                 fixed_window=None, memory_limit=None, interval=ADJUST_INTERVAL):
+        """初始化控制器
+
+        Args:
+            initial_workers: 初始并发任务数
+            min_workers: 并发任务数下限
+            max_workers: 并发任务数上限，即线程池或进程池的大小
+            adaptive: 是否根据吞吐量调整，为False时使用固定窗口
+            fixed_window: 不调整时同时提交的任务数，为None时等于initial_workers
+            memory_limit: 内存上限（字节），为None时不检查内存
+            interval: 测量周期（秒）
+        """
+        self.min_workers = max(1, min_workers)
+        self.max_workers = max(self.min_workers, max_workers or initial_workers)
+        self.workers = min(self.max_workers, max(self.min_workers, initial_workers))
+        self.initial_workers = self.workers
+        self.adaptive = adaptive
+        self.fixed_window = fixed_window or self.workers
+        self.memory_limit = memory_limit
+        self.interval = interval
+
+        self.direction = 1
+        self.best_rate = None
+        self.best_workers = self.workers
+        self.plateau_intervals = 0
+        self.decisions = []
+        self.decisions_dropped = 0
+
+        self.total_files = 0
+        self.total_bytes = 0
+        self.start_time = time.monotonic()
+        self._period_start = self.start_time
+        self._period_files = 0
+        self._period_bytes = 0
+
+    @property
+    def window(self):
+        """当前允许同时提交的任务数"""
+        return self.workers if self.adaptive else self.fixed_window
+
+    def record(self, files, nbytes):
+        """记录完成的文件数和字节数，测量周期结束时调整并发数
+
+        Returns:
+            dict: 本次做出的调整记录，没有调整时返回None
+        """
+        self.total_files += files
+        self.total_bytes += nbytes
+        self._period_files += files
+        self._period_bytes += nbytes
+
+        if not self.adaptive:
+            return None
+
+        now = time.monotonic()
+        elapsed = now - self._period_start
+        # 周期太短或完成的文件太少时测量误差较大
+        if elapsed < self.interval or self._period_files < self.workers:
+            return None
+
+        files_per_sec = self._period_files / elapsed
+        bytes_per_sec = self._period_bytes / elapsed
+        self._period_start = now
+        self._period_files = 0
+        self._period_bytes = 0
+        return self._adjust(now, files_per_sec, bytes_per_sec)
+
+    def _adjust(self, now, files_per_sec, bytes_per_sec):
+        """根据本周期的吞吐量决定下一周期的并发数
+
+        记录目前吞吐量最高的并发数，调整后吞吐量没有明显提升时回到该并发数，
+        在最佳并发数上保持一段时间后再向另一方向尝试
+        """
+        previous_workers = self.workers
+        memory_usage = get_memory_usage() if self.memory_limit else None
+
+        if memory_usage is not None and memory_usage > self.memory_limit * MEMORY_PRESSURE_RATIO:
+            action = 'shrink'
+            reason = 'memory_pressure'
+            self.best_rate = None
+        elif self.best_rate is None:
+            self.best_rate = files_per_sec
+            self.best_workers = self.workers
+            action = 'grow' if self.direction > 0 else 'shrink'
+            reason = 'initial_probe'
+        elif files_per_sec > self.best_rate * (1 + THROUGHPUT_TOLERANCE):
+            # 调整带来了提升，沿当前方向继续
+            self.best_rate = files_per_sec
+            self.best_workers = self.workers
+            self.plateau_intervals = 0
+            action = 'grow' if self.direction > 0 else 'shrink'
+            reason = 'throughput_improved'
+        elif self.workers != self.best_workers:
+            # 调整没有带来提升，回到最佳并发数，下次向另一方向尝试
+            action = 'grow' if self.best_workers > self.workers else 'shrink'
+            reason = 'no_improvement'
+            self.direction = -self.direction
+            self.plateau_intervals = 0
+        else:
+            # 文件类型的分布会随扫描进度变化，在最佳并发数上持续更新参考吞吐量
+            self.best_rate = files_per_sec
+            self.plateau_intervals += 1
+            if self.plateau_intervals >= PROBE_EVERY_INTERVALS:
+                self.plateau_intervals = 0
+                if self.workers <= self.min_workers:
+                    self.direction = 1
+                elif self.workers >= self.max_workers:
+                    self.direction = -1
+                action = 'grow' if self.direction > 0 else 'shrink'
+                reason = 'plateau_probe'
+            else:
+                action = 'hold'
+                reason = 'throughput_stable'
+
+        if reason == 'no_improvement':
+            self.workers = self.best_workers
+        elif action == 'grow':
+            self.workers = min(self.max_workers, self.workers + 1)
+        elif action == 'shrink':
+            self.workers = max(self.min_workers, self.workers - 1)
+        if self.workers == previous_workers:
+            action = 'hold'
+
+        decision = {
+            'time': round(now - self.start_time, 3),
+            'files_per_sec': round(files_per_sec, 2),
+            'bytes_per_sec': round(bytes_per_sec, 1),
+            'workers_before': previous_workers,
+            'workers_after': self.workers,
+            'action': action,
+            'reason': reason
+        }
+        if memory_usage is not None:
+            decision['memory_usage'] = memory_usage
+
+        if len(self.decisions) < MAX_RECORDED_DECISIONS:
+            self.decisions.append(decision)
+        else:
+            self.decisions_dropped += 1
+        return decision
+
+    def summary(self):
+        """获取控制器的统计信息，用于写入扫描结果"""
+        elapsed = time.monotonic() - self.start_time
+        return {
+            'adaptive': self.adaptive,
+            'initial_workers': self.initial_workers,
+            'final_workers': self.workers,
+            'min_workers': self.min_workers,
+            'max_workers': self.max_workers,
+            'window': self.window,
+            'files_per_sec': round(self.total_files / elapsed, 2) if elapsed > 0 else 0,
+            'bytes_per_sec': round(self.total_bytes / elapsed, 1) if elapsed > 0 else 0,
+            'decisions': list(self.decisions),
+            'decisions_dropped': self.decisions_dropped
+        }
@@ -34,7 +34,17 @@ class ConfigManager:
                 "*.temp", "*.cache", "*.log"
             ],
             "max_file_size": 5242880,  # 5MB
-            "concurrency": 4
+            "respect_gitignore": True,
+            "use_git_ls_files": False,
+            "cost_scheduling": True,
+            "file_timeout": 60,
+            "stats_dir": os.path.join(os.path.expanduser("~"), ".codeauditx", "stats"),
+            "concurrency": 4,
+            "cache_enabled": True,
+            "cache_dir": os.path.join(os.path.expanduser("~"), ".codeauditx", "cache"),
+            "cache_max_size": 268435456,  # 256MB
+            "memory_budget": 0,  # 0表示不限制
+            "spill_dir": ""
         },
         "report": {
             "default_format": "txt",
@@ -185,10 +195,50 @@ class ConfigManager:
         """获取最大文件大小限制"""
         return self.get("scanner.max_file_size", 5242880)  # 默认5MB
     
+    def is_gitignore_respected(self) -> bool:
+        """检查扫描时是否遵循.gitignore和.codeauditxignore"""
+        return self.get("scanner.respect_gitignore", True)
+    
+    def is_git_file_list_enabled(self) -> bool:
+        """检查是否直接使用git ls-files获取git仓库中的文件列表"""
+        return self.get("scanner.use_git_ls_files", False)
+    
+    def is_cost_scheduling_enabled(self) -> bool:
+        """检查是否按预计耗时调度文件（耗时最长的文件最先扫描）"""
+        return self.get("scanner.cost_scheduling", True)
+    
+    def get_stats_dir(self) -> str:
+        """获取扫描耗时历史的保存目录"""
+        return self.get("scanner.stats_dir", None) or os.path.join(os.path.expanduser("~"), ".codeauditx", "stats")
+    
+    def get_file_timeout(self) -> float:
+        """获取单个文件的扫描时间上限（秒），0表示不限制"""
+        return self.get("scanner.file_timeout", 60)
+    
     def get_concurrency(self) -> int:
         """获取并发数量"""
         return self.get("scanner.concurrency", 4)
     
+    def is_cache_enabled(self) -> bool:
+        """检查是否启用增量扫描缓存"""
+        return self.get("scanner.cache_enabled", True)
+    
+    def get_cache_dir(self) -> str:
+        """获取扫描缓存目录"""
+        return self.get("scanner.cache_dir", None) or os.path.join(os.path.expanduser("~"), ".codeauditx", "cache")
+    
+    def get_cache_max_size(self) -> int:
+        """获取扫描缓存大小上限"""
+        return self.get("scanner.cache_max_size", 268435456)  # 默认256MB
+    
+    def get_memory_budget(self) -> int:
+        """获取扫描的内存上限（字节），超出后违规详情转存到磁盘，0表示不限制"""
+        return self.get("scanner.memory_budget", 0)
+    
+    def get_spill_dir(self) -> str:
+        """获取违规详情转存到磁盘时的临时目录，为空时使用系统临时目录"""
+        return self.get("scanner.spill_dir", "") or None
+    
     def get_default_ruleset(self) -> str:
         """获取默认规则集"""
         return self.get("rules.default_ruleset", "Google")
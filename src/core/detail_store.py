@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+违规详情的磁盘存储
+扫描结果的details字段保存每个违规的完整信息，违规数达到千万级时会占用数GB内存。
+超出内存上限后，引擎把details换成DetailStore：按文件写入临时SQLite数据库，内存中只保留汇总计数，
+报告生成和界面显示时按文件逐个读回
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import tempfile
+import threading
+import weakref
+from collections.abc import MutableMapping
+
+from src.core.violations import json_default
+
+logger = logging.getLogger(__name__)
+
+# 累积多少个文件后批量写入一次
+WRITE_BATCH_SIZE = 1000
+
+# 遍历时每次从数据库读取的文件数
+READ_BATCH_SIZE = 500
+
+
+def _remove_database(connection, db_path):
+    """关闭数据库连接并删除临时文件，在存储关闭或被回收时调用"""
+    try:
+        connection.close()
+    except Exception:
+        pass
+    for path in (db_path, f"{db_path}-journal"):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"删除违规详情临时文件失败: {path} - {str(e)}")
+
+
+class DetailStore(MutableMapping):
+    """以文件路径为键、违规列表为值的磁盘映射，接口与details字典相同
+
+    写入先在内存中累积，每WRITE_BATCH_SIZE个文件提交一次；读取和遍历时先提交未写入的部分。
+    遍历按写入顺序分批读取，任意时刻内存中只有一批文件的违规。
+    可以在多个线程中使用，数据库文件在close()或对象被回收时删除
+    """
+
+    def __init__(self, spill_dir=None):
+        """创建临时数据库
+
+        Args:
+            spill_dir: 临时数据库所在目录，为None时使用系统临时目录
+        """
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+        fd, self.db_path = tempfile.mkstemp(prefix='codeauditx-details-', suffix='.sqlite3', dir=spill_dir)
+        os.close(fd)
+        self._lock = threading.RLock()
+        self._pending = {}
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        # 临时数据，不需要在崩溃后恢复
+        self._connection.execute('PRAGMA journal_mode=OFF')
+        self._connection.execute('PRAGMA synchronous=OFF')
+        self._connection.execute('CREATE TABLE details (path TEXT PRIMARY KEY, violations TEXT NOT NULL)')
+        self._connection.commit()
+        self._finalizer = weakref.finalize(self, _remove_database, self._connection, self.db_path)
+
+    def _flush(self):
+        """把累积的文件写入数据库，调用方需要持有锁"""
+        if not self._pending:
+            return
+        rows = [(path, json.dumps(violations, ensure_ascii=False, default=json_default))
+                for path, violations in self._pending.items()]
+        self._connection.executemany('INSERT OR REPLACE INTO details (path, violations) VALUES (?, ?)', rows)
+        self._connection.commit()
+        self._pending.clear()
+
+    def flush(self):
+        """提交尚未写入数据库的文件"""
+        with self._lock:
+            self._flush()
+
+    def __setitem__(self, file_path, violations):
+        with self._lock:
+            self._pending[file_path] = violations
+            if len(self._pending) >= WRITE_BATCH_SIZE:
+                self._flush()
+
+    def __getitem__(self, file_path):
+        with self._lock:
+            if file_path in self._pending:
+                return self._pending[file_path]
+            row = self._connection.execute(
+                'SELECT violations FROM details WHERE path = ?', (file_path,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(file_path)
+        return json.loads(row[0])
+
+    def __delitem__(self, file_path):
+        with self._lock:
+            self._flush()
+            cursor = self._connection.execute('DELETE FROM details WHERE path = ?', (file_path,))
+            self._connection.commit()
+        if cursor.rowcount == 0:
+            raise KeyError(file_path)
+
+    def __contains__(self, file_path):
+        with self._lock:
+            if file_path in self._pending:
+                return True
+            return self._connection.execute(
+                'SELECT 1 FROM details WHERE path = ?', (file_path,)
+            ).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            self._flush()
+            return self._connection.execute('SELECT COUNT(*) FROM details').fetchone()[0]
+
+    def _iter_rows(self):
+        """按写入顺序分批读取(路径, JSON文本)"""
+        last_rowid = 0
+        while True:
+            with self._lock:
+                self._flush()
+                rows = self._connection.execute(
+                    'SELECT rowid, path, violations FROM details WHERE rowid > ? ORDER BY rowid LIMIT ?',
+                    (last_rowid, READ_BATCH_SIZE)
+                ).fetchall()
+            if not rows:
+                return
+            for rowid, file_path, data in rows:
+                yield file_path, data
+            last_rowid = rows[-1][0]
+
+    def __iter__(self):
+        for file_path, _ in self._iter_rows():
+            yield file_path
+
+    def items(self):
+        """逐个文件读回违规列表，不一次性加载全部详情"""
+        for file_path, data in self._iter_rows():
+            yield file_path, json.loads(data)
+
+    def values(self):
+        for _, violations in self.items():
+            yield violations
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._connection.execute('DELETE FROM details')
+            self._connection.commit()
+
+    def size_bytes(self):
+        """数据库文件的大小（字节）"""
+        self.flush()
+        try:
+            return os.path.getsize(self.db_path)
+        except OSError:
+            return 0
+
+    def to_dict(self):
+        """把全部详情读回为普通字典，用于JSON输出等需要完整字典的场合"""
+        return dict(self.items())
+
+    def close(self):
+        """关闭数据库并删除临时文件"""
+        with self._lock:
+            self._pending.clear()
+            self._finalizer()
+
+    def __repr__(self):
+        return f"<DetailStore {self.db_path}>"
@@ -0,0 +1,1646 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+无界面扫描引擎
+纯Python实现的扫描核心，不依赖PyQt5，通过普通回调函数报告进度和日志，
+供命令行、CI流水线以及Qt适配层（CodeScanner）共同使用
+"""
+
+import os
+import gc
+import time
+import logging
+import itertools
+import threading
+from types import MappingProxyType
+import concurrent.futures
+from src.parsers import get_parser_for_file, preload_parsers, ParserPool
+from src.rules import rule_manager
+from src.core.rule_plan import RulePlan, resolve_language_rules
+from src.core.scan_cache import ScanCache, make_cache_key, make_fingerprint
+from src.core.baseline import default_baseline_path, load_baseline, save_baseline
+from src.core import git_utils
+from src.core.file_loader import open_source
+from src.core.file_walker import FileWalker, normalize_patterns
+from src.core.ignore_rules import IgnoreMatcher
+from src.core.concurrency import (AdaptiveConcurrencyController, read_cgroup_limits, get_available_cpus,
+                                  get_memory_usage)
+from src.core.detail_store import DetailStore
+from src.core.violations import ViolationTables, compact_violations
+from src.core.severity import get_severity_classifier
+from src.core.scheduler import CostModel, CostScheduler, default_stats_path
+from src.core.watchdog import WatchdogPool, set_stage, track_parser
+from src.core import profiling
+from src.core import tracing
+from src.core.license_scanner import LicenseScanner
+
+# 配置日志
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 支持的文件类型映射到语言
+FILE_EXTENSIONS = {
+    '.c': 'C',
+    '.cpp': 'C++',
+    '.cc': 'C++',
+    '.h': 'C',
+    '.hpp': 'C++',
+    '.php': 'PHP',
+    '.py': 'Python',
+    '.js': 'JavaScript',
+    '.jsx': 'JavaScript',
+    '.ts': 'TypeScript',
+    '.tsx': 'TypeScript',
+    '.go': 'Go',
+    '.java': 'Java'
+}
+
+# 扫描时始终忽略的目录和文件，与配置中的exclude_dirs、exclude_files合并使用
+IGNORED_DIRS = {'.git', '__pycache__', 'node_modules', 'venv', 'env', '.idea', '.vscode', 'build', 'dist'}
+IGNORED_FILES = {'.DS_Store'}
+
+
+# 自动模式下文件数达到该阈值时使用多进程扫描
+# 文件较少时进程启动和结果传输的开销超过并行收益，线程模式更快
+PROCESS_MODE_MIN_FILES = 1000
+
+# 多进程模式下每个任务包含的最大文件数，减少进程间通信次数
+PROCESS_BATCH_MAX_FILES = 64
+
+# 指定固定线程数时，每个工作线程或进程最多排队的任务数，已提交但未完成的任务数量不随仓库大小增长
+IN_FLIGHT_TASKS_PER_WORKER = 4
+
+# 自动调整并发时线程数的上限
+MAX_THREAD_WORKERS = 32
+
+# 设置内存上限时，每合并多少个文件检查一次内存占用
+MEMORY_CHECK_INTERVAL = 100
+
+# 未发现违规时用于验证扫描功能的测试违规
+TEST_VIOLATION = {
+    'type': '测试验证',
+    'message': '此为测试违规，用于验证扫描功能正常工作',
+    'line': 1
+}
+
+
+def format_violations(violations, ruleset=None):
+    """把解析器返回的违规转换为统一格式，并过滤工具输出的特殊消息
+
+    严重性和是否过滤由规则集的分类表决定，同一违规类型只计算一次
+
+    Args:
+        violations: 解析器返回的违规列表
+        ruleset: 规则集名称，决定使用哪些严重性覆盖
+    """
+    classify = get_severity_classifier(ruleset).classify
+    formatted_violations = []
+
+    for violation in violations:
+        # 确保即使解析器返回的结构不完整，也能有合理的默认值
+        rule_name = violation.get('type', 'unknown')
+
+        # 确保message字段不为空
+        description = violation.get('message', '')
+        if not description:
+            # 如果没有message，使用type作为描述
+            description = f'违反了{rule_name}规则'
+
+        severity = classify(rule_name, description, violation.get('severity'))
+        if severity is None:
+            # 工具输出的统计信息等特殊消息
+            continue
+
+        # 确保行号不为空且为有效数字
+        line_number = violation.get('line', '')
+        if line_number == '' or line_number == -1:
+            line_number = '未知'
+
+        formatted_violations.append({
+            'rule_name': rule_name,
+            'description': description,
+            'line_number': line_number,
+            'severity': severity
+        })
+
+    return formatted_violations
+
+
+# 写入缓存的记录字段
+CACHED_RECORD_FIELDS = ('parsed', 'lines', 'raw_count', 'violations', 'licenses')
+
+# 当前进程共用的许可证检测器
+_license_scanner = None
+_license_scanner_lock = threading.Lock()
+
+
+def _get_license_scanner():
+    """获取当前进程共用的许可证检测器，首次使用时加载许可证规则"""
+    global _license_scanner
+    if _license_scanner is None:
+        with _license_scanner_lock:
+            if _license_scanner is None:
+                _license_scanner = LicenseScanner()
+    return _license_scanner
+
+
+def analyze_file(file_path, language, ruleset, rule_plan, cache=None, fingerprint=None, parser_pool=None):
+    """分析单个文件，返回该文件的扫描记录
+
+    该函数不修改任何共享状态，可以在线程或子进程中执行，
+    由调用方负责把记录合并到扫描结果中
+
+    Args:
+        file_path: 文件路径
+        language: 语言名称
+        ruleset: 规则集名称
+        rule_plan: 该语言的规则计划（RulePlan）
+        cache: 扫描缓存，为None时不使用缓存
+        fingerprint: 该语言的扫描配置指纹，与文件内容一起组成缓存键
+        parser_pool: 解析器实例池，为None时为该文件新建解析器
+
+    Returns:
+        dict: 文件扫描记录，包含file_path、language、parsed、lines、raw_count、violations，
+              检测到开源协议时包含licenses，扫描失败时包含error，
+              读取成功时包含文件大小size，使用缓存时包含cache_status和cache_key，新建解析器时包含parser_created，
+              扫描耗时duration（秒），启用性能分析时包含各阶段和解析器方法的计时profile，
+              该文件被时间线追踪抽中时包含各时间段trace
+    """
+    start_time = time.perf_counter()
+    profile = profiling.begin_file()
+    try:
+        record = _analyze_file(file_path, language, ruleset, rule_plan, cache, fingerprint, parser_pool, profile)
+    finally:
+        timings = profiling.end_file(profile) if profile is not None else None
+    record['duration'] = time.perf_counter() - start_time
+    if timings is not None:
+        record['profile'] = timings
+        trace = profile.trace()
+        if trace is not None:
+            record['trace'] = trace
+    return record
+
+
+def _enter_stage(profile, stage):
+    """进入新的扫描阶段，供超时监控和性能分析使用"""
+    set_stage(stage)
+    if profile is not None:
+        profile.stage(stage)
+
+
+def _analyze_file(file_path, language, ruleset, rule_plan, cache, fingerprint, parser_pool, profile):
+    """analyze_file的实现，计时由调用方负责"""
+    record = {
+        'file_path': file_path,
+        'language': language,
+        'parsed': False,
+        'lines': 0,
+        'raw_count': 0,
+        'violations': []
+    }
+
+    try:
+        # 获取对应的解析器，有实例池时复用当前线程已创建的解析器，只有新建解析器时才复制规则
+        if parser_pool is not None:
+            parser, created = parser_pool.get(file_path, language, rule_plan)
+        else:
+            parser = get_parser_for_file(file_path, ruleset)
+            created = parser is not None
+            if created and rule_plan is not None and rule_plan.rules:
+                parser.set_rules(rule_plan.to_dict())
+        if not parser:
+            return record
+
+        record['parsed'] = True
+        if created:
+            language_rules = rule_plan.rules if rule_plan is not None else {}
+            # 在超时监控下运行时记录解析器各方法的阶段名称，启用性能分析时为各方法计时
+            track_parser(parser)
+            profiling.instrument_parser(parser)
+            record['parser_created'] = True
+            if language_rules:
+                logger.debug(f"已为{language}解析器应用{len(language_rules)}条规则")
+            else:
+                logger.warning(f"没有找到{language}语言的规则，使用解析器的默认规则")
+
+        # 文件只读取一次，缓存键、行数统计、解析和许可证检测共用同一份内容
+        _enter_stage(profile, 'read')
+        try:
+            source = open_source(file_path)
+        except OSError as e:
+            # 无法读取时记录为0行，由解析器报告扫描错误
+            logger.warning(f"无法读取文件: {file_path}, {str(e)}")
+            source = None
+
+        try:
+            if source is not None:
+                record['size'] = source.size
+
+            # 查询缓存，命中时跳过解码和解析
+            if source is not None and cache is not None and fingerprint:
+                _enter_stage(profile, 'cache')
+                cache_key = make_cache_key(fingerprint, file_path, source.content_hash)
+                record['cache_key'] = cache_key
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    record.update(cached)
+                    record['cache_status'] = 'hit'
+                    return record
+                record['cache_status'] = 'miss'
+
+            content = None
+            if source is not None:
+                _enter_stage(profile, 'decode')
+                content = source.text
+                record['lines'] = source.line_count
+
+                # 检测文件头部的开源协议
+                _enter_stage(profile, 'license')
+                licenses = _get_license_scanner().detect_licenses(content)
+                if licenses:
+                    record['licenses'] = licenses
+
+            # 扫描文件
+            _enter_stage(profile, 'parse')
+            violations = parser.scan(file_path, content)
+        finally:
+            if source is not None:
+                source.close()
+
+        # 验证违规结果
+        _enter_stage(profile, 'format')
+        if not isinstance(violations, list):
+            logger.error(f"扫描结果类型错误，应为列表: {type(violations)}")
+            violations = []
+
+        record['raw_count'] = len(violations)
+        record['violations'] = format_violations(violations, ruleset)
+    except Exception as e:
+        # 解析器执行失败，跳过该文件
+        record['error'] = f"解析错误: {str(e)}"
+
+    return record
+
+
+# 多进程工作进程的上下文，由进程初始化函数设置一次
+_worker_context = {}
+
+
+def _init_process_worker(ruleset, rule_plans, cache_dir=None, cache_fingerprints=None, profile_options=None):
+    """多进程工作进程初始化函数，每个进程只加载一次规则和解析器类
+
+    profile_options不为None时在工作进程中启用性能分析，其中的cprofile_dir为写入cProfile数据的目录，
+    trace_sample_rate为记录时间线的文件比例
+    """
+    # fork启动的进程继承了主进程的时间线记录器，工作进程中的时间段随文件记录返回
+    tracing.deactivate()
+    if profile_options is not None:
+        profiling.enable(cprofile_dir=profile_options.get('cprofile_dir'),
+                         collect_timings=profile_options.get('collect_timings', True),
+                         trace_sample_rate=profile_options.get('trace_sample_rate'))
+    _worker_context['ruleset'] = ruleset
+    _worker_context['rule_plans'] = dict(rule_plans)
+    _worker_context['parser_pool'] = ParserPool(ruleset)
+    _worker_context['cache_fingerprints'] = dict(cache_fingerprints or {})
+    _worker_context['cache'] = None
+    if cache_dir:
+        try:
+            # 工作进程只读取缓存，写入由主进程统一完成
+            _worker_context['cache'] = ScanCache(cache_dir)
+        except Exception as e:
+            logger.warning(f"工作进程无法打开扫描缓存: {str(e)}")
+    preload_parsers()
+
+
+def _process_worker_scan(batch, rule_plans=None, cache_fingerprints=None):
+    """在工作进程中扫描一批文件，返回扫描记录列表
+
+    进程池启动后才发现的语言，其规则计划和缓存指纹随任务一起传入
+    """
+    return [_process_worker_scan_file(item, rule_plans, cache_fingerprints) for item in batch]
+
+
+def _process_worker_scan_file(item, rule_plans=None, cache_fingerprints=None):
+    """在工作进程中扫描单个文件，item为(文件路径, 语言名称)，供WatchdogPool逐个文件调用"""
+    if rule_plans:
+        _worker_context['rule_plans'].update(rule_plans)
+    if cache_fingerprints:
+        _worker_context['cache_fingerprints'].update(cache_fingerprints)
+    file_path, language = item
+    return analyze_file(file_path, language, _worker_context['ruleset'],
+                        _worker_context['rule_plans'].get(language),
+                        cache=_worker_context['cache'],
+                        fingerprint=_worker_context['cache_fingerprints'].get(language),
+                        parser_pool=_worker_context['parser_pool'])
+
+
+def make_timeout_record(item, stage, elapsed, reason):
+    """为超时或导致工作进程退出的文件生成扫描记录
+
+    Args:
+        item: (文件路径, 语言名称)
+        stage: 终止时所处的扫描阶段，例如'CCppParser._extract_functions'
+        elapsed: 已用时间（秒）
+        reason: 'timeout'或'crash'
+    """
+    file_path, language = item
+    stage = stage or 'unknown'
+    record = {'file_path': file_path, 'language': language, 'stage': stage, 'duration': elapsed}
+    if reason == 'timeout':
+        record['skip_reason'] = 'timeout'
+        record['error'] = f"扫描超时: 超过 {elapsed:.1f} 秒（阶段: {stage}）"
+    else:
+        record['error'] = f"工作进程异常退出（阶段: {stage}）"
+    return record
+
+
+class ScanResult(dict):
+    """扫描结果
+
+    保持与原有结果字典完全相同的结构，可以直接传给ReportGenerator和界面层使用；
+    violation_tables是本次扫描的违规详情共用的编号表，不是结果字典的一项，随扫描结果一起释放
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(
+            total_files=0,
+            scanned_files=0,
+            skipped_files=0,
+            languages={},
+            violations={},
+            violations_by_file={},  # 按文件统计的违规数
+            violations_by_severity={},  # 按严重性统计的违规数
+            details={},  # 详细违规信息
+            scan_time=0,
+            total_lines=0,  # 总代码行数
+            lines_by_file={},  # 各文件的代码行数
+            licenses_by_file={},  # 扫描文件中检测到的开源协议
+            skipped_by_reason={}  # 按原因统计的跳过文件数
+        )
+        self.update(*args, **kwargs)
+        self.violation_tables = ViolationTables()
+
+
+# 扫描结果中最多记录的超时文件数
+MAX_RECORDED_TIMEOUTS = 100
+
+# 只在保留详细信息时记录的按文件统计字段，流式扫描时不保留以限制内存占用
+PER_FILE_FIELDS = ('details', 'lines_by_file', 'violations_by_file', 'licenses_by_file')
+
+
+def fold_record(results, file_path, record, keep_details=True):
+    """把一个文件的最终记录累加到扫描结果的各项统计中
+
+    Args:
+        results: 扫描结果（ScanResult）
+        file_path: 文件路径
+        record: 文件的最终扫描记录
+        keep_details: 是否保留按文件统计的字段（details、lines_by_file等），
+                      为False时只累加计数，内存占用与文件数无关
+    """
+    # 更新语言统计
+    language = record.get('language')
+    if language:
+        if language not in results['languages']:
+            results['languages'][language] = 0
+        results['languages'][language] += 1
+
+    if 'error' in record:
+        results['skipped_files'] += 1
+        reason = record.get('skip_reason', 'error')
+        if reason not in results['skipped_by_reason']:
+            results['skipped_by_reason'][reason] = 0
+        results['skipped_by_reason'][reason] += 1
+
+        # 记录超时的文件和所处阶段，数量有上限
+        if reason == 'timeout':
+            timeouts = results.setdefault('timeouts', [])
+            if len(timeouts) < MAX_RECORDED_TIMEOUTS:
+                timeouts.append({'file_path': file_path, 'stage': record.get('stage')})
+        return
+
+    if record.get('parsed'):
+        # 统计代码行数
+        file_lines = record.get('lines', 0)
+        if keep_details:
+            results['lines_by_file'][file_path] = file_lines
+        results['total_lines'] += file_lines
+
+        violations = record.get('violations', [])
+
+        # 更新违规统计
+        # 1. 按类型统计
+        for violation in violations:
+            violation_type = violation.get('rule_name', 'unknown')
+            if violation_type not in results['violations']:
+                results['violations'][violation_type] = 0
+            results['violations'][violation_type] += 1
+
+        # 2. 按严重性统计
+        for violation in violations:
+            severity = violation.get('severity', 'medium')
+            if severity not in results['violations_by_severity']:
+                results['violations_by_severity'][severity] = 0
+            results['violations_by_severity'][severity] += 1
+
+        if keep_details:
+            # 3. 按文件统计违规数
+            results['violations_by_file'][file_path] = len(violations)
+
+            # 4. 保存详细违规信息，按列紧凑保存，报告和界面遍历时再还原为字典
+            if violations:
+                results['details'][file_path] = compact_violations(
+                    violations, getattr(results, 'violation_tables', None))
+
+            # 5. 记录检测到的开源协议
+            if record.get('licenses'):
+                results['licenses_by_file'][file_path] = record['licenses']
+
+    results['scanned_files'] += 1
+
+
+def summarize_records(records, keep_details=True):
+    """把逐个文件的扫描记录汇总为扫描结果
+
+    Args:
+        records: 扫描记录的可迭代对象，例如iter_scan()的输出，每条记录包含file_path
+        keep_details: 是否保留按文件统计的字段
+
+    Returns:
+        ScanResult: 汇总后的扫描结果
+    """
+    results = ScanResult()
+    for record in records:
+        results['total_files'] += 1
+        fold_record(results, record['file_path'], record, keep_details)
+    return results
+
+
+class ScanEngine:
+    """扫描引擎，负责文件发现、并行扫描和结果汇总"""
+
+    def __init__(self, project_path, ruleset, progress_callback=None, log_callback=None,
+                 use_cache=None, cache_dir=None, cache_max_size=None,
+                 exclude_dirs=None, exclude_files=None, max_file_size=None,
+                 respect_gitignore=None, use_git_ls_files=None, cost_scheduling=None, stats_dir=None,
+                 file_timeout=None, profile=False, cprofile_path=None,
+                 trace=False, trace_sample_rate=1.0, trace_buffer_size=None,
+                 memory_budget=None, spill_dir=None):
+        """初始化扫描引擎
+
+        Args:
+            project_path: 项目路径
+            ruleset: 规则集名称
+            progress_callback: 进度回调，参数为0-100的整数
+            log_callback: 日志回调，参数为日志字符串
+            use_cache: 是否使用增量扫描缓存，为None时读取配置
+            cache_dir: 缓存目录，为None时读取配置
+            cache_max_size: 缓存大小上限（字节），为None时读取配置
+            exclude_dirs: 排除的目录名或通配符，为None时读取配置
+            exclude_files: 排除的文件名通配符，为None时读取配置
+            max_file_size: 文件大小上限（字节），超过的文件不扫描，为None时读取配置，为0时不限制
+            respect_gitignore: 是否遵循.gitignore和.codeauditxignore，为None时读取配置
+            use_git_ls_files: 项目是git仓库时是否直接使用git ls-files的文件列表，为None时读取配置
+            cost_scheduling: 是否按预计耗时调度文件，耗时最长的文件最先扫描，为None时读取配置
+            stats_dir: 扫描耗时历史的保存目录，为None时读取配置
+            file_timeout: 单个文件的扫描时间上限（秒），多进程模式下超时的进程会被终止，
+                          为None时读取配置，为0时不限制
+            profile: 是否记录各扫描阶段、解析器方法和外部工具的耗时，写入结果的profile字段
+            cprofile_path: 启用性能分析时同时把cProfile数据写入该文件
+            trace: 是否记录扫描时间线，扫描结束后可以用export_trace()导出为Chrome Trace Event JSON
+            trace_sample_rate: 记录扫描过程的文件比例，0到1之间
+            trace_buffer_size: 时间线保留的时间段数，超过时丢弃最早的时间段，为None时使用默认值
+            memory_budget: 扫描进程的内存上限（字节），超出后违规详情转存到磁盘，内存中只保留汇总统计，
+                           为None时读取配置，为0时不限制
+            spill_dir: 违规详情转存的临时目录，为None时读取配置，配置为空时使用系统临时目录
+        """
+        self.project_path = project_path
+        self.ruleset = ruleset
+        self.progress_callback = progress_callback
+        self.log_callback = log_callback
+
+        # 增量扫描缓存设置，未指定时使用配置文件中的值
+        if use_cache is None or (use_cache and (cache_dir is None or cache_max_size is None)):
+            from src.core.config_manager import config_manager
+            if use_cache is None:
+                use_cache = config_manager.is_cache_enabled()
+            cache_dir = cache_dir or config_manager.get_cache_dir()
+            cache_max_size = cache_max_size or config_manager.get_cache_max_size()
+        self.use_cache = use_cache
+        self.cache_dir = cache_dir
+        self.cache_max_size = cache_max_size
+        self.cache = None
+        self.cache_fingerprints = {}
+
+        # 文件过滤设置，未指定时使用配置文件中的值
+        if None in (exclude_dirs, exclude_files, max_file_size, respect_gitignore, use_git_ls_files):
+            from src.core.config_manager import config_manager
+            if exclude_dirs is None:
+                exclude_dirs = config_manager.get_excluded_dirs()
+            if exclude_files is None:
+                exclude_files = config_manager.get_excluded_files()
+            if max_file_size is None:
+                max_file_size = config_manager.get_max_file_size()
+            if respect_gitignore is None:
+                respect_gitignore = config_manager.is_gitignore_respected()
+            if use_git_ls_files is None:
+                use_git_ls_files = config_manager.is_git_file_list_enabled()
+        self.exclude_dirs = sorted(IGNORED_DIRS | set(normalize_patterns(exclude_dirs)))
+        self.exclude_files = sorted(IGNORED_FILES | set(normalize_patterns(exclude_files)))
+        self.max_file_size = max_file_size
+        self.respect_gitignore = respect_gitignore
+        self.use_git_ls_files = use_git_ls_files
+
+        # 按预计耗时调度的设置，未指定时使用配置文件中的值
+        if cost_scheduling is None or (cost_scheduling and stats_dir is None):
+            from src.core.config_manager import config_manager
+            if cost_scheduling is None:
+                cost_scheduling = config_manager.is_cost_scheduling_enabled()
+            stats_dir = stats_dir or config_manager.get_stats_dir()
+        self.cost_scheduling = cost_scheduling
+        self.stats_dir = stats_dir
+        # 本次扫描的调度器，不按耗时调度时为None
+        self.scheduler = None
+
+        if file_timeout is None:
+            from src.core.config_manager import config_manager
+            file_timeout = config_manager.get_file_timeout()
+        self.file_timeout = file_timeout
+
+        self.profile = profile or bool(cprofile_path)
+        self.cprofile_path = cprofile_path
+        # 本次扫描的性能分析汇总，未启用时为None
+        self.profiler = None
+        self._cprofile_dir = None
+        self.trace = trace
+        self.trace_sample_rate = trace_sample_rate
+        self.trace_buffer_size = trace_buffer_size or tracing.TRACE_BUFFER_SIZE
+        # 本次扫描的时间线记录器，未启用时为None
+        self.tracer = None
+
+        # 内存上限设置，未指定时使用配置文件中的值
+        if memory_budget is None or (memory_budget and spill_dir is None):
+            from src.core.config_manager import config_manager
+            if memory_budget is None:
+                memory_budget = config_manager.get_memory_budget()
+            spill_dir = spill_dir or config_manager.get_spill_dir()
+        self.memory_budget = memory_budget or 0
+        self.spill_dir = spill_dir
+        # 超出内存上限后保存违规详情的磁盘存储，未转存时为None
+        self.detail_store = None
+        self._merges_since_memory_check = 0
+        self._peak_memory = 0
+        # 文件查找阶段按原因统计的跳过数
+        self.walk_skips = {}
+        # 每个文件合并后的扫描记录，只在需要保存或合并基线时记录
+        self.file_records = None
+        self.is_scanning = False
+        self.is_paused = False
+        self.results = ScanResult()
+        self._snapshot = MappingProxyType({})
+        self.last_scan_info = {
+            'current_file': None,
+            'progress': 0,
+            'scanned_files': 0,
+            'discovered_files': 0,  # 已发现的待扫描文件数
+            'completed_files': 0,  # 已完成扫描的文件数
+            'discovery_complete': False,  # 是否已找到全部待扫描文件
+            'results': {}
+        }
+        self.file_extensions = dict(FILE_EXTENSIONS)
+        # 每种语言的规则计划（RulePlan），在run()开始时解析一次
+        self.rule_plans = {}
+        # 当前线程池扫描使用的解析器实例池
+        self.parser_pool = None
+        # 本次扫描的性能计数器
+        self.counters = {'rules_resolved': 0, 'parsers_created': 0}
+        # cgroup中的CPU和内存限制，首次需要时读取
+        self.cgroup_limits = None
+        # 本次扫描的并发控制器
+        self.controller = None
+        # 汇总结果时是否保留按文件统计的字段
+        self.keep_details = True
+
+        # 获取规则管理器中的规则
+        try:
+            # 加载完整规则集
+            self.rules = rule_manager.get_rules_for_ruleset(ruleset)
+
+            # 记录加载的规则集和它支持的语言
+            self._log(f"已加载规则集: {ruleset}")
+            supported_languages = [lang for lang in self.rules.keys() if lang != 'global']
+            self._log(f"规则集支持的语言: {', '.join(supported_languages) if supported_languages else '无特定语言规则'}")
+
+            # 验证规则是否成功加载
+            if self.rules is None or not isinstance(self.rules, dict):
+                logger.warning(f"规则集 '{ruleset}' 未加载成功或格式错误，使用默认规则集")
+                # 创建一个基本的默认规则集
+                self.rules = {
+                    'python': {'max_line_length': 120, 'expected_indent': 4},
+                    'javascript': {'max_line_length': 120, 'expected_indent': 2},
+                    'cpp': {'max_line_length': 120, 'expected_indent': 4}
+                }
+
+            # 计算规则数量，处理不同类型的值
+            rule_count = 0
+            for rules in self.rules.values():
+                if isinstance(rules, dict):
+                    rule_count += len(rules)
+                elif isinstance(rules, list):
+                    rule_count += len(rules)
+
+            self._log(f"共加载 {rule_count} 条规则")
+        except Exception as e:
+            logger.error(f"加载规则集时出错: {str(e)}")
+            self._log(f"警告: 加载规则集时出错 - {str(e)}")
+            # 创建应急规则集
+            self.rules = {
+                'python': {'max_line_length': 120, 'expected_indent': 4},
+                'javascript': {'max_line_length': 120, 'expected_indent': 2},
+                'cpp': {'max_line_length': 120, 'expected_indent': 4}
+            }
+            self._log("使用默认应急规则集继续扫描")
+
+    def _log(self, message):
+        """通过日志回调输出消息"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def _report_progress(self, progress):
+        """通过进度回调输出进度"""
+        if self.progress_callback:
+            self.progress_callback(progress)
+
+    def _get_optimal_thread_count(self, file_count):
+        """
+        根据系统性能和文件数量自动调整线程数
+
+        Args:
+            file_count: 需要扫描的文件数量
+
+        Returns:
+            int: 最优线程数
+        """
+        try:
+            # psutil仅在自动调整线程数时需要，延迟导入以减少启动开销
+            try:
+                import psutil
+            except ImportError:
+                psutil = None
+
+            # 获取实际可用的CPU核心数，容器中受cgroup配额限制
+            limits = self._get_cgroup_limits()
+            cpu_count = get_available_cpus(limits)
+
+            # 使用系统平均负载估算CPU负载，不需要阻塞采样
+            try:
+                cpu_load = min(1.0, os.getloadavg()[0] / (os.cpu_count() or cpu_count))
+            except (AttributeError, OSError):
+                cpu_load = 0.0
+
+            # 获取内存使用率，容器中以cgroup内存上限为准
+            mem_usage = 0.0
+            if psutil is not None:
+                memory = psutil.virtual_memory()
+                mem_total = memory.total
+                mem_used = memory.total - memory.available
+                if limits.get('memory_limit') and limits['memory_limit'] < mem_total:
+                    mem_total = limits['memory_limit']
+                    mem_used = psutil.Process().memory_info().rss
+                mem_usage = min(1.0, mem_used / mem_total)
+
+            # 基础线程数 = CPU核心数
+            base_threads = cpu_count
+
+            # 根据系统负载调整
+            # 如果CPU负载高，减少线程数；如果CPU负载低，增加线程数
+            load_factor = max(0.5, 1.0 - cpu_load)
+
+            # 根据内存使用调整
+            # 如果内存使用率高，减少线程数
+            mem_factor = max(0.7, 1.0 - mem_usage)
+
+            # 综合因素计算线程数
+            adjusted_threads = int(base_threads * load_factor * mem_factor * 2)
+
+            # 根据文件数量调整
+            # 对于少量文件，减少线程数
+            if file_count < adjusted_threads:
+                adjusted_threads = max(2, file_count)
+
+            # 设置上限和下限
+            min_threads = 2
+            max_threads = min(cpu_count * 4, MAX_THREAD_WORKERS)  # 最多使用CPU核心数的4倍或32个线程
+
+            optimal_threads = max(min_threads, min(adjusted_threads, max_threads))
+
+            # 记录调试信息
+            logger.info(f"线程数调整: CPU核心={cpu_count}, 系统负载={cpu_load:.2f}, "
+                       f"内存使用率={mem_usage:.2f}, 文件数={file_count}, "
+                       f"调整后线程数={optimal_threads}")
+
+            return optimal_threads
+        except Exception as e:
+            # 如果出现任何错误，使用默认值
+            logger.error(f"自动调整线程数失败: {str(e)}")
+            return max(2, os.cpu_count() or 4)
+
+    def _get_cgroup_limits(self):
+        """读取cgroup中的CPU和内存限制，结果在引擎中缓存"""
+        if self.cgroup_limits is None:
+            try:
+                self.cgroup_limits = read_cgroup_limits()
+            except Exception as e:
+                logger.warning(f"读取cgroup限制失败: {str(e)}")
+                self.cgroup_limits = {'version': None, 'cpu_quota': None, 'memory_limit': None}
+        return self.cgroup_limits
+
+    def _create_controller(self, mode, file_count, max_workers):
+        """创建并发控制器
+
+        未指定max_workers时根据吞吐量在1到上限之间调整并发数，
+        上限为线程模式下可用核心数的4倍（最多32），进程模式下为可用核心数；
+        指定max_workers时并发数固定
+        """
+        limits = self._get_cgroup_limits()
+        cpu_count = get_available_cpus(limits)
+
+        if max_workers is not None:
+            return AdaptiveConcurrencyController(max_workers, max_workers=max_workers, adaptive=False,
+                                                 fixed_window=max_workers * IN_FLIGHT_TASKS_PER_WORKER)
+
+        initial_workers = self._get_optimal_thread_count(file_count)
+        if mode == 'process':
+            # 进程数超过CPU核心数没有收益
+            upper_limit = cpu_count
+        else:
+            upper_limit = min(cpu_count * 4, MAX_THREAD_WORKERS)
+        upper_limit = max(1, min(upper_limit, file_count or 1))
+        initial_workers = max(1, min(initial_workers, upper_limit))
+        self._log(f"根据系统性能自动调整为 {initial_workers} 个{'进程' if mode == 'process' else '线程'}进行并行扫描，"
+                  f"扫描过程中按吞吐量在 1-{upper_limit} 之间调整")
+        return AdaptiveConcurrencyController(initial_workers, max_workers=upper_limit,
+                                             memory_limit=limits.get('memory_limit'))
+
+    def _prepare_language(self, language):
+        """首次遇到某种语言时解析其规则计划并计算缓存指纹，只在提交任务的线程中调用"""
+        if language is None or language in self.rule_plans:
+            return
+
+        self.rule_plans[language] = RulePlan(language, self.ruleset,
+                                             resolve_language_rules(self.ruleset, self.rules, language))
+        self.counters['rules_resolved'] += 1
+
+        if self.cache is not None:
+            try:
+                self.cache_fingerprints[language] = make_fingerprint(
+                    self.ruleset, language, self.rule_plans[language].to_dict())
+            except Exception as e:
+                logger.warning(f"无法计算{language}的缓存指纹，该语言的文件将不使用缓存: {str(e)}")
+
+    def _choose_execution_mode(self, file_count, mode=None):
+        """选择线程或进程执行模式
+
+        Args:
+            file_count: 需要扫描的文件数量
+            mode: 'thread'、'process'或'auto'，为None时等同于'auto'
+
+        Returns:
+            str: 'thread'或'process'
+        """
+        if mode in ('thread', 'process'):
+            return mode
+
+        # 解析器主要是纯Python的正则和ast处理，线程受GIL限制只能用满一个核心，
+        # 大型仓库使用多进程才能随CPU核心数扩展
+        cpu_count = get_available_cpus(self._get_cgroup_limits())
+        if cpu_count > 1 and file_count >= PROCESS_MODE_MIN_FILES:
+            return 'process'
+        return 'thread'
+
+    def run(self, max_workers=None, mode=None, base_ref=None, baseline_path=None, save_baseline_path=None):
+        """执行扫描并返回扫描结果
+
+        Args:
+            max_workers: 工作线程或进程数，为None时根据系统性能自动调整
+            mode: 执行模式，'thread'、'process'或'auto'，为None时根据仓库大小自动选择
+            base_ref: git基准版本，指定时只扫描相对该版本变更的文件，并与基线合并出完整结果
+            baseline_path: 增量扫描使用的基线文件，为None时使用默认位置
+            save_baseline_path: 扫描完成后把每个文件的记录保存为基线的路径
+
+        Returns:
+            ScanResult: 扫描结果
+        """
+        for _ in self.iter_scan(max_workers=max_workers, mode=mode, base_ref=base_ref,
+                                baseline_path=baseline_path, save_baseline_path=save_baseline_path):
+            pass
+        return self.results
+
+    def iter_scan(self, max_workers=None, mode=None, base_ref=None, baseline_path=None,
+                  save_baseline_path=None, keep_details=True):
+        """执行扫描，每个文件扫描完成后立即产出该文件的扫描记录
+
+        记录按完成顺序产出，包含file_path、language，成功时包含parsed、lines、violations和licenses，
+        失败时包含error。汇总结果在迭代过程中累加到self.results，迭代结束后完整可用；
+        提前停止迭代会取消尚未开始的扫描任务
+
+        Args:
+            max_workers: 工作线程或进程数，为None时根据系统性能自动调整
+            mode: 执行模式，'thread'、'process'或'auto'，为None时根据仓库大小自动选择
+            base_ref: git基准版本，指定时只扫描相对该版本变更的文件，并与基线合并出完整结果
+            baseline_path: 增量扫描使用的基线文件，为None时使用默认位置
+            save_baseline_path: 扫描完成后把每个文件的记录保存为基线的路径
+            keep_details: 汇总结果是否保留details等按文件统计的字段，
+                          为False时self.results只包含计数，内存占用与违规总数无关
+
+        Yields:
+            dict: 单个文件的扫描记录
+        """
+        self.is_scanning = True
+        self.keep_details = keep_details
+        start_time = time.time()
+
+        # 增量模式需要基线，基线不可用时退回完整扫描
+        baseline_records = None
+        baseline_revision = None
+        diff_ref = None
+        deleted_files = []
+        if base_ref:
+            baseline_path = baseline_path or default_baseline_path(self.project_path, self.ruleset)
+            baseline_records, baseline_revision = load_baseline(baseline_path, self.project_path, self.ruleset)
+            if baseline_records is None:
+                self._log(f"未找到可用的扫描基线 {baseline_path}，执行完整扫描")
+            else:
+                self._log(f"已加载扫描基线 {baseline_path}（{len(baseline_records)} 个文件）")
+                diff_ref = self._choose_diff_ref(base_ref, baseline_revision)
+                if diff_ref is None:
+                    baseline_records = None
+
+        self.counters = {'rules_resolved': 0, 'parsers_created': 0}
+        self.rule_plans = {}
+        self.walk_skips = {}
+        self.last_scan_info.update(progress=0, discovered_files=0, completed_files=0, discovery_complete=False)
+
+        if baseline_records is not None:
+            # 只获取相对基准版本变更的文件
+            all_files, deleted_files = self._get_changed_files(diff_ref)
+            self._log(f"相对 {diff_ref} 变更 {len(all_files)} 个文件，删除 {len(deleted_files)} 个文件")
+            files = self._track_discovery(iter(all_files), count_total=False)
+        else:
+            # 边遍历目录边提交任务，不需要先把所有文件路径保存下来
+            all_files = None
+            files = self._track_discovery(self._iter_files(), count_total=True)
+
+        if baseline_records is not None or save_baseline_path:
+            self.file_records = {}
+        self._merges_since_memory_check = 0
+
+        # 文件按需查找，在预读文件之前启用性能分析，时间线中才有完整的文件查找过程
+        self._start_profiler()
+        scan_start = time.perf_counter()
+
+        # 打开增量扫描缓存
+        self._open_cache()
+
+        # 预读一部分文件，用于选择执行模式和线程数，文件数达到多进程阈值时不再继续预读
+        prefetched = list(itertools.islice(files, PROCESS_MODE_MIN_FILES))
+        file_count = len(prefetched)
+        if all_files is None:
+            if self.last_scan_info['discovery_complete']:
+                self._log(f"发现 {file_count} 个文件待扫描")
+            else:
+                self._log(f"已发现 {file_count} 个文件，继续边查找边扫描")
+
+        # 预读文件涉及的语言在启动工作进程前解析好规则，之后发现的语言在提交任务时解析
+        for file_path in prefetched:
+            self._prepare_language(self._get_language(file_path))
+
+        mode = self._choose_execution_mode(file_count, mode)
+        self.controller = self._create_controller(mode, file_count, max_workers)
+
+        files = itertools.chain(prefetched, files)
+        del prefetched
+
+        # 按预计耗时从大到小提交，避免最后才扫描的大文件拖长扫描时间
+        self.scheduler = self._create_scheduler()
+        if self.scheduler is not None:
+            files = self.scheduler.order(files)
+        try:
+            if mode == 'process':
+                yield from self._run_with_processes(files, self.controller, file_count)
+            else:
+                yield from self._run_with_threads(files, self.controller)
+        finally:
+            self._close_cache()
+            self._record_concurrency(mode)
+            self._close_scheduler()
+            if self.tracer is not None:
+                self.tracer.add('scan', f"scan ({mode})", scan_start, time.perf_counter())
+            self._close_profiler()
+
+        # 用变更文件的新记录替换基线中的旧记录，重新汇总整个项目的结果
+        if baseline_records is not None:
+            self._merge_baseline(baseline_records, all_files, deleted_files)
+            self.results['incremental'] = {
+                'base_ref': base_ref,
+                'baseline': baseline_path,
+                'baseline_revision': baseline_revision,
+                'diff_ref': diff_ref,
+                'changed_files': len(all_files),
+                'deleted_files': len(deleted_files)
+            }
+
+        if self.memory_budget:
+            self._record_memory()
+
+        # 合并文件查找阶段跳过的文件数
+        for reason, count in self.walk_skips.items():
+            if reason not in self.results['skipped_by_reason']:
+                self.results['skipped_by_reason'][reason] = 0
+            self.results['skipped_by_reason'][reason] += count
+
+        if save_baseline_path and self.is_scanning:
+            save_baseline(save_baseline_path, self.project_path, self.ruleset, self.file_records,
+                          revision=git_utils.get_head_revision(self.project_path))
+            self._log(f"扫描基线已保存到 {save_baseline_path}")
+
+        self.parser_pool = None
+        self.results['counters'] = dict(self.counters)
+
+        # 计算扫描时间
+        self.results['scan_time'] = time.time() - start_time
+        schedule = self.results.get('schedule') or {}
+        if schedule.get('enabled'):
+            schedule['actual_wall_seconds'] = round(self.results['scan_time'], 3)
+            if 'predicted_wall_seconds' in schedule:
+                self._log(f"预计扫描耗时 {schedule['predicted_wall_seconds']:.1f} 秒，"
+                          f"实际耗时 {schedule['actual_wall_seconds']:.1f} 秒")
+        self.is_scanning = False
+        self._publish_snapshot()
+
+    def _open_cache(self):
+        """打开扫描缓存，各语言的配置指纹在首次遇到该语言时计算"""
+        self.cache = None
+        self.cache_fingerprints = {}
+        if not self.use_cache:
+            self.results['cache'] = {'enabled': False}
+            return
+
+        try:
+            self.cache = ScanCache(self.cache_dir, self.cache_max_size)
+        except Exception as e:
+            logger.warning(f"无法打开扫描缓存，将完整扫描所有文件: {str(e)}")
+            self._log(f"警告: 无法打开扫描缓存 - {str(e)}")
+            self.cache = None
+            self.results['cache'] = {'enabled': False}
+
+    def _close_cache(self):
+        """写回缓存并把缓存统计写入扫描结果"""
+        if self.cache is None:
+            return
+        self.cache.flush()
+        summary = self.cache.get_summary()
+        summary['enabled'] = True
+        self.results['cache'] = summary
+        self.cache.close()
+        self._log(f"扫描缓存: 命中 {summary['hits']} 个文件，未命中 {summary['misses']} 个文件")
+
+    def _create_scheduler(self):
+        """创建按预计耗时排序的调度器，未启用或无法创建时返回None"""
+        if not self.cost_scheduling:
+            self.results['schedule'] = {'enabled': False}
+            return None
+        try:
+            cost_model = CostModel(self.project_path, default_stats_path(self.project_path, self.stats_dir))
+            return CostScheduler(cost_model, self._get_language)
+        except Exception as e:
+            logger.warning(f"无法创建耗时调度器，按查找顺序扫描: {str(e)}")
+            self.results['schedule'] = {'enabled': False}
+            return None
+
+    def _close_scheduler(self):
+        """保存耗时历史，并把预计与实际耗时的比较写入扫描结果"""
+        if self.scheduler is None:
+            return
+        self.scheduler.cost_model.save()
+        # 按平均并发数把累计耗时换算为扫描时间
+        workers = self.controller.workers if self.controller is not None else None
+        summary = self.scheduler.summary(workers)
+        summary['enabled'] = True
+        self.results['schedule'] = summary
+
+    def _start_profiler(self):
+        """启用性能分析和时间线追踪，线程模式下在当前进程中计时，多进程模式下由工作进程初始化函数启用"""
+        self.profiler = None
+        self.tracer = None
+        self._cprofile_dir = None
+        if self.trace:
+            # 记录器在扫描结束后保持启用，报告生成的耗时也会记入时间线
+            self.tracer = tracing.TraceRecorder(self.trace_buffer_size, self.trace_sample_rate)
+            tracing.activate(self.tracer)
+        if not self.profile and self.tracer is None:
+            return
+        if self.profile:
+            self.profiler = profiling.ScanProfiler()
+        if self.cprofile_path:
+            import tempfile
+            self._cprofile_dir = tempfile.mkdtemp(prefix='codeauditx-cprofile-')
+        profiling.enable(collect_cprofile=bool(self.cprofile_path), collect_timings=self.profiler is not None,
+                         trace_sample_rate=self.tracer.sample_rate if self.tracer is not None else None)
+
+    def _profile_options(self):
+        """传给工作进程的性能分析设置，未启用时为None"""
+        if self.profiler is None and self.tracer is None:
+            return None
+        return {
+            'cprofile_dir': self._cprofile_dir,
+            'collect_timings': self.profiler is not None,
+            'trace_sample_rate': self.tracer.sample_rate if self.tracer is not None else None
+        }
+
+    def _close_profiler(self):
+        """停用性能分析，把汇总的计时写入扫描结果，需要时合并并写出cProfile数据"""
+        if self.tracer is not None:
+            self.results['trace'] = self.tracer.summary()
+        if self.profiler is None:
+            if self.tracer is not None:
+                profiling.disable()
+            return
+        thread_profiles = profiling.disable()
+        self.results['profile'] = self.profiler.summary()
+        if self.cprofile_path:
+            try:
+                if profiling.write_cprofile(self.cprofile_path, thread_profiles, self._cprofile_dir):
+                    self._log(f"cProfile数据已保存到 {self.cprofile_path}")
+                    self.results['profile']['cprofile_path'] = self.cprofile_path
+            except Exception as e:
+                logger.warning(f"保存cProfile数据失败: {str(e)}")
+            finally:
+                import shutil
+                shutil.rmtree(self._cprofile_dir, ignore_errors=True)
+
+    def export_trace(self, output_path):
+        """导出上一次扫描的时间线并停止记录
+
+        扫描结束到导出之间生成报告的耗时也包含在时间线中
+
+        Args:
+            output_path: 输出文件路径，可以在chrome://tracing或Perfetto中打开
+
+        Returns:
+            bool: 是否导出成功
+        """
+        if self.tracer is None:
+            return False
+        if tracing.get_recorder() is self.tracer:
+            tracing.deactivate()
+        try:
+            count = self.tracer.export(output_path)
+            self._log(f"扫描时间线已保存到 {output_path}（{count} 个时间段）")
+            return True
+        except Exception as e:
+            logger.error(f"导出扫描时间线失败: {str(e)}")
+            self._log(f"警告: 导出扫描时间线失败 - {str(e)}")
+            return False
+
+    def _track_discovery(self, files, count_total):
+        """统计已发现的文件数，文件迭代结束时标记查找完成
+
+        Args:
+            files: 待扫描文件的迭代器
+            count_total: 是否同时把已发现的文件数记为结果中的总文件数
+        """
+        for file_path in files:
+            self.last_scan_info['discovered_files'] += 1
+            if count_total:
+                self.results['total_files'] += 1
+            yield file_path
+        self.last_scan_info['discovery_complete'] = True
+
+    def _record_concurrency(self, mode):
+        """把并发控制器的统计和每次调整记录写入扫描结果"""
+        limits = self._get_cgroup_limits()
+        summary = self.controller.summary()
+        summary['mode'] = mode
+        summary['available_cpus'] = get_available_cpus(limits)
+        summary['cgroup_version'] = limits.get('version')
+        summary['cpu_quota'] = limits.get('cpu_quota')
+        summary['memory_limit'] = limits.get('memory_limit')
+        self.results['concurrency'] = summary
+
+    def _run_with_threads(self, files, controller):
+        """使用线程池扫描文件，线程池大小为并发上限，实际并发数由控制器的任务窗口决定"""
+        # 使用concurrent.futures线程池并行扫描文件
+        self.parser_pool = ParserPool(self.ruleset)
+
+        def tasks():
+            for file_path in files:
+                self._prepare_language(self._get_language(file_path))
+                yield self._scan_file, (file_path,), [file_path]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=controller.max_workers) as executor:
+            yield from self._execute(executor, tasks(), controller)
+
+    def _run_with_processes(self, files, controller, file_count):
+        """使用进程池扫描文件，文件分批提交以减少进程间通信开销
+
+        设置了单文件时间上限时使用WatchdogPool，超时的工作进程被终止并替换，
+        否则使用concurrent.futures的进程池
+
+        Args:
+            files: 待扫描文件的迭代器
+            controller: 并发控制器，进程池大小为其并发上限
+            file_count: 预读到的文件数，用于确定每批的文件数
+        """
+        max_workers = controller.max_workers
+        batch_size = max(1, min(PROCESS_BATCH_MAX_FILES, file_count // (max_workers * 8) or 1))
+        self._log(f"使用多进程模式扫描，每批 {batch_size} 个文件")
+
+        # 进程池启动时已知的语言随初始化参数传入，之后发现的语言随任务传入
+        initial_languages = set(self.rule_plans)
+
+        # WatchdogPool对批中的每个文件单独调用扫描函数
+        worker_fn = _process_worker_scan_file if self.file_timeout else _process_worker_scan
+
+        def make_task(batch):
+            late_languages = {language for _, language in batch if language not in initial_languages}
+            rule_plans = {language: self.rule_plans[language] for language in late_languages}
+            cache_fingerprints = {language: self.cache_fingerprints[language]
+                                  for language in late_languages if language in self.cache_fingerprints}
+            return worker_fn, (batch, rule_plans, cache_fingerprints), [file_path for file_path, _ in batch]
+
+        def tasks():
+            batch = []
+            for file_path in files:
+                language = self._get_language(file_path)
+                self._prepare_language(language)
+                batch.append((file_path, language))
+                if len(batch) >= batch_size:
+                    yield make_task(batch)
+                    batch = []
+            if batch:
+                yield make_task(batch)
+
+        initargs = (self.ruleset, self.rule_plans,
+                    self.cache.cache_dir if self.cache is not None else None,
+                    self.cache_fingerprints, self._profile_options())
+        if not self.file_timeout:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_process_worker,
+                                                        initargs=initargs) as executor:
+                yield from self._execute(executor, tasks(), controller)
+            return
+
+        self._log(f"单个文件的扫描时间上限为 {self.file_timeout} 秒")
+        executor = WatchdogPool(max_workers, self.file_timeout, make_timeout_record,
+                                initializer=_init_process_worker, initargs=initargs)
+        try:
+            with executor:
+                yield from self._execute(executor, tasks(), controller)
+        finally:
+            self.results['watchdog'] = dict(executor.stats, file_timeout=self.file_timeout)
+
+    def _execute(self, executor, tasks, controller):
+        """按有限窗口提交任务，并在当前线程中收集结果，逐个产出文件的最终记录
+
+        已提交但未完成的任务最多为控制器给出的窗口大小，一个任务完成后才从任务迭代器中取下一个，
+        文件查找、任务提交和结果合并都在当前线程中进行，内存占用与仓库大小无关。
+        自动调整并发时窗口大小等于当前的并发数，控制器根据每个任务完成后的吞吐量调整窗口
+
+        Args:
+            executor: 线程池或进程池
+            tasks: 任务迭代器，每项为(函数, 参数元组, 文件路径列表)
+            controller: 并发控制器
+        """
+        pending = {}
+        tasks_exhausted = False
+        completed = 0
+
+        while True:
+            # 补充任务直到窗口填满
+            while not tasks_exhausted and len(pending) < controller.window and self.is_scanning:
+                try:
+                    fn, args, file_paths = next(tasks)
+                except StopIteration:
+                    tasks_exhausted = True
+                    break
+                pending[executor.submit(fn, *args)] = file_paths
+
+            if not pending:
+                break
+
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                # 子进程无法感知暂停状态，在合并结果时等待，暂停期间也不会提交新任务
+                while self.is_paused and self.is_scanning:
+                    time.sleep(0.1)
+
+                if not self.is_scanning:  # 检查是否需要停止
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self._log("扫描已取消")
+                    return
+
+                # 处理后不再引用该任务，已产出的记录可以及时释放
+                file_paths = pending.pop(future)
+                try:
+                    records = future.result()  # 获取结果，以便捕获异常
+                    if isinstance(records, dict):
+                        records = [records]
+                except Exception as e:
+                    records = [{'file_path': file_path, 'error': str(e)} for file_path in file_paths]
+
+                completed_bytes = 0
+                for record in records:
+                    if record is None:
+                        continue
+                    completed_bytes += record.get('size', 0)
+                    final_record = self._merge_file_result(record)
+                    try:
+                        yield dict(file_path=record['file_path'], **final_record)
+                    except GeneratorExit:
+                        # 调用方提前停止迭代，取消尚未开始的任务
+                        self.is_scanning = False
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        raise
+
+                previous = completed
+                completed += len(file_paths)
+                self._update_progress(completed, previous)
+
+                decision = controller.record(len(file_paths), completed_bytes)
+                if decision is not None and decision['action'] != 'hold':
+                    self._log(f"并发数调整为 {decision['workers_after']}（{decision['reason']}，"
+                              f"{decision['files_per_sec']:.1f} 个文件/秒）")
+            del done
+
+    def _update_progress(self, completed, previous):
+        """根据已完成和已发现的文件数更新进度
+
+        文件查找完成前总数未知，进度最多报告到99%，并且不会回退
+        """
+        discovered = self.last_scan_info['discovered_files']
+        discovery_complete = self.last_scan_info['discovery_complete']
+        self.last_scan_info['completed_files'] = completed
+
+        progress = int(completed / discovered * 100) if discovered else 100
+        if not discovery_complete:
+            progress = min(progress, 99)
+        progress = max(progress, self.last_scan_info['progress'])
+
+        # 进度变化时发布新的结果快照
+        if progress != self.last_scan_info['progress']:
+            self.last_scan_info['progress'] = progress
+            self._publish_snapshot()
+        self._report_progress(progress)
+
+        # 每扫描10个文件更新一次日志
+        if completed // 10 != previous // 10 or (discovery_complete and completed == discovered):
+            if discovery_complete:
+                self._log(f"已扫描 {completed}/{discovered} 个文件")
+            else:
+                self._log(f"已扫描 {completed}/{discovered} 个文件，仍在查找文件")
+
+    def _publish_snapshot(self):
+        """发布当前扫描结果的只读快照
+
+        快照只包含计数和按类型、严重性、语言的统计，大小与文件数无关。
+        结果字典只在收集结果的线程中修改，快照整体替换发布，其他线程读取时无需加锁
+        """
+        snapshot = {
+            'total_files': self.results['total_files'],
+            'scanned_files': self.results['scanned_files'],
+            'skipped_files': self.results['skipped_files'],
+            'total_lines': self.results['total_lines'],
+            'violation_count': sum(self.results['violations'].values()),
+            'violations': MappingProxyType(dict(self.results['violations'])),
+            'violations_by_severity': MappingProxyType(dict(self.results['violations_by_severity'])),
+            'languages': MappingProxyType(dict(self.results['languages'])),
+            'current_file': self.last_scan_info['current_file'],
+            'progress': self.last_scan_info['progress'],
+            'discovered_files': self.last_scan_info['discovered_files'],
+            'completed_files': self.last_scan_info['completed_files'],
+            'discovery_complete': self.last_scan_info['discovery_complete']
+        }
+        self._snapshot = MappingProxyType(snapshot)
+        self.last_scan_info['results'] = self._snapshot
+
+    def snapshot(self):
+        """获取最近发布的扫描结果只读快照，可以在任意线程中调用"""
+        return self._snapshot
+
+    def stop(self):
+        """停止扫描"""
+        self.is_scanning = False
+
+    def pause_scan(self):
+        """暂停扫描"""
+        if self.is_scanning and not self.is_paused:
+            self.is_paused = True
+            self._log("扫描已暂停")
+            return True
+        return False
+
+    def resume_scan(self):
+        """恢复扫描"""
+        if self.is_scanning and self.is_paused:
+            self.is_paused = False
+            self._log("扫描已恢复")
+            return True
+        return False
+
+    def _merge_baseline(self, baseline_records, changed_files, deleted_files):
+        """把变更文件的扫描记录与基线合并，并由全部记录重新汇总扫描结果"""
+        merged_records = dict(baseline_records)
+        for file_path in deleted_files:
+            merged_records.pop(file_path, None)
+        for file_path in changed_files:
+            merged_records.pop(file_path, None)
+        merged_records.update(self.file_records)
+
+        # 重新汇总时保留缓存统计等附加信息
+        extra = {key: value for key, value in self.results.items() if key not in ScanResult()}
+        self.results.clear()
+        self.results.update(ScanResult(extra))
+        if self.detail_store is not None:
+            # 已经转存到磁盘时，合并后的详情继续写入磁盘存储
+            self.detail_store.clear()
+            self.results['details'] = self.detail_store
+        self.results['total_files'] = len(merged_records)
+        for file_path, record in merged_records.items():
+            fold_record(self.results, file_path, record, self.keep_details)
+        self.file_records = merged_records
+
+    def _choose_diff_ref(self, base_ref, baseline_revision):
+        """选择计算变更文件的基准版本
+
+        基线中的记录对应生成基线时的提交，只有相对该提交的变更文件需要重新扫描。
+        base_ref与基线的提交不一致时改为相对基线的提交计算变更，否则会漏掉两者之间变更的文件
+
+        Returns:
+            str: 基准版本，基线无法使用时返回None，由调用方执行完整扫描
+        """
+        if not baseline_revision:
+            self._log(f"扫描基线没有记录生成时的提交，无法确认与 {base_ref} 一致，执行完整扫描")
+            return None
+        if git_utils.resolve_revision(self.project_path, base_ref) == baseline_revision:
+            return base_ref
+        if git_utils.resolve_revision(self.project_path, baseline_revision) is None:
+            self._log(f"扫描基线的提交 {baseline_revision[:12]} 在仓库中不存在，执行完整扫描")
+            return None
+        self._log(f"扫描基线生成于提交 {baseline_revision[:12]}，与 {base_ref} 不一致，改为相对基线的提交计算变更文件")
+        return baseline_revision
+
+    def _get_changed_files(self, base_ref):
+        """获取相对基准版本变更且需要扫描的文件，以及已删除的文件"""
+        changed, deleted = git_utils.get_changed_files(self.project_path, base_ref)
+        walker = self._create_walker()
+
+        changed_files = []
+        for relative_path in changed:
+            file_path = os.path.join(self.project_path, *relative_path.split('/'))
+            # 工作区中已不存在的文件按删除处理
+            if not os.path.isfile(file_path):
+                deleted.append(relative_path)
+                continue
+            reason = walker.classify(relative_path)
+            if reason is not None:
+                walker.skipped[reason] = walker.skipped.get(reason, 0) + 1
+                continue
+            changed_files.append(file_path)
+
+        self._record_walk_skips(walker.skipped)
+        deleted_files = [os.path.join(self.project_path, *relative_path.split('/')) for relative_path in deleted]
+        return changed_files, deleted_files
+
+    def _create_walker(self, ignore_filenames=None):
+        """按当前的扩展名和排除设置创建文件遍历器
+
+        Args:
+            ignore_filenames: 读取的忽略文件名，为None时读取.gitignore和.codeauditxignore
+        """
+        ignore_matcher = None
+        if self.respect_gitignore:
+            if ignore_filenames is None:
+                ignore_matcher = IgnoreMatcher(self.project_path)
+            elif ignore_filenames:
+                ignore_matcher = IgnoreMatcher(self.project_path, ignore_filenames)
+        return FileWalker(self.project_path, self.file_extensions.keys(),
+                          exclude_dirs=self.exclude_dirs, exclude_files=self.exclude_files,
+                          max_file_size=self.max_file_size, ignore_matcher=ignore_matcher)
+
+    def _record_walk_skips(self, skipped):
+        """记录文件查找阶段跳过的文件数"""
+        for reason, count in skipped.items():
+            self.walk_skips[reason] = self.walk_skips.get(reason, 0) + count
+        if skipped:
+            self._log("查找文件时跳过: " + ", ".join(f"{reason} {count}" for reason, count in sorted(skipped.items())))
+
+    def _iter_files(self):
+        """逐个产出项目中需要扫描的文件，目录按需遍历，排除的目录不会进入"""
+        if self.use_git_ls_files and git_utils.is_git_repository(self.project_path):
+            # git已经按.gitignore过滤了未跟踪的文件，并且不会忽略已跟踪的文件，这里只需要读取.codeauditxignore
+            walker = self._create_walker(ignore_filenames=('.codeauditxignore',))
+            self._log("使用git ls-files获取文件列表")
+            yield from walker.walk_paths(git_utils.iter_files(self.project_path))
+        else:
+            walker = self._create_walker()
+            yield from walker.walk()
+        self._record_walk_skips(walker.skipped)
+
+    def _get_language(self, file_path):
+        """根据扩展名获取文件的语言名称，不支持的类型返回None"""
+        _, ext = os.path.splitext(file_path)
+        return self.file_extensions.get(ext.lower())
+
+    def _scan_file(self, file_path):
+        """在线程中扫描单个文件，返回文件扫描记录"""
+        # 检查是否处于暂停状态
+        while self.is_paused and self.is_scanning:
+            time.sleep(0.1)  # 暂停时每100ms检查一次状态
+            if not self.is_scanning:  # 如果扫描被终止，直接返回
+                return None
+
+        # 获取语言名称，不是支持的文件类型则不扫描
+        language = self._get_language(file_path)
+        if language is None:
+            return None
+
+        return analyze_file(file_path, language, self.ruleset, self.rule_plans.get(language),
+                            cache=self.cache, fingerprint=self.cache_fingerprints.get(language),
+                            parser_pool=self.parser_pool)
+
+    def _merge_file_result(self, record):
+        """把单个文件的扫描记录合并到扫描结果中，只在收集结果的线程中调用
+
+        Returns:
+            dict: 该文件的最终记录，不包含file_path
+        """
+        merge_start = time.perf_counter()
+        file_path = record['file_path']
+        language = record.get('language') or self._get_language(file_path)
+        if self.profiler is not None and 'duration' in record:
+            self.profiler.add_file(file_path, language, record['duration'], record.get('size', 0),
+                                   record.get('profile'))
+        if record.get('parser_created'):
+            self.counters['parsers_created'] += 1
+        if self.scheduler is not None and 'duration' in record:
+            self.scheduler.complete(file_path, language, record.get('size', 0), record['duration'],
+                                    cache_hit=record.get('cache_status') == 'hit')
+
+        if 'error' in record:
+            self._log(f"跳过文件: {os.path.basename(file_path)} - {record['error']}")
+            final_record = {'language': language, 'error': record['error']}
+            for field in ('skip_reason', 'stage'):
+                if field in record:
+                    final_record[field] = record[field]
+        else:
+            # 更新扫描缓存，只在当前线程写入
+            if self.cache is not None:
+                cache_status = record.get('cache_status')
+                if cache_status == 'hit':
+                    self.cache.record_hit(record.get('size', 0))
+                    self.cache.touch(record['cache_key'])
+                elif cache_status == 'miss':
+                    self.cache.record_miss()
+                    self.cache.put(record['cache_key'],
+                                   {field: record[field] for field in CACHED_RECORD_FIELDS if field in record})
+
+            final_record = {'language': language, 'parsed': record.get('parsed', False)}
+            if final_record['parsed']:
+                violations = record.get('violations', [])
+
+                # 如果没有发现任何违规，添加一个测试违规用于验证功能
+                if record.get('raw_count', 0) == 0:
+                    # 只在特定文件上添加测试违规，避免所有文件都显示相同的测试违规
+                    # 例如，只在第一个Python文件或每10个文件中的一个添加测试违规
+                    if (language == 'Python' and len(self.results['violations']) == 0) or \
+                       (self.results['scanned_files'] % 10 == 0):
+                        logger.info(f"未发现实际违规，添加测试违规以验证功能: {file_path}")
+                        violations = format_violations([dict(TEST_VIOLATION)], self.ruleset)
+
+                final_record['lines'] = record.get('lines', 0)
+                final_record['violations'] = violations
+                if record.get('licenses'):
+                    final_record['licenses'] = record['licenses']
+
+        fold_record(self.results, file_path, final_record, self.keep_details)
+        if self.file_records is not None:
+            stored_record = final_record
+            if final_record.get('violations'):
+                stored_record = dict(final_record, violations=compact_violations(
+                    final_record['violations'], self.results.violation_tables))
+            self.file_records[file_path] = stored_record
+        if self.memory_budget:
+            self._check_memory_budget()
+
+        if 'error' not in final_record:
+            # 保存当前扫描信息，完整结果只在发布快照时汇总，避免每个文件复制一次
+            self.last_scan_info['current_file'] = file_path
+            self.last_scan_info['scanned_files'] = self.results.get('scanned_files', 0)
+
+        if self.profiler is not None:
+            self.profiler.add_timing('phases', 'merge', time.perf_counter() - merge_start)
+        if self.tracer is not None and 'trace' in record:
+            # 只记录被抽中的文件的合并过程
+            self.tracer.add_file_trace(file_path, language, record['trace'])
+            self.tracer.add('merge', 'merge', merge_start, time.perf_counter())
+        return final_record
+
+
+    def _check_memory_budget(self):
+        """每合并MEMORY_CHECK_INTERVAL个文件检查一次内存占用，超出上限时把违规详情转存到磁盘"""
+        self._merges_since_memory_check += 1
+        if self._merges_since_memory_check < MEMORY_CHECK_INTERVAL:
+            return
+        self._merges_since_memory_check = 0
+
+        # 工作进程的内存在任务结束后释放，只统计汇总结果的主进程
+        usage = get_memory_usage(include_children=False)
+        if usage is None:
+            return
+        self._peak_memory = max(self._peak_memory, usage)
+        if usage > self.memory_budget and self.detail_store is None and self.keep_details:
+            self._spill_details(usage)
+
+    def _spill_details(self, usage):
+        """把已有的违规详情写入磁盘存储，之后的详情直接写入磁盘"""
+        try:
+            store = DetailStore(self.spill_dir)
+            store.update(self.results['details'])
+            store.flush()
+        except Exception as e:
+            logger.warning(f"违规详情转存到磁盘失败，继续保存在内存中: {str(e)}")
+            self._log(f"警告: 违规详情转存到磁盘失败 - {str(e)}")
+            # 不再重复尝试
+            self.memory_budget = 0
+            return
+
+        self.results['details'] = store
+        self.detail_store = store
+        # 释放内存中的违规列表，后续扫描可以复用这部分内存
+        gc.collect()
+        self._log(f"内存占用 {usage / 1024 / 1024:.0f} MB 超出上限 "
+                  f"{self.memory_budget / 1024 / 1024:.0f} MB，违规详情转存到 {store.db_path}")
+
+    def _record_memory(self):
+        """把内存上限和转存情况写入扫描结果的memory字段"""
+        usage = get_memory_usage(include_children=False)
+        if usage is not None:
+            self._peak_memory = max(self._peak_memory, usage)
+        memory = {
+            'budget': self.memory_budget,
+            'peak_rss': self._peak_memory,
+            'spilled': self.detail_store is not None
+        }
+        if self.detail_store is not None:
+            memory['spill_path'] = self.detail_store.db_path
+            memory['spilled_files'] = len(self.detail_store)
+            memory['spill_bytes'] = self.detail_store.size_bytes()
+        self.results['memory'] = memory
+
+
+def run_scan(project_path, ruleset, max_workers=None, progress_callback=None, log_callback=None, mode=None,
+             use_cache=None, base_ref=None, baseline_path=None):
+    """无界面扫描的便捷函数
+
+    Args:
+        project_path: 项目路径
+        ruleset: 规则集名称
+        max_workers: 线程或进程数，为None时自动调整
+        progress_callback: 进度回调
+        log_callback: 日志回调
+        mode: 执行模式，'thread'、'process'或'auto'
+        use_cache: 是否使用增量扫描缓存，为None时读取配置
+        base_ref: git基准版本，指定时只扫描变更文件并与基线合并
+        baseline_path: 增量扫描使用的基线文件
+
+    Returns:
+        ScanResult: 扫描结果
+    """
+    engine = ScanEngine(project_path, ruleset, progress_callback=progress_callback,
+                        log_callback=log_callback, use_cache=use_cache)
+    return engine.run(max_workers=max_workers, mode=mode, base_ref=base_ref, baseline_path=baseline_path)
+
+
+def iter_scan(project_path, ruleset, max_workers=None, mode=None, use_cache=None,
+              progress_callback=None, log_callback=None):
+    """流式扫描的便捷函数，逐个产出文件扫描记录
+
+    引擎只累加计数，不保留违规详情，内存占用与违规总数无关；
+    需要完整的汇总结果时可以用summarize_records()对产出的记录做汇总
+
+    Args:
+        project_path: 项目路径
+        ruleset: 规则集名称
+        max_workers: 线程或进程数，为None时自动调整
+        mode: 执行模式，'thread'、'process'或'auto'
+        use_cache: 是否使用增量扫描缓存，为None时读取配置
+        progress_callback: 进度回调
+        log_callback: 日志回调
+
+    Yields:
+        dict: 单个文件的扫描记录
+    """
+    engine = ScanEngine(project_path, ruleset, progress_callback=progress_callback,
+                        log_callback=log_callback, use_cache=use_cache)
+    yield from engine.iter_scan(max_workers=max_workers, mode=mode, keep_details=False)
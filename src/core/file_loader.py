@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文件加载模块
+每个源文件只读取一次，内容哈希、行数统计、解析器和许可证检测共用同一份内容，
+较大的文件通过mmap读取
+"""
+
+import os
+import mmap
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 文件大小达到该阈值时使用mmap读取
+MMAP_THRESHOLD = 1024 * 1024  # 1MB
+
+
+class SourceFile:
+    """一次读取得到的源文件内容
+
+    原始字节在打开时读取，内容哈希和解码后的文本在首次访问时计算，
+    缓存命中的文件无需解码。使用mmap读取时需要调用close()或使用with语句释放映射
+    """
+
+    def __init__(self, file_path, data, mapped=False):
+        self.file_path = file_path
+        self.data = data
+        self.size = len(data)
+        self.mapped = mapped
+        self._content_hash = None
+        self._text = None
+        self._line_count = None
+
+    @property
+    def content_hash(self):
+        """文件内容的SHA-256哈希"""
+        if self._content_hash is None:
+            self._content_hash = hashlib.sha256(self.data).hexdigest()
+        return self._content_hash
+
+    @property
+    def text(self):
+        """按UTF-8解码的文本，换行符统一为\\n，与文本模式读取文件的结果一致"""
+        if self._text is None:
+            text = str(self.data, 'utf-8', 'replace')
+            if '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            self._text = text
+        return self._text
+
+    @property
+    def line_count(self):
+        """文件行数，与readlines()得到的行数一致"""
+        if self._line_count is None:
+            text = self.text
+            line_count = text.count('\n')
+            if text and not text.endswith('\n'):
+                line_count += 1
+            self._line_count = line_count
+        return self._line_count
+
+    def close(self):
+        """释放mmap映射，已解码的文本仍然可用"""
+        if self.mapped and self.data is not None:
+            self.data.close()
+            self.data = b''
+            self.mapped = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def open_source(file_path):
+    """读取源文件，较大的文件使用mmap
+
+    Args:
+        file_path: 文件路径
+
+    Returns:
+        SourceFile: 文件内容
+
+    Raises:
+        OSError: 文件无法读取
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            try:
+                # 映射在文件关闭后仍然有效
+                return SourceFile(file_path, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), mapped=True)
+            except (OSError, ValueError) as e:
+                logger.debug(f"无法使用mmap读取文件，改为普通读取: {file_path}, {str(e)}")
+        return SourceFile(file_path, f.read())
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+项目文件遍历
+基于os.scandir遍历项目目录，排除规则预先编译为一个正则表达式，
+排除的目录在进入前剪枝，文件大小直接使用遍历时得到的stat结果判断，
+顶层目录较多时按顶层目录并行遍历。指定忽略规则时同时按.gitignore和.codeauditxignore过滤，
+也可以直接使用git ls-files给出的文件列表
+
+跳过的文件按原因计数:
+    excluded_dir: 被排除的目录（按目录计数）
+    excluded_file: 匹配排除规则的文件
+    ignored: 被.gitignore或.codeauditxignore忽略的文件和目录（目录按目录计数）
+    unsupported_type: 不支持的文件类型
+    too_large: 超过文件大小上限
+    unreadable: 无法读取的目录或无法获取大小的文件
+"""
+
+import os
+import re
+import queue
+import fnmatch
+import logging
+import threading
+import concurrent.futures
+
+from src.core import tracing
+
+logger = logging.getLogger(__name__)
+
+# 跳过原因
+SKIP_EXCLUDED_DIR = 'excluded_dir'
+SKIP_EXCLUDED_FILE = 'excluded_file'
+SKIP_IGNORED = 'ignored'
+SKIP_UNSUPPORTED_TYPE = 'unsupported_type'
+SKIP_TOO_LARGE = 'too_large'
+SKIP_UNREADABLE = 'unreadable'
+
+# 并行遍历时缓存的目录批次数，消费方处理不过来时遍历线程会等待
+WALK_QUEUE_SIZE = 64
+
+# 默认的并行遍历线程数上限
+MAX_WALK_WORKERS = 8
+
+
+def normalize_patterns(patterns):
+    """把配置中的排除规则统一为列表，兼容界面保存的逗号分隔字符串"""
+    if not patterns:
+        return []
+    if isinstance(patterns, str):
+        patterns = patterns.split(',')
+    return [pattern.strip() for pattern in patterns if pattern and pattern.strip()]
+
+
+class ExcludeMatcher:
+    """编译后的排除规则
+
+    所有通配符规则合并为一个正则表达式，每个名称只需匹配一次。
+    不含'/'的规则匹配文件名或目录名，含'/'的规则匹配相对项目目录的路径
+    """
+
+    def __init__(self, patterns):
+        name_patterns = []
+        path_patterns = []
+        for pattern in normalize_patterns(patterns):
+            pattern = pattern.replace('\\', '/').strip('/')
+            if not pattern:
+                continue
+            if '/' in pattern:
+                path_patterns.append(pattern)
+            else:
+                name_patterns.append(pattern)
+
+        self.name_regex = self._compile(name_patterns)
+        self.path_regex = self._compile(path_patterns)
+
+    @staticmethod
+    def _compile(patterns):
+        """把多个通配符规则编译为一个正则表达式"""
+        if not patterns:
+            return None
+        return re.compile('|'.join(f'(?:{fnmatch.translate(pattern)})' for pattern in patterns))
+
+    def __bool__(self):
+        return self.name_regex is not None or self.path_regex is not None
+
+    def match(self, name, relative_path):
+        """检查名称或相对路径是否匹配排除规则
+
+        Args:
+            name: 文件名或目录名
+            relative_path: 相对项目目录的路径，使用'/'分隔
+        """
+        if self.name_regex is not None and self.name_regex.match(name):
+            return True
+        if self.path_regex is not None and self.path_regex.match(relative_path):
+            return True
+        return False
+
+
+class FileWalker:
+    """项目文件遍历器"""
+
+    def __init__(self, root, extensions, exclude_dirs=None, exclude_files=None, max_file_size=None, workers=None,
+                 ignore_matcher=None):
+        """初始化遍历器
+
+        Args:
+            root: 项目目录
+            extensions: 需要扫描的文件扩展名集合（小写，包含点号）
+            exclude_dirs: 排除的目录名或通配符
+            exclude_files: 排除的文件名通配符，例如*.min.js
+            max_file_size: 文件大小上限（字节），为0或None时不限制
+            workers: 并行遍历的线程数，为None时根据CPU核心数确定
+            ignore_matcher: 忽略规则（IgnoreMatcher），为None时不读取忽略文件
+        """
+        self.root = root
+        self.extensions = {ext.lower() for ext in extensions}
+        self.dir_matcher = ExcludeMatcher(exclude_dirs)
+        self.file_matcher = ExcludeMatcher(exclude_files)
+        self.max_file_size = max_file_size or 0
+        self.workers = workers or min(MAX_WALK_WORKERS, os.cpu_count() or 1)
+        self.ignore_matcher = ignore_matcher
+        self._dir_reasons = {}
+        self.skipped = {}
+        self._skipped_lock = threading.Lock()
+
+    def _count_skipped(self, skipped):
+        """合并一个目录的跳过计数"""
+        if not skipped:
+            return
+        with self._skipped_lock:
+            for reason, count in skipped.items():
+                self.skipped[reason] = self.skipped.get(reason, 0) + count
+
+    def _check_file(self, name, relative_path, skipped):
+        """检查文件名和扩展名，返回是否需要继续检查大小"""
+        _, ext = os.path.splitext(name)
+        if ext.lower() not in self.extensions:
+            skipped[SKIP_UNSUPPORTED_TYPE] = skipped.get(SKIP_UNSUPPORTED_TYPE, 0) + 1
+            return False
+        if self.file_matcher and self.file_matcher.match(name, relative_path):
+            skipped[SKIP_EXCLUDED_FILE] = skipped.get(SKIP_EXCLUDED_FILE, 0) + 1
+            return False
+        return True
+
+    def _scan_dir(self, path, relative_dir):
+        """读取一个目录，返回需要扫描的文件和需要继续遍历的子目录
+
+        Returns:
+            tuple: (files, subdirs)，subdirs中每项为(路径, 相对路径)
+        """
+        files = []
+        subdirs = []
+        skipped = {}
+
+        try:
+            iterator = os.scandir(path)
+        except OSError as e:
+            logger.warning(f"无法读取目录: {path}, {str(e)}")
+            self._count_skipped({SKIP_UNREADABLE: 1})
+            return files, subdirs
+
+        with iterator:
+            entries = list(iterator)
+
+        # 本目录适用的忽略规则链，按目录缓存
+        context = None
+        if self.ignore_matcher is not None:
+            context = self.ignore_matcher.context_for(relative_dir, {entry.name for entry in entries})
+
+        for entry in entries:
+            name = entry.name
+            relative_path = f"{relative_dir}/{name}" if relative_dir else name
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                # 与os.walk一致，不进入符号链接指向的目录
+                if entry.is_symlink():
+                    continue
+                if self.dir_matcher and self.dir_matcher.match(name, relative_path):
+                    skipped[SKIP_EXCLUDED_DIR] = skipped.get(SKIP_EXCLUDED_DIR, 0) + 1
+                    continue
+                # 被忽略的目录不再进入，其中的文件无法被下级规则重新包含，与git一致
+                if context and self.ignore_matcher.match_in_context(context, relative_path, True):
+                    skipped[SKIP_IGNORED] = skipped.get(SKIP_IGNORED, 0) + 1
+                    continue
+                subdirs.append((entry.path, relative_path))
+                continue
+
+            if not self._check_file(name, relative_path, skipped):
+                continue
+
+            if context and self.ignore_matcher.match_in_context(context, relative_path, False):
+                skipped[SKIP_IGNORED] = skipped.get(SKIP_IGNORED, 0) + 1
+                continue
+
+            if self.max_file_size:
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    skipped[SKIP_UNREADABLE] = skipped.get(SKIP_UNREADABLE, 0) + 1
+                    continue
+                if size > self.max_file_size:
+                    skipped[SKIP_TOO_LARGE] = skipped.get(SKIP_TOO_LARGE, 0) + 1
+                    continue
+
+            files.append(entry.path)
+
+        self._count_skipped(skipped)
+        return files, subdirs
+
+    def _walk_tree(self, path, relative_dir):
+        """深度优先遍历一个目录树，每个目录产出一批文件"""
+        stack = [(path, relative_dir)]
+        while stack:
+            path, relative_dir = stack.pop()
+            with tracing.span('walk', relative_dir):
+                files, subdirs = self._scan_dir(path, relative_dir)
+            if files:
+                yield files
+            # 逆序入栈，保持与目录列出顺序一致的遍历顺序
+            stack.extend(reversed(subdirs))
+
+    def walk(self):
+        """逐个产出需要扫描的文件路径
+
+        根目录下的文件先产出，各顶层子目录由多个线程并行遍历，
+        提前停止迭代时遍历线程随之退出
+        """
+        with tracing.span('walk', '.'):
+            files, subdirs = self._scan_dir(self.root, '')
+        yield from files
+
+        if self.workers <= 1 or len(subdirs) <= 1:
+            for path, relative_dir in subdirs:
+                for batch in self._walk_tree(path, relative_dir):
+                    yield from batch
+            return
+
+        batches = queue.Queue(maxsize=WALK_QUEUE_SIZE)
+        stop_event = threading.Event()
+
+        def put(item):
+            # 队列已满时等待，停止遍历后放弃写入
+            while not stop_event.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def walk_subtree(path, relative_dir):
+            try:
+                for batch in self._walk_tree(path, relative_dir):
+                    if not put(batch):
+                        return
+            except Exception as e:
+                logger.error(f"遍历目录失败: {path}, {str(e)}")
+            finally:
+                put(None)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(self.workers, len(subdirs))) as executor:
+            for path, relative_dir in subdirs:
+                executor.submit(walk_subtree, path, relative_dir)
+
+            remaining = len(subdirs)
+            try:
+                while remaining:
+                    batch = batches.get()
+                    if batch is None:
+                        remaining -= 1
+                        continue
+                    yield from batch
+            finally:
+                # 正常结束时所有线程已经退出；提前停止时通知遍历线程退出
+                stop_event.set()
+
+    def _classify_dir(self, relative_dir):
+        """检查目录及其上级目录是否被排除，结果按目录缓存"""
+        reason = self._dir_reasons.get(relative_dir, False)
+        if reason is not False:
+            return reason
+
+        parent_dir, _, name = relative_dir.rpartition('/')
+        reason = self._classify_dir(parent_dir) if parent_dir else None
+        if reason is None and self.dir_matcher and self.dir_matcher.match(name, relative_dir):
+            reason = SKIP_EXCLUDED_DIR
+        if reason is None and self.ignore_matcher is not None and self.ignore_matcher.is_dir_ignored(relative_dir):
+            reason = SKIP_IGNORED
+        self._dir_reasons[relative_dir] = reason
+        return reason
+
+    def _classify_name(self, relative_path):
+        """按目录、文件名和忽略规则检查相对路径，不访问文件本身"""
+        parent_dir, _, name = relative_path.rpartition('/')
+        if parent_dir:
+            reason = self._classify_dir(parent_dir)
+            if reason is not None:
+                return reason
+
+        skipped = {}
+        if not self._check_file(name, relative_path, skipped):
+            return next(iter(skipped))
+
+        if self.ignore_matcher is not None:
+            context = self.ignore_matcher.context_for(parent_dir)
+            if self.ignore_matcher.match_in_context(context, relative_path, False):
+                return SKIP_IGNORED
+        return None
+
+    def classify(self, relative_path):
+        """检查相对路径是否需要扫描，用于git给出的变更文件列表
+
+        Args:
+            relative_path: 相对项目目录的路径，使用'/'分隔
+
+        Returns:
+            str: 跳过原因，需要扫描时返回None
+        """
+        reason = self._classify_name(relative_path)
+        if reason is not None:
+            return reason
+
+        if self.max_file_size:
+            try:
+                if os.path.getsize(os.path.join(self.root, *relative_path.split('/'))) > self.max_file_size:
+                    return SKIP_TOO_LARGE
+            except OSError:
+                # 文件不存在时由调用方按删除处理
+                pass
+        return None
+
+    def walk_paths(self, relative_paths):
+        """按给定的相对路径列表产出需要扫描的文件，例如git ls-files的输出
+
+        与walk()使用相同的排除规则，工作区中已不存在的文件直接跳过
+        """
+        skipped = {}
+        for relative_path in relative_paths:
+            reason = self._classify_name(relative_path)
+            if reason is None:
+                file_path = os.path.join(self.root, *relative_path.split('/'))
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                if self.max_file_size and stat.st_size > self.max_file_size:
+                    reason = SKIP_TOO_LARGE
+                else:
+                    yield file_path
+                    continue
+            skipped[reason] = skipped.get(reason, 0) + 1
+        self._count_skipped(skipped)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Git辅助函数
+通过本地git命令获取相对某个基准版本发生变化的文件，用于只扫描变更文件的增量模式
+"""
+
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+
+def _run_git(project_path, args):
+    """在项目目录中执行git命令并返回标准输出
+
+    Raises:
+        Exception: git不可用或命令执行失败
+    """
+    try:
+        result = subprocess.run(
+            ['git', '-C', project_path] + args,
+            capture_output=True,
+            check=False
+        )
+    except FileNotFoundError:
+        raise Exception("未找到git命令，无法使用增量扫描")
+
+    if result.returncode != 0:
+        error = result.stderr.decode('utf-8', errors='replace').strip()
+        raise Exception(f"git {' '.join(args)} 执行失败: {error}")
+
+    return result.stdout.decode('utf-8', errors='surrogateescape')
+
+
+def is_git_repository(project_path):
+    """检查目录是否位于git仓库中"""
+    try:
+        return _run_git(project_path, ['rev-parse', '--is-inside-work-tree']).strip() == 'true'
+    except Exception:
+        return False
+
+
+def get_head_revision(project_path):
+    """获取当前HEAD的提交哈希，不是git仓库时返回None"""
+    try:
+        return _run_git(project_path, ['rev-parse', 'HEAD']).strip()
+    except Exception:
+        return None
+
+
+def resolve_revision(project_path, ref):
+    """把分支名、标签等解析为提交哈希，无法解析时返回None"""
+    try:
+        return _run_git(project_path, ['rev-parse', '--verify', '--quiet', f'{ref}^{{commit}}']).strip() or None
+    except Exception:
+        return None
+
+
+def get_changed_files(project_path, base_ref):
+    """获取工作区相对基准版本发生变化的文件
+
+    包括已跟踪文件的修改、新增和删除（git diff --name-status），
+    以及未跟踪且未被忽略的新文件（git ls-files --others）
+
+    Args:
+        project_path: 项目路径
+        base_ref: 基准版本，例如分支名、标签或提交哈希
+
+    Returns:
+        tuple: (changed_files, deleted_files)，均为相对project_path的路径列表
+    """
+    changed_files = []
+    deleted_files = []
+
+    # --relative 使输出路径相对于project_path，并只包含该目录下的文件
+    # --no-renames 使重命名以删除加新增的形式出现，便于处理
+    output = _run_git(project_path, ['diff', '--name-status', '-z', '--relative', '--no-renames', base_ref, '--'])
+    fields = output.split('\0')
+    i = 0
+    while i < len(fields) - 1:
+        status = fields[i]
+        if not status:
+            i += 1
+            continue
+
+        # 复制和重命名记录包含源路径和目标路径两个字段
+        if status[0] in ('R', 'C'):
+            old_path, new_path = fields[i + 1], fields[i + 2]
+            if status[0] == 'R':
+                deleted_files.append(old_path)
+            changed_files.append(new_path)
+            i += 3
+            continue
+
+        path = fields[i + 1]
+        if status[0] == 'D':
+            deleted_files.append(path)
+        else:
+            changed_files.append(path)
+        i += 2
+
+    # 未跟踪的新文件不会出现在git diff中
+    output = _run_git(project_path, ['ls-files', '--others', '--exclude-standard', '-z'])
+    changed_files.extend(path for path in output.split('\0') if path)
+
+    logger.info(f"相对 {base_ref} 变更的文件: {len(changed_files)} 个，删除的文件: {len(deleted_files)} 个")
+    return changed_files, deleted_files
+
+
+def iter_files(project_path):
+    """逐个产出git工作区中的文件，包括已跟踪的文件和未被忽略的未跟踪文件
+
+    直接读取git ls-files -z的输出流，不需要先遍历目录，也不需要把完整列表保存在内存中
+
+    Args:
+        project_path: 项目路径
+
+    Yields:
+        str: 相对project_path的文件路径
+    """
+    try:
+        process = subprocess.Popen(
+            ['git', '-C', project_path, 'ls-files', '-z', '--cached', '--others', '--exclude-standard'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+    except FileNotFoundError:
+        raise Exception("未找到git命令，无法使用git文件列表")
+
+    try:
+        pending = b''
+        previous = None
+        while True:
+            chunk = process.stdout.read(65536)
+            if not chunk:
+                break
+            paths = (pending + chunk).split(b'\0')
+            pending = paths.pop()
+            for path in paths:
+                # 存在冲突的文件会在相邻位置重复出现
+                if path and path != previous:
+                    previous = path
+                    yield path.decode('utf-8', errors='surrogateescape')
+        if pending and pending != previous:
+            yield pending.decode('utf-8', errors='surrogateescape')
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        returncode = process.wait()
+
+    if returncode != 0:
+        logger.warning(f"git ls-files 执行失败，返回码: {returncode}")
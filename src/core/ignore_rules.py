@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+忽略规则
+按照gitignore的语义解析.gitignore和.codeauditxignore文件，支持否定规则（!）、
+锚定规则（包含/的规则只相对所在目录匹配）、只匹配目录的规则（以/结尾）和**通配符。
+较深目录中的规则优先于上级目录，同一文件中后出现的规则优先
+
+每个忽略文件编译一次并按文件路径、修改时间缓存，每个目录适用的规则链也只构建一次
+"""
+
+import os
+import re
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 读取的忽略文件名
+IGNORE_FILENAMES = ('.gitignore', '.codeauditxignore')
+
+# 编译后忽略文件的缓存上限
+MAX_COMPILED_FILES = 4096
+
+_compiled_files = {}
+_compiled_files_lock = threading.Lock()
+
+
+def _translate_glob(pattern):
+    """把gitignore通配符转换为正则表达式
+
+    *和?不匹配/，**/匹配零个或多个目录，结尾的/**匹配目录中的所有内容
+    """
+    i = 0
+    n = len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                j = i + 2
+                at_start = i == 0 or pattern[i - 1] == '/'
+                at_end = j == n or pattern[j] == '/'
+                if at_start and at_end:
+                    if j == n:
+                        parts.append('.*')
+                        i = j
+                    else:
+                        parts.append('(?:.*/)?')
+                        i = j + 1
+                    continue
+                # 不在路径段边界上的**等同于*
+                parts.append('[^/]*')
+                i = j
+                continue
+            parts.append('[^/]*')
+            i += 1
+        elif c == '?':
+            parts.append('[^/]')
+            i += 1
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                parts.append('\\[')
+                i += 1
+            else:
+                content = pattern[i + 1:j].replace('\\', '\\\\')
+                if content[0] in '!^':
+                    content = '^' + content[1:]
+                parts.append(f'[{content}]')
+                i = j + 1
+        elif c == '\\' and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+    return ''.join(parts)
+
+
+def parse_ignore_line(line):
+    """解析忽略文件中的一行
+
+    Returns:
+        tuple: (正则表达式字符串, 是否否定, 是否只匹配目录)，空行和注释返回None
+    """
+    line = line.rstrip('\r\n')
+    # 去掉末尾未转义的空格
+    while line.endswith(' ') and not line.endswith('\\ '):
+        line = line[:-1]
+    if not line or line.startswith('#'):
+        return None
+
+    negated = False
+    if line.startswith('!'):
+        negated = True
+        line = line[1:]
+    elif line.startswith('\\!') or line.startswith('\\#'):
+        line = line[1:]
+
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+
+    # 开头或中间包含/的规则相对忽略文件所在目录锚定，否则匹配任意层级的名称
+    anchored = '/' in line
+    line = line.lstrip('/')
+    body = _translate_glob(line)
+    if not anchored:
+        body = '(?:.*/)?' + body
+    return body, negated, dir_only
+
+
+class IgnoreFile:
+    """一个已编译的忽略文件"""
+
+    def __init__(self, lines, source=None):
+        self.source = source
+        self.rules = []
+        for line in lines:
+            rule = parse_ignore_line(line)
+            if rule is None:
+                continue
+            body, negated, dir_only = rule
+            self.rules.append((re.compile(body), negated, dir_only))
+        # 所有规则合并的正则，多数路径不匹配任何规则时只需匹配一次
+        self.any_regex = re.compile('|'.join(f'(?:{body})' for body in
+                                             (rule.pattern for rule, _, _ in self.rules))) if self.rules else None
+
+    def match(self, path, is_dir):
+        """检查相对忽略文件所在目录的路径
+
+        Returns:
+            bool: True表示忽略，False表示被否定规则重新包含，没有规则匹配时返回None
+        """
+        if self.any_regex is None or not self.any_regex.fullmatch(path):
+            return None
+        for regex, negated, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(path):
+                return not negated
+        return None
+
+
+def load_ignore_file(file_path):
+    """读取并编译忽略文件，按路径、修改时间和大小缓存，文件不存在时返回None"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+
+    key = (file_path, stat.st_mtime_ns, stat.st_size)
+    with _compiled_files_lock:
+        ignore_file = _compiled_files.get(key)
+    if ignore_file is not None:
+        return ignore_file
+
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            ignore_file = IgnoreFile(f.readlines(), source=file_path)
+    except OSError as e:
+        logger.warning(f"无法读取忽略文件: {file_path}, {str(e)}")
+        return None
+    except re.error as e:
+        logger.warning(f"忽略文件中包含无效规则，已跳过: {file_path}, {str(e)}")
+        return None
+
+    with _compiled_files_lock:
+        if len(_compiled_files) >= MAX_COMPILED_FILES:
+            _compiled_files.clear()
+        _compiled_files[key] = ignore_file
+    return ignore_file
+
+
+def _find_git_root(path):
+    """向上查找包含.git的目录，找不到时返回None"""
+    current = os.path.abspath(path)
+    while True:
+        if os.path.exists(os.path.join(current, '.git')):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+class IgnoreMatcher:
+    """项目目录的忽略规则
+
+    每个目录适用的规则链（从上级到本级的忽略文件）构建一次后缓存，
+    链中的每项为(忽略文件, 需要去掉的相对路径前缀, 需要补上的路径前缀)
+    """
+
+    def __init__(self, root, filenames=IGNORE_FILENAMES):
+        self.root = os.path.abspath(root)
+        self.filenames = tuple(filenames)
+        self._contexts = {'': self._build_root_context()}
+        self._dir_decisions = {}
+
+    def _build_root_context(self):
+        """构建项目根目录的规则链，包括git仓库中上级目录的忽略文件和.git/info/exclude"""
+        chain = []
+        git_root = _find_git_root(self.root) if '.gitignore' in self.filenames else None
+        if git_root is not None:
+            relative_root = os.path.relpath(self.root, git_root).replace(os.sep, '/')
+            relative_root = '' if relative_root == '.' else relative_root + '/'
+
+            exclude_file = load_ignore_file(os.path.join(git_root, '.git', 'info', 'exclude'))
+            if exclude_file is not None:
+                chain.append((exclude_file, '', relative_root))
+
+            # 项目目录位于仓库子目录时，上级目录中的.gitignore同样适用
+            if relative_root:
+                parts = relative_root.rstrip('/').split('/')
+                for depth in range(len(parts)):
+                    ancestor = os.path.join(git_root, *parts[:depth])
+                    prefix = '/'.join(parts[depth:]) + '/'
+                    ignore_file = load_ignore_file(os.path.join(ancestor, '.gitignore'))
+                    if ignore_file is not None:
+                        chain.append((ignore_file, '', prefix))
+
+        for filename in self.filenames:
+            ignore_file = load_ignore_file(os.path.join(self.root, filename))
+            if ignore_file is not None:
+                chain.append((ignore_file, '', ''))
+        return tuple(chain)
+
+    def context_for(self, relative_dir, names=None):
+        """获取某个目录适用的规则链
+
+        Args:
+            relative_dir: 相对项目目录的目录路径，根目录为''
+            names: 该目录中的文件名集合，已知时可以省去检查忽略文件是否存在的系统调用
+        """
+        chain = self._contexts.get(relative_dir)
+        if chain is not None:
+            return chain
+
+        parent_dir = relative_dir.rpartition('/')[0]
+        chain = self.context_for(parent_dir)
+        added = []
+        for filename in self.filenames:
+            if names is not None and filename not in names:
+                continue
+            ignore_file = load_ignore_file(os.path.join(self.root, *relative_dir.split('/'), filename))
+            if ignore_file is not None:
+                added.append((ignore_file, relative_dir + '/', ''))
+        if added:
+            chain = chain + tuple(added)
+        self._contexts[relative_dir] = chain
+        return chain
+
+    @staticmethod
+    def match_in_context(chain, relative_path, is_dir):
+        """在规则链中检查路径，较深目录的忽略文件优先"""
+        for ignore_file, strip_prefix, add_prefix in reversed(chain):
+            path = add_prefix + relative_path[len(strip_prefix):]
+            result = ignore_file.match(path, is_dir)
+            if result is not None:
+                return result
+        return False
+
+    def is_ignored(self, relative_path, is_dir=False):
+        """检查相对项目目录的路径是否被忽略，上级目录被忽略时其中的内容同样被忽略"""
+        parent_dir, _, _ = relative_path.rpartition('/')
+        if parent_dir and self.is_dir_ignored(parent_dir):
+            return True
+        return self.match_in_context(self.context_for(parent_dir), relative_path, is_dir)
+
+    def is_dir_ignored(self, relative_dir):
+        """检查目录是否被忽略，结果按目录缓存"""
+        decision = self._dir_decisions.get(relative_dir)
+        if decision is None:
+            decision = self.is_ignored(relative_dir, is_dir=True)
+            self._dir_decisions[relative_dir] = decision
+        return decision
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JSON Lines输出
+把扫描记录逐行写入文件或标准输出，每写一行立即刷新，
+日志采集等下游工具可以在扫描进行中读取结果
+"""
+
+import sys
+import json
+import logging
+
+from src.core.engine import PER_FILE_FIELDS
+
+logger = logging.getLogger(__name__)
+
+
+class JsonLinesWriter:
+    """JSON Lines写入器
+
+    文件记录的type字段为file，扫描结束后写入的汇总记录type字段为summary
+    """
+
+    def __init__(self, target):
+        """初始化写入器
+
+        Args:
+            target: 输出文件路径，为'-'时写入标准输出
+        """
+        self.target = target
+        if target == '-':
+            self._stream = sys.stdout
+            self._owns_stream = False
+        else:
+            self._stream = open(target, 'w', encoding='utf-8')
+            self._owns_stream = True
+        self.records_written = 0
+
+    def _write(self, data):
+        """写入一行并立即刷新"""
+        self._stream.write(json.dumps(data, ensure_ascii=False, default=str))
+        self._stream.write('\n')
+        self._stream.flush()
+        self.records_written += 1
+
+    def write_record(self, record):
+        """写入单个文件的扫描记录"""
+        data = {'type': 'file'}
+        data.update(record)
+        self._write(data)
+
+    def write_summary(self, results):
+        """写入汇总记录，不包含按文件统计的字段"""
+        data = {'type': 'summary'}
+        data.update({key: value for key, value in results.items() if key not in PER_FILE_FIELDS})
+        self._write(data)
+
+    def close(self):
+        """关闭输出文件，标准输出不会被关闭"""
+        if self._owns_stream and self._stream is not None:
+            self._stream.close()
+        self._stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def write_jsonl(records, target):
+    """把扫描记录流写入JSON Lines文件
+
+    Args:
+        records: 扫描记录的可迭代对象，例如iter_scan()的输出
+        target: 输出文件路径，为'-'时写入标准输出
+
+    Returns:
+        int: 写入的记录数
+    """
+    with JsonLinesWriter(target) as writer:
+        for record in records:
+            writer.write_record(record)
+        return writer.records_written
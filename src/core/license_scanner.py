@@ -9,7 +9,7 @@
 import re
 import os
 import json
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 class LicenseScanner:
@@ -104,46 +104,61 @@ class LicenseScanner:
                 'low': ['MIT', 'Apache-2.0']
             }
     
-    def scan_file(self, file_path: str) -> List[str]:
-        """扫描单个文件中的开源协议
+    def detect_licenses(self, content: str) -> List[str]:
+        """检测文本内容中的开源协议
         
         Args:
-            file_path: 文件路径
+            content: 文件内容
             
         Returns:
             找到的协议列表
         """
         detected_licenses = []
         
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                
-                # 只检查文件开头的几百行（通常注释在开头）
-                # 提取前1000个字符进行检查，提高性能
-                content_preview = content[:1000]
-                
-                for license_name, patterns in self.LICENSE_PATTERNS.items():
-                    for pattern in patterns:
-                        if pattern.search(content_preview):
-                            detected_licenses.append(license_name)
-                            break  # 一个协议只添加一次
+        # 只检查文件开头的几百行（通常注释在开头）
+        # 提取前1000个字符进行检查，提高性能
+        content_preview = content[:1000]
         
-        except Exception as e:
-            # 如果文件无法读取，忽略
-            pass
+        for license_name, patterns in self.LICENSE_PATTERNS.items():
+            for pattern in patterns:
+                if pattern.search(content_preview):
+                    detected_licenses.append(license_name)
+                    break  # 一个协议只添加一次
         
         return detected_licenses
     
-    def scan_directory(self, directory_path: str) -> Dict:
+    def scan_file(self, file_path: str, content: Optional[str] = None) -> List[str]:
+        """扫描单个文件中的开源协议
+        
+        Args:
+            file_path: 文件路径
+            content: 已读取的文件内容，为None时从文件读取
+            
+        Returns:
+            找到的协议列表
+        """
+        try:
+            if content is None:
+                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    # 只需要文件开头部分
+                    content = f.read(1000)
+            return self.detect_licenses(content)
+        except Exception as e:
+            # 如果文件无法读取，忽略
+            return []
+    
+    def scan_directory(self, directory_path: str, known_files: Optional[Dict[str, List[str]]] = None) -> Dict:
         """扫描目录下所有文件的开源协议
         
         Args:
             directory_path: 目录路径
+            known_files: 已在代码扫描中检测过的文件及其协议，这些文件不再重复读取
             
         Returns:
             扫描结果
         """
+        known_files = known_files or {}
+
         # 重置结果
         self.results = {
             'licenses_by_file': {},
@@ -161,27 +176,32 @@ class LicenseScanner:
                 
                 file_path = os.path.join(root, file)
                 
+                # 代码扫描时已检测过的文件直接使用已有结果
+                if file_path in known_files:
+                    licenses = known_files[file_path]
                 # 只处理文本文件
-                if self._is_text_file(file_path):
+                elif self._is_text_file(file_path):
                     licenses = self.scan_file(file_path)
+                else:
+                    licenses = []
+                
+                if licenses:
+                    # 保存文件的协议信息
+                    self.results['licenses_by_file'][file_path] = licenses
+                    
+                    # 更新协议统计
+                    for license_name in licenses:
+                        self.results['licenses_summary'][license_name] = \
+                            self.results['licenses_summary'].get(license_name, 0) + 1
+                    
+                    # 更新风险统计
+                    for license_name in licenses:
+                        risk_level = self._get_license_risk(license_name)
+                        self.results['risk_summary'][risk_level] += 1
                     
-                    if licenses:
-                        # 保存文件的协议信息
-                        self.results['licenses_by_file'][file_path] = licenses
-                        
-                        # 更新协议统计
-                        for license_name in licenses:
-                            self.results['licenses_summary'][license_name] = \
-                                self.results['licenses_summary'].get(license_name, 0) + 1
-                        
-                        # 更新风险统计
-                        for license_name in licenses:
-                            risk_level = self._get_license_risk(license_name)
-                            self.results['risk_summary'][risk_level] += 1
-                        
-                        # 检查是否包含高风险协议
-                        if any(license_name in self.RISK_LEVELS['high'] for license_name in licenses):
-                            self.results['high_risk_files'].append((file_path, licenses))
+                    # 检查是否包含高风险协议
+                    if any(license_name in self.RISK_LEVELS['high'] for license_name in licenses):
+                        self.results['high_risk_files'].append((file_path, licenses))
         
         return self.results
     
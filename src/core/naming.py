@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命名规范匹配
+各解析器创建时把命名规则的正则表达式编译为NamingMatcher保存在naming_patterns中，同一模式在当前进程中
+只编译一次并登记编号；检查名称时直接调用匹配器，并按(模式编号, 名称)缓存匹配结果。
+同一个名称（例如self、i、data、get_value）在一次扫描中会在成百上千个文件里出现，
+缓存由当前进程中的所有扫描线程和文件共用，命中时不再运行正则表达式。
+
+启用性能分析时，每次查询和未命中分别计入当前文件的naming_memo计时类别，
+由主进程汇总为命中率；进程模式下每个工作进程各有一份缓存，命中率按全部进程合计
+"""
+
+import re
+import logging
+import threading
+import functools
+
+from src.core import profiling
+
+logger = logging.getLogger(__name__)
+
+# 缓存的(模式编号, 名称)数量上限，每项约一百多字节
+NAMING_MEMO_SIZE = 65536
+
+# 当前进程中已编译的模式，下标为模式编号
+_patterns = []
+# 模式字符串 -> NamingMatcher
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+class NamingMatcher:
+    """一个已编译的命名规则"""
+
+    __slots__ = ('pattern', 'pattern_id', '_compiled')
+
+    def __init__(self, pattern, pattern_id, compiled):
+        self.pattern = pattern
+        self.pattern_id = pattern_id
+        self._compiled = compiled
+
+    def __repr__(self):
+        return f"NamingMatcher({self.pattern!r}, pattern_id={self.pattern_id})"
+
+    def matches(self, name):
+        """名称是否从开头匹配该规则，与re.match(pattern, name)的结果相同"""
+        if profiling.enabled:
+            profiling.count('naming_memo', 'lookups')
+        return _verdict(self.pattern_id, name)
+
+
+@functools.lru_cache(maxsize=NAMING_MEMO_SIZE)
+def _verdict(pattern_id, name):
+    """运行正则表达式，只在缓存未命中时调用"""
+    if profiling.enabled:
+        profiling.count('naming_memo', 'misses')
+    return _patterns[pattern_id].match(name) is not None
+
+
+def get_naming_matcher(pattern):
+    """获取模式对应的匹配器，首次使用时编译并登记编号
+
+    Args:
+        pattern: 正则表达式字符串
+
+    Returns:
+        NamingMatcher: 匹配器
+
+    Raises:
+        re.error: 正则表达式无效
+    """
+    matcher = _matchers.get(pattern)
+    if matcher is not None:
+        return matcher
+    compiled = re.compile(pattern)
+    with _matchers_lock:
+        matcher = _matchers.get(pattern)
+        if matcher is None:
+            matcher = NamingMatcher(pattern, len(_patterns), compiled)
+            _patterns.append(compiled)
+            _matchers[pattern] = matcher
+    return matcher
+
+
+def compile_naming_patterns(patterns):
+    """编译解析器的命名规则
+
+    Args:
+        patterns: 名称类别（例如'function'）-> 正则表达式字符串
+
+    Returns:
+        dict: 名称类别 -> NamingMatcher，无效的正则表达式被跳过，检查该类别的名称时报错
+    """
+    matchers = {}
+    for kind, pattern in patterns.items():
+        try:
+            matchers[kind] = get_naming_matcher(pattern)
+        except (re.error, TypeError) as e:
+            logger.warning(f"{kind}命名规则的正则表达式无效: {str(e)}")
+    return matchers
+
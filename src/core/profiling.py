@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+扫描性能分析
+记录每个文件各扫描阶段（读取、解码、许可证检测、解析）、解析器各方法（_extract_*、规则检查_check_*）
+和外部工具的耗时，计时随文件记录返回，由主进程汇总为每条规则、每种语言的总耗时、次数和p50/p95/p99。
+也可以同时收集cProfile数据，线程和工作进程各自记录，扫描结束后合并为一个文件。
+启用时间线追踪时，被抽样的文件同时记录各阶段和方法调用的开始、结束时间，随文件记录返回给tracing模块
+
+未启用时解析器方法不被替换，各计时点只检查一次模块级开关
+"""
+
+import os
+import glob
+import time
+import heapq
+import random
+import logging
+import threading
+import functools
+from contextlib import nullcontext
+
+from src.core.watchdog import STAGE_METHOD_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# 每个计时项保留的样本数上限，用于估计分位数
+RESERVOIR_SIZE = 1024
+
+# 扫描结果中记录的最慢文件数
+SLOW_FILES_LIMIT = 20
+
+# 单个文件最多记录的时间段数，超过的只计时不记录时间段
+MAX_FILE_SPANS = 2000
+
+# 是否在当前进程中收集计时
+enabled = False
+
+# 是否汇总每个文件的计时，只启用时间线追踪时为False
+_collect_timings = True
+# 记录时间段的文件比例，为None时不记录时间段
+_trace_sample_rate = None
+
+# 是否为每个扫描线程收集cProfile数据
+_collect_cprofile = False
+# 工作进程退出时写入cProfile数据的目录
+_cprofile_dir = None
+# 线程模式下各线程的cProfile实例
+_thread_profiles = []
+_thread_profiles_lock = threading.Lock()
+_local = threading.local()
+
+_null_section = nullcontext()
+
+
+def enable(cprofile_dir=None, collect_cprofile=False, collect_timings=True, trace_sample_rate=None):
+    """在当前进程中启用性能分析
+
+    Args:
+        cprofile_dir: 工作进程退出时写入cProfile数据的目录，只在工作进程中指定
+        collect_cprofile: 是否为每个扫描线程收集cProfile数据
+        collect_timings: 是否为每个文件汇总计时
+        trace_sample_rate: 记录时间线的文件比例，为None时不记录时间线
+    """
+    global enabled, _collect_cprofile, _cprofile_dir, _collect_timings, _trace_sample_rate
+    enabled = True
+    _collect_timings = collect_timings
+    _trace_sample_rate = trace_sample_rate
+    _collect_cprofile = collect_cprofile or cprofile_dir is not None
+    _cprofile_dir = cprofile_dir
+    if cprofile_dir is not None:
+        # 工作进程正常退出时写出本进程的cProfile数据
+        from multiprocessing import util
+        util.Finalize(None, _dump_process_profile, exitpriority=10)
+
+
+def disable():
+    """停用性能分析，返回各线程收集的cProfile实例"""
+    global enabled, _collect_cprofile, _collect_timings, _trace_sample_rate
+    enabled = False
+    _collect_cprofile = False
+    _collect_timings = True
+    _trace_sample_rate = None
+    with _thread_profiles_lock:
+        profiles = list(_thread_profiles)
+        _thread_profiles.clear()
+    return profiles
+
+
+def _get_thread_profile():
+    """获取当前线程的cProfile实例"""
+    profile = getattr(_local, 'cprofile', None)
+    if profile is None:
+        import cProfile
+        profile = _local.cprofile = cProfile.Profile()
+        with _thread_profiles_lock:
+            _thread_profiles.append(profile)
+    return profile
+
+
+def _dump_process_profile():
+    """把工作进程中所有线程的cProfile数据写入文件"""
+    with _thread_profiles_lock:
+        profiles = list(_thread_profiles)
+    if not profiles or _cprofile_dir is None:
+        return
+    try:
+        import pstats
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(os.path.join(_cprofile_dir, f"worker-{os.getpid()}.prof"))
+    except Exception as e:
+        logger.warning(f"写入cProfile数据失败: {str(e)}")
+
+
+def write_cprofile(output_path, profiles=(), worker_dir=None):
+    """合并各线程和工作进程的cProfile数据并写入文件
+
+    Args:
+        output_path: 输出文件路径，可以用pstats或snakeviz打开
+        profiles: 当前进程中各线程的cProfile实例
+        worker_dir: 工作进程写入cProfile数据的目录
+
+    Returns:
+        bool: 是否写入了数据
+    """
+    import pstats
+
+    sources = [profile for profile in profiles if profile.getstats()]
+    if worker_dir is not None:
+        sources.extend(sorted(glob.glob(os.path.join(worker_dir, '*.prof'))))
+    if not sources:
+        return False
+    stats = pstats.Stats(sources[0])
+    for source in sources[1:]:
+        stats.add(source)
+    stats.dump_stats(output_path)
+    return True
+
+
+class FileProfile:
+    """单个文件的计时，在扫描该文件的线程中使用"""
+
+    __slots__ = ('timings', 'spans', 'dropped_spans', '_start', '_end', '_stage', '_stage_start', '_cprofile')
+
+    def __init__(self, trace=False):
+        # 类别 -> 名称 -> [调用次数, 总耗时]
+        self.timings = {}
+        # 记录时间线时为(类别, 名称, 开始时间, 结束时间)的列表
+        self.spans = [] if trace else None
+        self.dropped_spans = 0
+        self._start = self._stage_start = time.perf_counter()
+        self._end = None
+        self._stage = None
+        self._cprofile = _get_thread_profile() if _collect_cprofile else None
+        if self._cprofile is not None:
+            try:
+                self._cprofile.enable()
+            except ValueError:
+                # 较新的Python版本中同一时间只能有一个线程启用cProfile
+                self._cprofile = None
+
+    def add(self, category, name, seconds):
+        entries = self.timings.get(category)
+        if entries is None:
+            entries = self.timings[category] = {}
+        entry = entries.get(name)
+        if entry is None:
+            entries[name] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def record(self, category, name, start, end):
+        """记录一次开始和结束时间已知的计时，记录时间线时同时保存为时间段"""
+        self.add(category, name, end - start)
+        spans = self.spans
+        if spans is not None:
+            if len(spans) < MAX_FILE_SPANS:
+                spans.append((category, name, start, end))
+            else:
+                self.dropped_spans += 1
+
+    def stage(self, name):
+        """结束上一个阶段的计时并开始新的阶段"""
+        now = time.perf_counter()
+        if self._stage is not None:
+            self.record('phases', self._stage, self._stage_start, now)
+        self._stage = name
+        self._stage_start = now
+
+    def finish(self):
+        """结束计时，返回可以随扫描记录传回主进程的字典"""
+        self.stage(None)
+        self._end = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        return self.timings
+
+    def trace(self):
+        """获取随扫描记录返回的时间线，未记录时间线时返回None"""
+        if self.spans is None:
+            return None
+        trace = {
+            'pid': os.getpid(),
+            'tid': threading.get_native_id(),
+            'thread': threading.current_thread().name,
+            'start': self._start,
+            'end': self._end if self._end is not None else time.perf_counter(),
+            'spans': self.spans
+        }
+        if self.dropped_spans:
+            trace['dropped_spans'] = self.dropped_spans
+        return trace
+
+
+def begin_file():
+    """开始记录当前线程正在扫描的文件，未启用或只记录时间线而该文件未被抽中时返回None"""
+    if not enabled:
+        return None
+    rate = _trace_sample_rate
+    trace = rate is not None and (rate >= 1.0 or random.random() < rate)
+    if not trace and not _collect_timings:
+        return None
+    profile = _local.current = FileProfile(trace)
+    return profile
+
+
+def end_file(profile):
+    """结束文件的计时，返回计时字典"""
+    _local.current = None
+    return profile.finish()
+
+
+def add_timing(category, name, seconds):
+    """把一次计时记入当前线程正在扫描的文件"""
+    profile = getattr(_local, 'current', None)
+    if profile is not None:
+        profile.add(category, name, seconds)
+
+
+def count(category, name):
+    """把一次只计次数的事件（例如缓存命中）记入当前线程正在扫描的文件"""
+    profile = getattr(_local, 'current', None)
+    if profile is not None:
+        profile.add(category, name, 0.0)
+
+
+def _record_timing(category, name, start, end):
+    """把一次已知开始和结束时间的计时记入当前线程正在扫描的文件"""
+    profile = getattr(_local, 'current', None)
+    if profile is not None:
+        profile.record(category, name, start, end)
+
+
+class _Section:
+    """记录一段代码耗时的上下文管理器"""
+
+    __slots__ = ('category', 'name', 'start')
+
+    def __init__(self, category, name):
+        self.category = category
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _record_timing(self.category, self.name, self.start, time.perf_counter())
+        return False
+
+
+def section(category, name):
+    """记录一段代码的耗时，例如外部工具调用，未启用时返回空的上下文管理器
+
+    Args:
+        category: 类别，例如'external_tools'
+        name: 名称，例如'pylint'
+    """
+    if not enabled:
+        return _null_section
+    return _Section(category, name)
+
+
+def _method_category(name):
+    """根据解析器方法名确定计时类别"""
+    if name.endswith('_installed') or name.startswith('_run_') or name.startswith('run_'):
+        # 检查外部工具是否安装的方法同样调用外部进程
+        return 'external_tools'
+    if name.startswith('_check_'):
+        return 'rules'
+    if name.startswith('_extract_'):
+        return 'extractors'
+    return 'parsers'
+
+
+def instrument_parser(parser):
+    """为解析器实例的解析、提取和规则检查方法计时，未启用时不做任何事
+
+    只替换实例上的属性，不修改解析器类。计时包含方法内部调用的其他方法的耗时
+    """
+    if not enabled:
+        return
+    class_name = type(parser).__name__
+    for name in dir(type(parser)):
+        if not STAGE_METHOD_PATTERN.match(name):
+            continue
+        method = getattr(parser, name, None)
+        if callable(method):
+            setattr(parser, name, _timed_method(_method_category(name), f"{class_name}.{name}", method))
+
+
+def _timed_method(category, name, method):
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _record_timing(category, name, start, time.perf_counter())
+    return wrapper
+
+
+class _Reservoir:
+    """一个计时项的统计：次数、总耗时、最大值和用于估计分位数的样本"""
+
+    __slots__ = ('files', 'calls', 'total', 'max', 'samples')
+
+    def __init__(self):
+        self.files = 0
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = []
+
+    def add(self, seconds, calls, rng):
+        self.files += 1
+        self.calls += calls
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(seconds)
+        else:
+            # 蓄水池抽样，样本数固定
+            index = rng.randrange(self.files)
+            if index < RESERVOIR_SIZE:
+                self.samples[index] = seconds
+
+    def summary(self):
+        samples = sorted(self.samples)
+        return {
+            'files': self.files,
+            'calls': self.calls,
+            'total': round(self.total, 6),
+            'mean': round(self.total / self.files, 6) if self.files else 0.0,
+            'p50': round(_percentile(samples, 50), 6),
+            'p95': round(_percentile(samples, 95), 6),
+            'p99': round(_percentile(samples, 99), 6),
+            'max': round(self.max, 6)
+        }
+
+
+def _percentile(samples, percent):
+    """最近秩法计算已排序样本的分位数"""
+    if not samples:
+        return 0.0
+    rank = max(1, -(-len(samples) * percent // 100))
+    return samples[int(rank) - 1]
+
+
+class ScanProfiler:
+    """在主进程中汇总各文件的计时，只在收集结果的线程中使用"""
+
+    def __init__(self, slow_files_limit=SLOW_FILES_LIMIT):
+        self.slow_files_limit = slow_files_limit
+        # 类别 -> 名称 -> _Reservoir
+        self.categories = {}
+        self.languages = {}
+        self._slow_files = []
+        self._sequence = 0
+        self._rng = random.Random(0)
+
+    def _reservoir(self, category, name):
+        entries = self.categories.setdefault(category, {})
+        reservoir = entries.get(name)
+        if reservoir is None:
+            reservoir = entries[name] = _Reservoir()
+        return reservoir
+
+    def add_file(self, file_path, language, duration, size, timings):
+        """记录一个文件的计时
+
+        Args:
+            file_path: 文件路径
+            language: 语言名称
+            duration: 文件的总扫描耗时（秒）
+            size: 文件大小
+            timings: 文件记录中的计时字典，类别 -> 名称 -> [调用次数, 总耗时]
+        """
+        if language:
+            reservoir = self.languages.get(language)
+            if reservoir is None:
+                reservoir = self.languages[language] = _Reservoir()
+            reservoir.add(duration, 1, self._rng)
+
+        for category, entries in (timings or {}).items():
+            for name, (calls, seconds) in entries.items():
+                self._reservoir(category, name).add(seconds, calls, self._rng)
+
+        # 只保留最慢的若干个文件
+        self._sequence += 1
+        item = (duration, self._sequence, file_path, language, size)
+        if len(self._slow_files) < self.slow_files_limit:
+            heapq.heappush(self._slow_files, item)
+        elif duration > self._slow_files[0][0]:
+            heapq.heapreplace(self._slow_files, item)
+
+    def add_timing(self, category, name, seconds):
+        """记录主进程中的一次计时，例如结果合并"""
+        self._reservoir(category, name).add(seconds, 1, self._rng)
+
+    def summary(self):
+        """获取汇总结果，写入扫描结果的profile字段"""
+        summary = {'enabled': True}
+        for category in ('phases', 'parsers', 'extractors', 'rules', 'external_tools'):
+            entries = self.categories.get(category, {})
+            summary[category] = {name: reservoir.summary() for name, reservoir in
+                                 sorted(entries.items(), key=lambda item: -item[1].total)}
+        summary['naming_memo'] = self._naming_memo_summary()
+        for category, entries in self.categories.items():
+            if category not in summary:
+                summary[category] = {name: reservoir.summary() for name, reservoir in entries.items()}
+        summary['languages'] = {language: reservoir.summary() for language, reservoir in
+                                sorted(self.languages.items(), key=lambda item: -item[1].total)}
+        summary['slow_files'] = [
+            {'file_path': file_path, 'language': language, 'seconds': round(duration, 6), 'size': size}
+            for duration, _, file_path, language, size in sorted(self._slow_files, reverse=True)
+        ]
+        return summary
+
+    def _naming_memo_summary(self):
+        """命名规则匹配缓存的查询次数和命中率"""
+        entries = self.categories.get('naming_memo', {})
+        lookups = entries['lookups'].calls if 'lookups' in entries else 0
+        misses = entries['misses'].calls if 'misses' in entries else 0
+        hits = max(lookups - misses, 0)
+        return {
+            'lookups': lookups,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0
+        }
@@ -7,6 +7,8 @@ import json
 import csv
 import datetime
 from .config_manager import ConfigManager
+from . import tracing
+from .violations import filter_by_severity
 # 延迟导入WeasyPrint，避免启动时加载GTK3/GObject依赖
 # WeasyPrint仅在生成PDF报告时需要
 HTML = None
@@ -40,25 +42,27 @@ class ReportGenerator:
             
     def generate_report(self, file_path, format='txt', include_summary=True, include_details=True):
         """生成报告并保存到指定路径"""
-        try:
-            # 根据格式生成报告
-            if format.lower() == 'json':
-                return self._generate_json_report(file_path, include_summary, include_details)
-            elif format.lower() == 'csv':
-                return self._generate_csv_report(file_path, include_summary, include_details)
-            elif format.lower() == 'html':
-                return self._generate_html_report(file_path, include_summary, include_details)
-            elif format.lower() == 'pdf':
-                # 直接生成PDF格式报告，不再创建HTML备份
-                try:
-                    return self._generate_pdf_report(file_path, include_summary, include_details)
-                except Exception as pdf_error:
-                    # 如果PDF生成失败，直接抛出异常
-                    raise Exception(f"PDF生成失败: {str(pdf_error)}")
-            else:
-                return self._generate_text_report(file_path, include_summary, include_details)
-        except Exception as e:
-            raise Exception(f"生成报告失败: {str(e)}")
+        # 启用时间线追踪时记录报告生成的耗时
+        with tracing.span('report', format.lower(), {'path': file_path}):
+            try:
+                # 根据格式生成报告
+                if format.lower() == 'json':
+                    return self._generate_json_report(file_path, include_summary, include_details)
+                elif format.lower() == 'csv':
+                    return self._generate_csv_report(file_path, include_summary, include_details)
+                elif format.lower() == 'html':
+                    return self._generate_html_report(file_path, include_summary, include_details)
+                elif format.lower() == 'pdf':
+                    # 直接生成PDF格式报告，不再创建HTML备份
+                    try:
+                        return self._generate_pdf_report(file_path, include_summary, include_details)
+                    except Exception as pdf_error:
+                        # 如果PDF生成失败，直接抛出异常
+                        raise Exception(f"PDF生成失败: {str(pdf_error)}")
+                else:
+                    return self._generate_text_report(file_path, include_summary, include_details)
+            except Exception as e:
+                raise Exception(f"生成报告失败: {str(e)}")
     
     def _save_text_report(self):
         """保存文本格式的报告"""
@@ -119,7 +123,7 @@ class ReportGenerator:
                         for file_path, violations in details.items():
                             high_violations_found = False
                             file_high_violations = []
-                            for violation in violations:
+                            for violation in filter_by_severity(violations, 'high'):
                                 # 检查是否是特殊消息
                                 description = violation.get('description', '').lower()
                                 rule_name = violation.get('rule_name', '').lower()
@@ -127,10 +131,9 @@ class ReportGenerator:
                                    'done processing' in rule_name or 'total errors found' in rule_name:
                                     continue
                                 
-                                if violation.get('severity', 'medium') == 'high':
-                                    has_high_violations = True
-                                    high_violations_found = True
-                                    file_high_violations.append(violation)
+                                has_high_violations = True
+                                high_violations_found = True
+                                file_high_violations.append(violation)
                             # 只输出有高风险违规的文件
                             if high_violations_found:
                                 f.write(f'\n文件: {file_path}\n')
@@ -181,10 +184,10 @@ class ReportGenerator:
             if include_details and 'details' in self.results:
                 # 只包含高风险的违规信息
                 filtered_details = {}
-                for file_path, violations in self.results['details'].items():
-                    high_violations = [v for v in violations if v.get('severity', 'medium') == 'high']
+                for scanned_path, violations in self.results['details'].items():
+                    high_violations = list(filter_by_severity(violations, 'high'))
                     if high_violations:
-                        filtered_details[file_path] = high_violations
+                        filtered_details[scanned_path] = high_violations
                 report_data['details'] = filtered_details
             
             with open(file_path, 'w', encoding='utf-8') as f:
@@ -250,16 +253,15 @@ class ReportGenerator:
                     if details:
                         has_high_violations = False
                         for file_path, violations in details.items():
-                            for violation in violations:
-                                if violation.get('severity', 'medium') == 'high':
-                                    has_high_violations = True
-                                    writer.writerow([
-                                        file_path,
-                                        violation.get('rule_name', 'Unknown'),
-                                        violation.get('description', ''),
-                                        violation.get('line_number', ''),
-                                        violation.get('severity', 'medium')
-                                    ])
+                            for violation in filter_by_severity(violations, 'high'):
+                                has_high_violations = True
+                                writer.writerow([
+                                    file_path,
+                                    violation.get('rule_name', 'Unknown'),
+                                    violation.get('description', ''),
+                                    violation.get('line_number', ''),
+                                    violation.get('severity', 'medium')
+                                ])
                         # 如果没有高风险违规，显示相应提示
                         if not has_high_violations:
                             writer.writerow(['未发现高风险违规项', '', '', '', ''])
@@ -516,7 +518,8 @@ class ReportGenerator:
             if details:
                 has_high_violations = False
                 for file_path, violations in details.items():
-                    for violation in violations:
+                    # 只添加高风险的违规项
+                    for violation in filter_by_severity(violations, 'high'):
                         # 检查是否是特殊消息
                         description = violation.get('description', '').lower()
                         rule_name = violation.get('rule_name', '').lower()
@@ -525,10 +528,8 @@ class ReportGenerator:
                             continue
                         
                         severity = violation.get('severity', 'medium')
-                        # 只添加高风险的违规项
-                        if severity == 'high':
-                            has_high_violations = True
-                            html += f"            <tr class='{severity}'><td>{file_path}</td><td>{violation.get('rule_name', 'Unknown')}</td><td>{violation.get('description', '')}</td><td>{violation.get('line_number', '')}</td><td>{severity}</td></tr>\n"
+                        has_high_violations = True
+                        html += f"            <tr class='{severity}'><td>{file_path}</td><td>{violation.get('rule_name', 'Unknown')}</td><td>{violation.get('description', '')}</td><td>{violation.get('line_number', '')}</td><td>{severity}</td></tr>\n"
                 # 如果没有高风险违规，显示相应提示
                 if not has_high_violations:
                     html += "            <tr><td colspan='5'>未发现高风险违规项</td></tr>\n"
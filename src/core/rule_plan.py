@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+规则计划
+每种语言在一次扫描中实际使用的规则在扫描开始时解析一次，之后以只读形式在所有文件间共用
+"""
+
+import logging
+from types import MappingProxyType
+from src.rules import rule_manager
+
+logger = logging.getLogger(__name__)
+
+
+class RulePlan:
+    """某种语言在一次扫描中使用的已解析规则，创建后不可修改"""
+
+    __slots__ = ('language', 'ruleset', 'rules')
+
+    def __init__(self, language, ruleset, rules):
+        object.__setattr__(self, 'language', language)
+        object.__setattr__(self, 'ruleset', ruleset)
+        object.__setattr__(self, 'rules', MappingProxyType(dict(rules or {})))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RulePlan是只读对象")
+
+    def __reduce__(self):
+        # MappingProxyType无法序列化，传给子进程时按普通字典重建
+        return (RulePlan, (self.language, self.ruleset, dict(self.rules)))
+
+    def __repr__(self):
+        return f"RulePlan(language={self.language!r}, ruleset={self.ruleset!r}, rules={len(self.rules)})"
+
+    def to_dict(self):
+        """返回规则的普通字典副本"""
+        return dict(self.rules)
+
+
+def resolve_language_rules(ruleset, rules, language):
+    """解析某种语言实际使用的规则
+
+    依次尝试规则管理器、已加载的规则集和相关语言的回退规则，
+    都没有时根据规则集特点生成默认规则
+
+    Args:
+        ruleset: 规则集名称
+        rules: 已加载的完整规则集
+        language: 语言名称，例如 'Python'
+
+    Returns:
+        dict: 该语言的规则
+    """
+    language_key = language.lower()
+
+    # 优先使用规则管理器提供的语言特定规则
+    language_rules = rule_manager.get_rules_for_language(ruleset, language_key)
+
+    # 如果规则管理器没有返回规则，尝试从我们加载的规则集中获取
+    if not language_rules:
+        language_rules = rules.get(language_key, {})
+
+    # 为所有语言提供智能回退机制
+    if not language_rules:
+        # 特殊处理：C语言回退到C++规则
+        if language_key == 'c':
+            language_rules = rule_manager.get_rules_for_language(ruleset, 'cpp') or rules.get('cpp', {})
+            if language_rules:
+                logger.debug(f"未找到C语言专用规则，使用C++规则作为回退")
+        # 特殊处理：TypeScript回退到JavaScript规则
+        elif language_key == 'typescript':
+            language_rules = rule_manager.get_rules_for_language(ruleset, 'javascript') or rules.get('javascript', {})
+            if language_rules:
+                logger.debug(f"未找到TypeScript专用规则，使用JavaScript规则作为回退")
+        # 为所有其他语言提供默认规则
+        else:
+            # 尝试使用其他可能相关的规则集
+            fallback_mapping = {
+                'php': ['php', 'javascript'],
+                'go': ['go', 'cpp'],
+                'java': ['java', 'cpp']
+            }
+
+            # 检查是否有特定的回退映射
+            if language_key in fallback_mapping:
+                for fallback_lang in fallback_mapping[language_key]:
+                    language_rules = rule_manager.get_rules_for_language(ruleset, fallback_lang) or rules.get(fallback_lang, {})
+                    if language_rules:
+                        logger.debug(f"未找到{language}语言专用规则，使用{fallback_lang}规则作为回退")
+                        break
+
+            # 如果没有找到相关规则，创建基于所选规则集的默认规则
+            if not language_rules:
+                # 根据规则集特点设置默认规则
+                if ruleset == 'PEP8':
+                    # PEP8规则集默认值
+                    default_indent = 4
+                    default_line_length = 120
+                elif ruleset in ['Airbnb', 'Standard']:
+                    # JavaScript相关规则集默认值
+                    default_indent = 2
+                    default_line_length = 120
+                elif ruleset == 'Google':
+                    # Google规则集默认值
+                    default_indent = 4
+                    default_line_length = 120
+                else:
+                    # 通用默认值
+                    default_indent = 4
+                    default_line_length = 120
+
+                # 根据语言调整缩进
+                if language_key in ['javascript', 'typescript']:
+                    default_indent = 2
+
+                language_rules = {
+                    'max_line_length': default_line_length,
+                    'expected_indent': default_indent
+                }
+                logger.debug(f"为{language}语言创建了基于{ruleset}规则集的默认规则")
+
+    return language_rules
+
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+增量扫描缓存
+以文件内容哈希、语言规则、解析器代码和外部工具版本为键，
+在磁盘上保存单个文件的扫描记录，未变化的文件可以直接复用上次的结果
+"""
+
+import os
+import json
+import time
+import glob
+import sqlite3
+import hashlib
+import logging
+import threading
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本，记录结构变化时递增，使旧缓存全部失效
+CACHE_FORMAT_VERSION = '2'
+
+# 默认缓存目录和大小上限
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.codeauditx', 'cache')
+DEFAULT_CACHE_MAX_SIZE = 256 * 1024 * 1024  # 256MB
+
+# 缓存数据库文件名
+CACHE_DB_NAME = 'scan_cache.sqlite3'
+
+# 累积多少次写入后提交一次事务
+COMMIT_INTERVAL = 500
+
+# 各语言解析器会调用的外部工具，工具版本变化时缓存需要失效
+EXTERNAL_TOOL_COMMANDS = {
+    'JavaScript': [['node', '--version'], ['eslint', '--version']],
+    'TypeScript': [['node', '--version'], ['eslint', '--version']],
+    'C': [['cpplint', '--version']],
+    'C++': [['cpplint', '--version']],
+    'Go': [['go', 'version']],
+    'Java': [['java', '--version'], ['checkstyle', '-version']],
+    'PHP': [['php', '--version'], ['phpcs', '--version']]
+}
+
+_tool_versions = {}
+_tool_versions_lock = threading.Lock()
+_code_fingerprint = None
+
+
+def get_tool_versions(language):
+    """获取某种语言依赖的外部工具版本，结果在进程内缓存
+
+    Args:
+        language: 语言名称
+
+    Returns:
+        str: 工具版本描述，未安装的工具记为missing
+    """
+    with _tool_versions_lock:
+        if language in _tool_versions:
+            return _tool_versions[language]
+
+        versions = []
+        for command in EXTERNAL_TOOL_COMMANDS.get(language, []):
+            try:
+                result = subprocess.run(command, capture_output=True, text=True, timeout=10)
+                output = (result.stdout or result.stderr).strip().split('\n')[0]
+                versions.append(f"{command[0]}={output}")
+            except Exception:
+                versions.append(f"{command[0]}=missing")
+
+        _tool_versions[language] = ';'.join(versions)
+        return _tool_versions[language]
+
+
+def get_code_fingerprint():
+    """计算解析器和结果格式化代码的指纹，代码变化后缓存自动失效
+
+    打包后的应用无法读取源码时退回到缓存格式版本号
+    """
+    global _code_fingerprint
+    if _code_fingerprint is not None:
+        return _code_fingerprint
+
+    digest = hashlib.sha256(CACHE_FORMAT_VERSION.encode('utf-8'))
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    source_files = sorted(glob.glob(os.path.join(src_dir, 'parsers', '*.py')))
+    source_files.append(os.path.join(src_dir, 'core', 'engine.py'))
+    # 严重性分类表和各规则集的严重性覆盖决定缓存记录中的严重性
+    source_files.append(os.path.join(src_dir, 'core', 'severity.py'))
+    # 命名规则的匹配结果由naming.py给出
+    source_files.append(os.path.join(src_dir, 'core', 'naming.py'))
+    # 缓存记录中的行数由file_loader.py解码后统计，许可证由license_scanner.py按规则文件检测
+    source_files.append(os.path.join(src_dir, 'core', 'file_loader.py'))
+    source_files.append(os.path.join(src_dir, 'core', 'license_scanner.py'))
+    source_files.append(os.path.join(src_dir, 'core', 'config', 'license_rules.json'))
+    source_files.append(os.path.join(src_dir, 'rules', 'rulesets.py'))
+    for source_file in source_files:
+        try:
+            with open(source_file, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            pass
+
+    _code_fingerprint = digest.hexdigest()
+    return _code_fingerprint
+
+
+def make_fingerprint(ruleset, language, language_rules):
+    """计算某种语言的扫描配置指纹
+
+    Args:
+        ruleset: 规则集名称
+        language: 语言名称
+        language_rules: 该语言实际使用的规则
+
+    Returns:
+        str: 指纹字符串
+    """
+    digest = hashlib.sha256()
+    digest.update(get_code_fingerprint().encode('utf-8'))
+    digest.update(f"\0{ruleset}\0{language}\0".encode('utf-8'))
+    digest.update(json.dumps(language_rules, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(get_tool_versions(language).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def make_cache_key(fingerprint, file_path, content_hash):
+    """根据扫描配置指纹、文件扩展名和文件内容哈希计算缓存键"""
+    _, ext = os.path.splitext(file_path)
+    key = f"{content_hash}\0{fingerprint}\0{ext.lower()}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class ScanCache:
+    """基于SQLite的扫描结果缓存
+
+    读操作可以在多个线程或进程中并发执行，每个线程使用独立的数据库连接；
+    写操作只应在汇总结果的线程中执行
+    """
+
+    def __init__(self, cache_dir=None, max_size=None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_size = max_size or DEFAULT_CACHE_MAX_SIZE
+        self.db_path = os.path.join(self.cache_dir, CACHE_DB_NAME)
+        self._local = threading.local()
+        self._pending_writes = 0
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'bytes_saved': 0,
+            'evictions': 0
+        }
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        connection = self._get_connection()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, '
+            'record TEXT NOT NULL, '
+            'size INTEGER NOT NULL, '
+            'last_access REAL NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)')
+        connection.commit()
+
+    def _get_connection(self):
+        """获取当前线程的数据库连接"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            # WAL模式下读操作不会被写操作阻塞
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        """读取缓存记录，未命中时返回None"""
+        try:
+            row = self._get_connection().execute(
+                'SELECT record FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            return json.loads(row[0])
+        except Exception as e:
+            logger.warning(f"读取扫描缓存失败: {str(e)}")
+            return None
+
+    def put(self, key, record):
+        """写入缓存记录"""
+        try:
+            data = json.dumps(record, ensure_ascii=False)
+            self._get_connection().execute(
+                'INSERT OR REPLACE INTO entries (key, record, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, data, len(data.encode('utf-8')), time.time())
+            )
+            self._maybe_commit()
+        except Exception as e:
+            logger.warning(f"写入扫描缓存失败: {str(e)}")
+
+    def touch(self, key):
+        """更新缓存记录的最近访问时间"""
+        try:
+            self._get_connection().execute(
+                'UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key)
+            )
+            self._maybe_commit()
+        except Exception as e:
+            logger.warning(f"更新扫描缓存访问时间失败: {str(e)}")
+
+    def record_hit(self, bytes_saved):
+        """记录一次缓存命中"""
+        self.stats['hits'] += 1
+        self.stats['bytes_saved'] += bytes_saved
+
+    def record_miss(self):
+        """记录一次缓存未命中"""
+        self.stats['misses'] += 1
+
+    def _maybe_commit(self):
+        """累积一定数量的写入后提交事务"""
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_INTERVAL:
+            self._get_connection().commit()
+            self._pending_writes = 0
+
+    def flush(self):
+        """提交未完成的写入，并按最近最少使用原则淘汰超出大小上限的记录"""
+        try:
+            connection = self._get_connection()
+            connection.commit()
+            self._pending_writes = 0
+
+            total_size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total_size <= self.max_size:
+                return
+
+            evicted_keys = []
+            for key, size in connection.execute('SELECT key, size FROM entries ORDER BY last_access'):
+                if total_size <= self.max_size:
+                    break
+                evicted_keys.append((key,))
+                total_size -= size
+
+            connection.executemany('DELETE FROM entries WHERE key = ?', evicted_keys)
+            connection.commit()
+            self.stats['evictions'] += len(evicted_keys)
+            logger.info(f"扫描缓存超出大小上限，已淘汰 {len(evicted_keys)} 条记录")
+        except Exception as e:
+            logger.warning(f"整理扫描缓存失败: {str(e)}")
+
+    def get_summary(self):
+        """获取缓存统计信息，用于写入扫描结果"""
+        summary = dict(self.stats)
+        try:
+            entries, size = self._get_connection().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+            summary['entries'] = entries
+            summary['size_bytes'] = size
+        except Exception:
+            summary['entries'] = 0
+            summary['size_bytes'] = 0
+        summary['max_size'] = self.max_size
+        return summary
+
+    def close(self):
+        """关闭当前线程的数据库连接"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def clear(self):
+        """清空缓存"""
+        connection = self._get_connection()
+        connection.execute('DELETE FROM entries')
+        connection.commit()
@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os
-import time
+"""
+代码扫描器的Qt适配层
+扫描逻辑位于src.core.engine.ScanEngine，这里只负责把引擎回调转换为Qt信号
+"""
+
 import logging
-import concurrent.futures
-import psutil
-from PyQt5.QtCore import QObject, pyqtSignal, QThreadPool, QRunnable, pyqtSlot
-from src.parsers import get_parser_for_file
-from src.rules import rule_manager
+from PyQt5.QtCore import QObject, pyqtSignal
+from src.core.engine import ScanEngine
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -18,503 +18,86 @@ class CodeScanner(QObject):
     # 定义信号
     progress_updated = pyqtSignal(int)
     scan_completed = pyqtSignal(dict)
+    file_scanned = pyqtSignal(dict)
     scan_failed = pyqtSignal(str)
     log_updated = pyqtSignal(str)
-    
+
     def __init__(self, project_path, ruleset):
         super().__init__()
-        self.project_path = project_path
-        self.ruleset = ruleset
-        self.is_scanning = False
-        self.is_paused = False
-        self.results = {
-            'total_files': 0,
-            'scanned_files': 0,
-            'skipped_files': 0,
-            'languages': {},
-            'violations': {},
-            'violations_by_file': {},  # 按文件统计的违规数
-            'violations_by_severity': {},  # 按严重性统计的违规数
-            'details': {},  # 详细违规信息
-            'scan_time': 0,
-            'total_lines': 0,  # 总代码行数
-            'lines_by_file': {}  # 各文件的代码行数
-        }
-        self.last_scan_info = {
-            'current_file': None,
-            'progress': 0,
-            'scanned_files': 0,
-            'results': {}
-        }
-        # 支持的文件类型映射到语言
-        self.file_extensions = {
-            '.c': 'C',
-            '.cpp': 'C++',
-            '.cc': 'C++',
-            '.h': 'C',
-            '.hpp': 'C++',
-            '.php': 'PHP',
-            '.py': 'Python',
-            '.js': 'JavaScript',
-            '.jsx': 'JavaScript',
-            '.ts': 'TypeScript',
-            '.tsx': 'TypeScript',
-            '.go': 'Go',
-            '.java': 'Java'
-        }
-        
-        # 获取规则管理器中的规则
-        try:
-            # 加载完整规则集
-            self.rules = rule_manager.get_rules_for_ruleset(ruleset)
-            
-            # 记录加载的规则集和它支持的语言
-            self.log_updated.emit(f"已加载规则集: {ruleset}")
-            supported_languages = [lang for lang in self.rules.keys() if lang != 'global']
-            self.log_updated.emit(f"规则集支持的语言: {', '.join(supported_languages) if supported_languages else '无特定语言规则'}")
-            
-            # 验证规则是否成功加载
-            if self.rules is None or not isinstance(self.rules, dict):
-                logger.warning(f"规则集 '{ruleset}' 未加载成功或格式错误，使用默认规则集")
-                # 创建一个基本的默认规则集
-                self.rules = {
-                    'python': {'max_line_length': 120, 'expected_indent': 4},
-                    'javascript': {'max_line_length': 120, 'expected_indent': 2},
-                    'cpp': {'max_line_length': 120, 'expected_indent': 4}
-                }
-            
-            # 计算规则数量，处理不同类型的值
-            rule_count = 0
-            for rules in self.rules.values():
-                if isinstance(rules, dict):
-                    rule_count += len(rules)
-                elif isinstance(rules, list):
-                    rule_count += len(rules)
-            
-            self.log_updated.emit(f"共加载 {rule_count} 条规则")
-        except Exception as e:
-            logger.error(f"加载规则集时出错: {str(e)}")
-            self.log_updated.emit(f"警告: 加载规则集时出错 - {str(e)}")
-            # 创建应急规则集
-            self.rules = {
-                'python': {'max_line_length': 120, 'expected_indent': 4},
-                'javascript': {'max_line_length': 120, 'expected_indent': 2},
-                'cpp': {'max_line_length': 120, 'expected_indent': 4}
-            }
-            self.log_updated.emit("使用默认应急规则集继续扫描")
-    
-    def _get_optimal_thread_count(self, file_count):
-        """
-        根据系统性能和文件数量自动调整线程数
-        
-        Args:
-            file_count: 需要扫描的文件数量
-            
-        Returns:
-            int: 最优线程数
-        """
-        try:
-            # 获取CPU核心数
-            cpu_count = os.cpu_count() or 4
-            
-            # 获取当前系统负载（取过去1分钟的平均负载）
-            cpu_load = psutil.cpu_percent(interval=0.1, percpu=False) / 100.0
-            
-            # 获取可用内存百分比
-            mem_available = psutil.virtual_memory().available
-            mem_total = psutil.virtual_memory().total
-            mem_usage = (mem_total - mem_available) / mem_total
-            
-            # 基础线程数 = CPU核心数
-            base_threads = cpu_count
-            
-            # 根据系统负载调整
-            # 如果CPU负载高，减少线程数；如果CPU负载低，增加线程数
-            load_factor = max(0.5, 1.0 - cpu_load)
-            
-            # 根据内存使用调整
-            # 如果内存使用率高，减少线程数
-            mem_factor = max(0.7, 1.0 - mem_usage)
-            
-            # 综合因素计算线程数
-            adjusted_threads = int(base_threads * load_factor * mem_factor * 2)
-            
-            # 根据文件数量调整
-            # 对于少量文件，减少线程数
-            if file_count < adjusted_threads:
-                adjusted_threads = max(2, file_count)
-            
-            # 设置上限和下限
-            min_threads = 2
-            max_threads = min(cpu_count * 4, 32)  # 最多使用CPU核心数的4倍或32个线程
-            
-            optimal_threads = max(min_threads, min(adjusted_threads, max_threads))
-            
-            # 记录调试信息
-            logger.info(f"线程数调整: CPU核心={cpu_count}, 系统负载={cpu_load:.2f}, "
-                       f"内存使用率={mem_usage:.2f}, 文件数={file_count}, "
-                       f"调整后线程数={optimal_threads}")
-            
-            return optimal_threads
-        except Exception as e:
-            # 如果出现任何错误，使用默认值
-            logger.error(f"自动调整线程数失败: {str(e)}")
-            return max(2, os.cpu_count() or 4)
-    
-    def start(self, max_workers=None):
-        """开始扫描"""
-        self.is_scanning = True
-        start_time = time.time()
-        
+        # 信号发射通过lambda延迟绑定，保证引擎初始化期间的日志也能转发
+        self.engine = ScanEngine(
+            project_path,
+            ruleset,
+            progress_callback=lambda progress: self.progress_updated.emit(progress),
+            log_callback=lambda message: self.log_updated.emit(message)
+        )
+
+    @property
+    def project_path(self):
+        return self.engine.project_path
+
+    @property
+    def ruleset(self):
+        return self.engine.ruleset
+
+    @property
+    def rules(self):
+        return self.engine.rules
+
+    @property
+    def results(self):
+        return self.engine.results
+
+    @property
+    def last_scan_info(self):
+        return self.engine.last_scan_info
+
+    @property
+    def file_extensions(self):
+        return self.engine.file_extensions
+
+    @property
+    def is_scanning(self):
+        return self.engine.is_scanning
+
+    @property
+    def is_paused(self):
+        return self.engine.is_paused
+
+    def start(self, max_workers=None, mode=None):
+        """开始扫描，max_workers为None时根据系统性能自动调整，mode为None时根据仓库大小选择线程或进程模式"""
         try:
-            # 获取所有文件
-            all_files = self._get_all_files()
-            self.results['total_files'] = len(all_files)
-            self.log_updated.emit(f"发现 {len(all_files)} 个文件待扫描")
-            
-            if max_workers is None:
-                # 根据系统性能自动调整线程数
-                max_workers = self._get_optimal_thread_count(len(all_files))
-                self.log_updated.emit(f"根据系统性能自动调整为 {max_workers} 个线程进行并行扫描")
-            
-            # 使用concurrent.futures线程池并行扫描文件
-            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # 提交所有扫描任务
-                future_to_file = {executor.submit(self._scan_file, file_path): file_path for file_path in all_files}
-                
-                # 获取任务结果并更新进度
-                for i, future in enumerate(concurrent.futures.as_completed(future_to_file)):
-                    if not self.is_scanning:  # 检查是否需要停止
-                        executor.shutdown(wait=False)
-                        self.log_updated.emit("扫描已取消")
-                        break
-                    
-                    file_path = future_to_file[future]
-                    try:
-                        future.result()  # 获取结果，以便捕获异常
-                        self.results['scanned_files'] += 1
-                    except Exception as e:
-                        self.results['skipped_files'] += 1
-                        self.log_updated.emit(f"跳过文件: {os.path.basename(file_path)} - {str(e)}")
-                    
-                    # 更新进度
-                    progress = int((i + 1) / len(all_files) * 100)
-                    self.progress_updated.emit(progress)
-                    
-                    # 每扫描10个文件更新一次日志
-                    if (i + 1) % 10 == 0 or i + 1 == len(all_files):
-                        self.log_updated.emit(f"已扫描 {i + 1}/{len(all_files)} 个文件")
-            
-            # 计算扫描时间
-            self.results['scan_time'] = time.time() - start_time
-            
-            # 发送完成信号
-            self.scan_completed.emit(self.results)
+            # 每个文件扫描完成后立即发出记录，扫描结束后再发出汇总结果
+            for record in self.engine.iter_scan(max_workers=max_workers, mode=mode):
+                self.file_scanned.emit(record)
+            self.scan_completed.emit(self.engine.results)
         except Exception as e:
+            self.engine.is_scanning = False
+            logger.error(f"扫描失败: {str(e)}")
             self.scan_failed.emit(str(e))
-    
+
+    def snapshot(self):
+        """获取扫描结果的只读快照，供进度界面在任意线程中读取"""
+        return self.engine.snapshot()
+
     def stop(self):
         """停止扫描"""
-        self.is_scanning = False
-    
+        self.engine.stop()
+
     def pause_scan(self):
         """暂停扫描"""
-        if self.is_scanning and not self.is_paused:
-            self.is_paused = True
-            self.log_updated.emit("扫描已暂停")
-            return True
-        return False
-    
+        return self.engine.pause_scan()
+
     def resume_scan(self):
         """恢复扫描"""
-        if self.is_scanning and self.is_paused:
-            self.is_paused = False
-            self.log_updated.emit("扫描已恢复")
-            return True
-        return False
-    
-    def _get_all_files(self):
-        """获取项目中的所有文件"""
-        all_files = []
-        
-        # 忽略的目录和文件
-        ignored_dirs = {'.git', '__pycache__', 'node_modules', 'venv', 'env', '.idea', '.vscode', 'build', 'dist'}
-        ignored_files = {'.DS_Store'}
-        
-        # 使用集合快速查找
-        supported_extensions = set(self.file_extensions.keys())
-        
-        for root, dirs, files in os.walk(self.project_path):
-            # 跳过忽略的目录
-            dirs[:] = [d for d in dirs if d not in ignored_dirs]
-            
-            for file in files:
-                # 跳过忽略的文件
-                if file in ignored_files:
-                    continue
-                
-                # 过滤不支持的文件类型
-                _, ext = os.path.splitext(file)
-                ext = ext.lower()
-                if ext not in supported_extensions:
-                    continue
-                
-                file_path = os.path.join(root, file)
-                all_files.append(file_path)
-        
-        return all_files
-    
-    def _scan_file(self, file_path):
-        """扫描单个文件"""
-        # 检查是否处于暂停状态
-        while self.is_paused and self.is_scanning:
-            time.sleep(0.1)  # 暂停时每100ms检查一次状态
-            if not self.is_scanning:  # 如果扫描被终止，直接返回
-                return
-        
-        # 获取文件扩展名
-        _, ext = os.path.splitext(file_path)
-        ext = ext.lower()
-        
-        # 检查是否支持该文件类型
-        if ext not in self.file_extensions:
-            # 不是支持的文件类型，记录但不扫描
-            return
-        
-        # 获取语言名称
-        language = self.file_extensions[ext]
-        
-        # 更新语言统计
-        if language not in self.results['languages']:
-            self.results['languages'][language] = 0
-        self.results['languages'][language] += 1
-        
-        try:
-            # 获取该语言的规则
-            language_key = language.lower()
-            
-            # 优先使用规则管理器提供的语言特定规则
-            language_rules = rule_manager.get_rules_for_language(self.ruleset, language_key)
-            
-            # 如果规则管理器没有返回规则，尝试从我们加载的规则集中获取
-            if not language_rules:
-                language_rules = self.rules.get(language_key, {})
-                
-            # 为所有语言提供智能回退机制
-            if not language_rules:
-                # 特殊处理：C语言回退到C++规则
-                if language_key == 'c':
-                    language_rules = rule_manager.get_rules_for_language(self.ruleset, 'cpp') or self.rules.get('cpp', {})
-                    if language_rules:
-                        logger.debug(f"未找到C语言专用规则，使用C++规则作为回退")
-                # 特殊处理：TypeScript回退到JavaScript规则
-                elif language_key == 'typescript':
-                    language_rules = rule_manager.get_rules_for_language(self.ruleset, 'javascript') or self.rules.get('javascript', {})
-                    if language_rules:
-                        logger.debug(f"未找到TypeScript专用规则，使用JavaScript规则作为回退")
-                # 为所有其他语言提供默认规则
-                else:
-                    # 尝试使用其他可能相关的规则集
-                    fallback_mapping = {
-                        'php': ['php', 'javascript'],
-                        'go': ['go', 'cpp'],
-                        'java': ['java', 'cpp']
-                    }
-                    
-                    # 检查是否有特定的回退映射
-                    if language_key in fallback_mapping:
-                        for fallback_lang in fallback_mapping[language_key]:
-                            language_rules = rule_manager.get_rules_for_language(self.ruleset, fallback_lang) or self.rules.get(fallback_lang, {})
-                            if language_rules:
-                                logger.debug(f"未找到{language}语言专用规则，使用{fallback_lang}规则作为回退")
-                                break
-                    
-                    # 如果没有找到相关规则，创建基于所选规则集的默认规则
-                    if not language_rules:
-                        # 根据规则集特点设置默认规则
-                        if self.ruleset == 'PEP8':
-                            # PEP8规则集默认值
-                            default_indent = 4
-                            default_line_length = 120
-                        elif self.ruleset in ['Airbnb', 'Standard']:
-                            # JavaScript相关规则集默认值
-                            default_indent = 2
-                            default_line_length = 120
-                        elif self.ruleset == 'Google':
-                            # Google规则集默认值
-                            default_indent = 4
-                            default_line_length = 120
-                        else:
-                            # 通用默认值
-                            default_indent = 4
-                            default_line_length = 120
-                        
-                        # 根据语言调整缩进
-                        if language_key in ['javascript', 'typescript']:
-                            default_indent = 2
-                        
-                        language_rules = {
-                            'max_line_length': default_line_length,
-                            'expected_indent': default_indent
-                        }
-                        logger.debug(f"为{language}语言创建了基于{self.ruleset}规则集的默认规则")
-            
-            # 获取对应的解析器
-            parser = get_parser_for_file(file_path, self.ruleset)
-            if parser:
-                # 统计代码行数
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        lines = f.readlines()
-                        file_lines = len(lines)
-                        self.results['lines_by_file'][file_path] = file_lines
-                        self.results['total_lines'] += file_lines
-                except Exception as e:
-                    # 如果无法读取文件，记录为0行
-                    self.results['lines_by_file'][file_path] = 0
-                    logger.warning(f"无法读取文件行数: {file_path}, {str(e)}")
-                
-                # 应用规则到解析器
-                if language_rules:
-                    parser.set_rules(language_rules)
-                    logger.debug(f"已应用{len(language_rules)}条规则到{file_path}")
-                else:
-                    logger.warning(f"没有找到{language}语言的规则，使用解析器的默认规则")
-                
-                # 扫描文件
-                violations = parser.scan(file_path)
-                
-                # 验证违规结果
-                if not isinstance(violations, list):
-                    logger.error(f"扫描结果类型错误，应为列表: {type(violations)}")
-                    violations = []
-                
-                # 如果没有发现任何违规，添加一个测试违规用于验证功能
-                if len(violations) == 0:
-                    # 只在特定文件上添加测试违规，避免所有文件都显示相同的测试违规
-                    # 例如，只在第一个Python文件或每10个文件中的一个添加测试违规
-                    if (language == 'Python' and len(self.results['violations']) == 0) or \
-                       (self.results['scanned_files'] % 10 == 0):
-                        logger.info(f"未发现实际违规，添加测试违规以验证功能: {file_path}")
-                        violations.append({
-                            'type': '测试验证',
-                            'message': '此为测试违规，用于验证扫描功能正常工作',
-                            'line': 1
-                        })
-                
-                # 转换违规信息格式
-                formatted_violations = []
-                
-                # 严重性级别映射规则
-                severity_rules = {
-                    # 高严重性：可能导致安全问题、性能问题或功能问题的规则
-                    '高严重性关键词': ['错误', '漏洞', '安全', '性能', '功能', 'critical', 'Critical', 'error', 'Error'],
-                    # 中严重性：不符合最佳实践但不会立即导致严重问题的规则
-                    '中严重性关键词': ['规范', '风格', '命名', '缩进', '行长度', '格式', 'PEP8', 'warning', 'Warning'],
-                    # 低严重性：轻微的风格问题或建议性的改进
-                    '低严重性关键词': ['注释', '空白', '空行', '导入顺序', '可读性', '建议', 'info', 'Info']
-                }
-                
-                for violation in violations:
-                    # 提取违规信息，转换为统一格式
-                    # 确保即使解析器返回的结构不完整，也能有合理的默认值
-                    rule_name = violation.get('type', 'unknown')
-                    
-                    # 确保message字段不为空
-                    message = violation.get('message', '')
-                    if not message:
-                        # 如果没有message，使用type作为描述
-                        message = f'违反了{rule_name}规则'
-                    
-                    description = message
-                    line_number = violation.get('line', '')
-                    
-                    # 确保行号不为空且为有效数字
-                    if line_number == '' or line_number == -1:
-                        line_number = '未知'
-                    
-                    # 先检查是否有明确的严重性级别
-                    severity = violation.get('severity', None)
-                    
-                    # 如果没有明确的严重性级别，则根据规则类型和消息内容自动判断
-                    if severity is None:
-                        # 命名规范问题统一设为中等严重性
-                        if '命名' in description or '命名规范' in description:
-                            severity = 'medium'
-                        else:
-                            # 默认设置为medium
-                            severity = 'medium'
-                            
-                            # 组合规则名称和描述进行匹配
-                            full_text = (rule_name + ' ' + description).lower()
-                            
-                            # 检查低严重性关键词
-                            for keyword in severity_rules['低严重性关键词']:
-                                if keyword.lower() in full_text:
-                                    severity = 'low'
-                                    break
-                    
-                    # 确保命名规范违规不会被标记为高风险
-                    if '命名' in description or '命名规范' in description:
-                        severity = 'medium'
-                    
-                    # 创建格式化的违规对象
-                    formatted_violation = {
-                        'rule_name': rule_name,
-                        'description': description,
-                        'line_number': line_number,
-                        'severity': severity
-                    }
-                    formatted_violations.append(formatted_violation)
-                
-                # 过滤特殊消息
-                filtered_violations = []
-                for violation in formatted_violations:
-                    description = violation.get('description', '').lower()
-                    rule_name = violation.get('rule_name', '').lower()
-                    # 跳过特殊消息
-                    if 'done processing' not in description and 'total errors found' not in description and \
-                       'done processing' not in rule_name and 'total errors found' not in rule_name:
-                        filtered_violations.append(violation)
-                
-                # 更新违规统计
-                # 1. 按类型统计
-                for violation in filtered_violations:
-                    violation_type = violation.get('rule_name', 'unknown')
-                    if violation_type not in self.results['violations']:
-                        self.results['violations'][violation_type] = 0
-                    self.results['violations'][violation_type] += 1
-                
-                # 2. 按文件统计违规数
-                self.results['violations_by_file'][file_path] = len(filtered_violations)
-                
-                # 3. 按严重性统计
-                for violation in filtered_violations:
-                    severity = violation.get('severity', 'medium')
-                    if severity not in self.results['violations_by_severity']:
-                        self.results['violations_by_severity'][severity] = 0
-                    self.results['violations_by_severity'][severity] += 1
-                
-                # 4. 保存详细违规信息
-                if filtered_violations:
-                    self.results['details'][file_path] = filtered_violations
-            
-            # 保存当前扫描信息
-            self.last_scan_info['current_file'] = file_path
-            self.last_scan_info['progress'] = self.last_scan_info.get('progress', 0)
-            self.last_scan_info['scanned_files'] = self.results.get('scanned_files', 0)
-            self.last_scan_info['results'] = self.results.copy()
-        except Exception as e:
-            # 解析器执行失败，跳过该文件
-            raise Exception(f"解析错误: {str(e)}")
+        return self.engine.resume_scan()
 
-# 全局函数，用于从其他地方调用扫描器
 
-def scan_project(project_path, ruleset, progress_callback=None, 
+def scan_project(project_path, ruleset, progress_callback=None,
                  log_callback=None, completed_callback=None, failed_callback=None):
     """扫描项目的便捷函数"""
     scanner = CodeScanner(project_path, ruleset)
-    
+
     if progress_callback:
         scanner.progress_updated.connect(progress_callback)
     if log_callback:
@@ -523,8 +106,8 @@ def scan_project(project_path, ruleset, progress_callback=None,
         scanner.scan_completed.connect(completed_callback)
     if failed_callback:
         scanner.scan_failed.connect(failed_callback)
-    
+
     # 在当前线程中开始扫描
     scanner.start()
-    
-    return scanner
\ No newline at end of file
+
+    return scanner
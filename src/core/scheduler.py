@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按预计耗时调度文件
+根据文件大小、语言和本地保存的历史耗时估计每个文件的扫描耗时，预计耗时最长的文件最先提交
+（最长处理时间优先），避免最后才发现的大文件拖长整个扫描的结束时间。
+
+文件按需遍历，调度器在一个有限的预读窗口内排序：仓库文件数不超过窗口时是完整的最长优先顺序，
+更大的仓库在窗口内近似排序，文件查找结束后剩余的文件按完整顺序提交。
+历史耗时按项目保存在~/.codeauditx/stats中
+"""
+
+import os
+import json
+import heapq
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 历史数据格式版本
+STATS_FORMAT_VERSION = 1
+
+# 默认历史数据目录
+DEFAULT_STATS_DIR = os.path.join(os.path.expanduser('~'), '.codeauditx', 'stats')
+
+# 调度器预读并排序的文件数
+SCHEDULE_LOOKAHEAD = 10000
+
+# 每个项目最多保存的文件耗时记录数，超过时保留耗时最长的记录
+MAX_FILE_HISTORY = 100000
+
+# 每次保存时旧的语言统计数据的衰减系数，使模型逐渐适应解析器和规则的变化
+LANGUAGE_STATS_DECAY = 0.8
+
+# 文件大小变化不超过该比例时直接按历史耗时估计
+HISTORY_SIZE_TOLERANCE = 0.5
+
+# 没有历史数据时各语言的默认模型：(每个文件的固定耗时, 每字节耗时)，单位为秒
+# 调用外部工具的语言固定耗时较高
+DEFAULT_LANGUAGE_MODELS = {
+    'Python': (0.002, 2e-6),
+    'JavaScript': (0.05, 2e-6),
+    'TypeScript': (0.05, 2e-6),
+    'C': (0.02, 2e-6),
+    'C++': (0.02, 2e-6),
+    'Go': (0.05, 2e-6),
+    'Java': (0.05, 2e-6),
+    'PHP': (0.05, 2e-6)
+}
+DEFAULT_MODEL = (0.01, 2e-6)
+
+
+def default_stats_path(project_path, stats_dir=None):
+    """根据项目路径生成历史数据文件路径，每个项目一个文件"""
+    name = hashlib.sha1(os.path.abspath(project_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(stats_dir or DEFAULT_STATS_DIR, f"{name}.json")
+
+
+class CostModel:
+    """文件扫描耗时模型
+
+    每种语言按 耗时 = 固定耗时 + 每字节耗时 × 文件大小 做线性拟合，拟合用的累计量按次衰减；
+    单个文件有历史耗时且大小变化不大时优先使用历史耗时
+    """
+
+    def __init__(self, project_path, stats_path=None):
+        self.project_path = project_path
+        self.stats_path = stats_path or default_stats_path(project_path)
+        # 语言 -> [n, sum_x, sum_y, sum_xx, sum_xy]
+        self.language_stats = {}
+        # 相对路径 -> [文件大小, 耗时]
+        self.file_history = {}
+        self._models = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """读取历史数据，文件不存在或格式不对时使用默认模型"""
+        if not os.path.exists(self.stats_path):
+            return
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != STATS_FORMAT_VERSION:
+                return
+            self.language_stats = {language: list(values) for language, values in data.get('languages', {}).items()}
+            self.file_history = data.get('files', {})
+        except Exception as e:
+            logger.warning(f"读取扫描耗时历史失败: {str(e)}")
+            self.language_stats = {}
+            self.file_history = {}
+
+    def save(self):
+        """保存历史数据，先写临时文件再替换"""
+        if not self._dirty:
+            return
+        try:
+            if len(self.file_history) > MAX_FILE_HISTORY:
+                kept = heapq.nlargest(MAX_FILE_HISTORY, self.file_history.items(), key=lambda item: item[1][1])
+                self.file_history = dict(kept)
+
+            languages = {language: [value * LANGUAGE_STATS_DECAY for value in values]
+                         for language, values in self.language_stats.items()}
+            data = {'version': STATS_FORMAT_VERSION, 'languages': languages, 'files': self.file_history}
+
+            os.makedirs(os.path.dirname(self.stats_path), exist_ok=True)
+            temp_path = f"{self.stats_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, self.stats_path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"保存扫描耗时历史失败: {str(e)}")
+
+    def _relative_path(self, file_path):
+        return os.path.relpath(file_path, self.project_path).replace(os.sep, '/')
+
+    def _language_model(self, language):
+        """获取语言的线性模型(固定耗时, 每字节耗时)，样本不足时使用默认模型"""
+        model = self._models.get(language)
+        if model is not None:
+            return model
+
+        model = DEFAULT_LANGUAGE_MODELS.get(language, DEFAULT_MODEL)
+        stats = self.language_stats.get(language)
+        if stats and stats[0] >= 2:
+            n, sum_x, sum_y, sum_xx, sum_xy = stats
+            denominator = n * sum_xx - sum_x * sum_x
+            if denominator > 0:
+                per_byte = max(0.0, (n * sum_xy - sum_x * sum_y) / denominator)
+                overhead = max(0.0, (sum_y - per_byte * sum_x) / n)
+                model = (overhead, per_byte)
+            else:
+                # 所有样本大小相同时只能估计平均耗时
+                model = (sum_y / n, 0.0)
+        self._models[language] = model
+        return model
+
+    def predict(self, file_path, language, size):
+        """估计文件的扫描耗时
+
+        Returns:
+            tuple: (预计耗时, 是否使用了该文件的历史耗时)
+        """
+        history = self.file_history.get(self._relative_path(file_path))
+        if history:
+            history_size, duration = history
+            if history_size <= 0 or abs(size - history_size) <= history_size * HISTORY_SIZE_TOLERANCE:
+                if history_size > 0:
+                    duration = duration * size / history_size
+                return duration, True
+
+        overhead, per_byte = self._language_model(language)
+        return overhead + per_byte * size, False
+
+    def observe(self, file_path, language, size, duration):
+        """记录一个文件的实际扫描耗时"""
+        self.file_history[self._relative_path(file_path)] = [size, round(duration, 6)]
+
+        stats = self.language_stats.setdefault(language, [0.0, 0.0, 0.0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += size
+        stats[2] += duration
+        stats[3] += size * size
+        stats[4] += size * duration
+        self._models.pop(language, None)
+        self._dirty = True
+
+
+class CostScheduler:
+    """按预计耗时从大到小产出文件，并统计预计与实际耗时"""
+
+    def __init__(self, cost_model, get_language, lookahead=SCHEDULE_LOOKAHEAD):
+        """初始化调度器
+
+        Args:
+            cost_model: 耗时模型（CostModel）
+            get_language: 根据文件路径获取语言名称的函数
+            lookahead: 预读并排序的文件数
+        """
+        self.cost_model = cost_model
+        self.get_language = get_language
+        self.lookahead = max(1, lookahead)
+        # 已调度但尚未完成的文件的预计耗时
+        self._predicted = {}
+        self.stats = {
+            'scheduled_files': 0,
+            'files_with_history': 0,
+            'predicted_seconds': 0.0,
+            'actual_seconds': 0.0,
+            'cache_hit_files': 0,
+            'compared_files': 0,
+            'absolute_error_seconds': 0.0
+        }
+
+    def order(self, files):
+        """按预计耗时从大到小产出文件
+
+        Args:
+            files: 文件路径的迭代器
+        """
+        heap = []
+        sequence = 0
+        for file_path in files:
+            heapq.heappush(heap, (-self._predict(file_path), sequence, file_path))
+            sequence += 1
+            if len(heap) >= self.lookahead:
+                yield heapq.heappop(heap)[2]
+        while heap:
+            yield heapq.heappop(heap)[2]
+
+    def _predict(self, file_path):
+        """估计文件耗时并记录，用于扫描结束后比较"""
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        cost, from_history = self.cost_model.predict(file_path, self.get_language(file_path), size)
+        self._predicted[file_path] = cost
+        self.stats['scheduled_files'] += 1
+        self.stats['predicted_seconds'] += cost
+        if from_history:
+            self.stats['files_with_history'] += 1
+        return cost
+
+    def complete(self, file_path, language, size, duration, cache_hit=False):
+        """记录文件的实际扫描耗时
+
+        缓存命中的文件没有经过解析，其耗时既不用于比较也不用于更新耗时模型
+
+        Args:
+            file_path: 文件路径
+            language: 语言名称
+            size: 文件大小
+            duration: 实际耗时（秒）
+            cache_hit: 是否命中扫描缓存
+        """
+        predicted = self._predicted.pop(file_path, None)
+        if cache_hit:
+            self.stats['cache_hit_files'] += 1
+            if predicted is not None:
+                self.stats['predicted_seconds'] -= predicted
+            return
+
+        self.stats['actual_seconds'] += duration
+        if predicted is not None:
+            self.stats['compared_files'] += 1
+            self.stats['absolute_error_seconds'] += abs(predicted - duration)
+        self.cost_model.observe(file_path, language, size, duration)
+
+    def summary(self, workers=None):
+        """获取预计与实际耗时的比较结果
+
+        predicted_seconds和actual_seconds为所有已解析文件的耗时之和，不包括缓存命中的文件
+
+        Args:
+            workers: 平均并发数，用于把累计耗时换算为预计的扫描时间
+        """
+        summary = dict(self.stats)
+        summary['predicted_seconds'] = round(max(0.0, summary['predicted_seconds']), 3)
+        summary['actual_seconds'] = round(summary['actual_seconds'], 3)
+        compared = summary.pop('compared_files')
+        absolute_error = summary.pop('absolute_error_seconds')
+        summary['mean_absolute_error'] = round(absolute_error / compared, 6) if compared else 0.0
+        if workers:
+            summary['predicted_wall_seconds'] = round(max(0.0, self.stats['predicted_seconds']) / workers, 3)
+        summary['lookahead'] = self.lookahead
+        return summary
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+违规严重性分类
+严重性和是否过滤只与违规类型有关的部分，在每种违规类型首次出现时计算一次并保存在分类表中，
+之后同类违规只需查表；只有没有默认严重性的违规类型才在消息中匹配关键词。
+默认严重性、关键词和各规则集的覆盖在src/rules/rulesets.py中声明
+"""
+
+import re
+import logging
+import threading
+
+from src.rules.rulesets import (severity_levels, severity_rules, low_severity_keywords, filtered_messages,
+                                severity_overrides)
+
+logger = logging.getLogger(__name__)
+
+# 关键词不区分大小写
+_LOW_SEVERITY_PATTERN = re.compile('|'.join(re.escape(keyword) for keyword in low_severity_keywords), re.IGNORECASE)
+_FILTERED_PATTERN = re.compile('|'.join(re.escape(message) for message in filtered_messages), re.IGNORECASE)
+
+# 消息中包含该文本的违规统一为中等严重性，命名问题不会被标记为高风险
+NAMING_MARKER = '命名'
+
+# 当前进程中各规则集的分类表
+_classifiers = {}
+_classifiers_lock = threading.Lock()
+
+
+class SeverityClassifier:
+    """某个规则集的严重性分类表
+
+    决定顺序：规则集覆盖 > 消息包含"命名" > 解析器给出的严重性 > 违规类型的默认严重性 > 关键词
+    """
+
+    def __init__(self, ruleset=None):
+        """初始化分类表
+
+        Args:
+            ruleset: 规则集名称，决定使用哪些覆盖，为None时不使用覆盖
+        """
+        self.ruleset = ruleset
+        self.overrides = {}
+        for rule_name, severity in (severity_overrides.get(ruleset) or {}).items():
+            if severity in severity_levels:
+                self.overrides[rule_name] = severity
+            else:
+                logger.warning(f"规则集 {ruleset} 中违规类型 {rule_name} 的严重性 {severity} 无效，已忽略")
+        # 违规类型 -> (覆盖的严重性, 默认严重性, 类型名称是否包含低严重性关键词, 是否过滤)
+        self._types = {}
+
+    def _add_type(self, rule_name):
+        """计算违规类型的分类表项"""
+        entry = (self.overrides.get(rule_name), severity_rules.get(rule_name),
+                 _LOW_SEVERITY_PATTERN.search(rule_name) is not None, _FILTERED_PATTERN.search(rule_name) is not None)
+        self._types[rule_name] = entry
+        return entry
+
+    def classify(self, rule_name, description, severity=None):
+        """判断一个违规的严重性
+
+        Args:
+            rule_name: 违规类型
+            description: 违规描述
+            severity: 解析器给出的严重性，没有时为None
+
+        Returns:
+            str: 严重性，应过滤掉的违规返回None
+        """
+        override, default, type_is_low, filtered = self._types.get(rule_name) or self._add_type(rule_name)
+        if filtered or _FILTERED_PATTERN.search(description):
+            return None
+
+        if override is not None:
+            return override
+        if NAMING_MARKER in description:
+            return 'medium'
+        if severity is not None:
+            return severity
+        if default is not None:
+            return default
+        # 只有没有默认严重性的违规类型才需要在消息中匹配关键词
+        if type_is_low or _LOW_SEVERITY_PATTERN.search(description):
+            return 'low'
+        return 'medium'
+
+    def __len__(self):
+        return len(self._types)
+
+
+def get_severity_classifier(ruleset=None):
+    """获取当前进程中某个规则集共用的分类表"""
+    classifier = _classifiers.get(ruleset)
+    if classifier is None:
+        with _classifiers_lock:
+            classifier = _classifiers.get(ruleset)
+            if classifier is None:
+                classifier = SeverityClassifier(ruleset)
+                _classifiers[ruleset] = classifier
+    return classifier
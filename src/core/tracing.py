@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+扫描时间线追踪
+把文件查找、读取、解码、解析、规则检查、外部工具、结果合并和报告生成记录为时间段，
+导出为Chrome Trace Event格式的JSON，可以在chrome://tracing或Perfetto中按进程和线程查看。
+
+工作进程中的时间段随文件记录返回，由主进程写入固定大小的环形缓冲区：
+缓冲区满后丢弃最早的时间段，按文件抽样可以让大仓库的时间线覆盖整个扫描过程，内存占用与文件数无关。
+各进程的时间都取自time.perf_counter()，在Linux、macOS和Windows上是系统范围的单调时钟，可以直接比较
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import collections
+from contextlib import nullcontext
+
+logger = logging.getLogger(__name__)
+
+# 环形缓冲区默认保留的时间段数，每个时间段约占200字节
+TRACE_BUFFER_SIZE = 200000
+
+# 当前进程中接收时间段的记录器，未启用追踪时为None
+_active = None
+
+_null_span = nullcontext()
+
+
+def activate(recorder):
+    """把记录器设为当前进程接收时间段的记录器"""
+    global _active
+    _active = recorder
+
+
+def deactivate():
+    """停止记录时间段，返回之前的记录器"""
+    global _active
+    recorder, _active = _active, None
+    return recorder
+
+
+def get_recorder():
+    """获取当前进程的记录器，未启用追踪时返回None"""
+    return _active
+
+
+class _Span:
+    """把一段代码的执行时间记录到记录器的上下文管理器"""
+
+    __slots__ = ('recorder', 'category', 'name', 'args', 'start')
+
+    def __init__(self, recorder, category, name, args):
+        self.recorder = recorder
+        self.category = category
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.recorder.add(self.category, self.name, self.start, time.perf_counter(), args=self.args)
+        return False
+
+
+def span(category, name, args=None):
+    """在当前线程中记录一个时间段，未启用追踪时返回空的上下文管理器
+
+    Args:
+        category: 类别，例如'walk'、'report'
+        name: 时间段名称
+        args: 附加信息字典，显示在时间段的详情中
+    """
+    recorder = _active
+    if recorder is None:
+        return _null_span
+    return _Span(recorder, category, name, args)
+
+
+class TraceRecorder:
+    """在主进程中收集时间段并导出为Chrome Trace Event JSON
+
+    add()可以在多个线程中调用，只有导出时需要遍历缓冲区
+    """
+
+    def __init__(self, buffer_size=TRACE_BUFFER_SIZE, sample_rate=1.0):
+        """初始化记录器
+
+        Args:
+            buffer_size: 环形缓冲区保留的时间段数
+            sample_rate: 记录文件扫描过程的文件比例，0到1之间
+        """
+        self.buffer_size = max(1, buffer_size)
+        self.sample_rate = min(1.0, max(0.0, sample_rate))
+        # (类别, 名称, 开始时间, 持续时间, 进程号, 线程号, 附加信息)
+        self.events = collections.deque(maxlen=self.buffer_size)
+        self.total_events = 0
+        self.traced_files = 0
+        # (进程号, 线程号) -> 线程名称
+        self.threads = {}
+        self.pid = os.getpid()
+        # 时间线的零点
+        self.epoch = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, category, name, start, end, pid=None, tid=None, args=None):
+        """记录一个时间段
+
+        Args:
+            category: 类别
+            name: 名称
+            start: 开始时间，time.perf_counter()的值
+            end: 结束时间
+            pid: 进程号，为None时为当前进程
+            tid: 线程号，为None时为当前线程
+            args: 附加信息字典
+        """
+        if pid is None:
+            pid = self.pid
+        if tid is None:
+            tid = threading.get_native_id()
+            if (pid, tid) not in self.threads:
+                self.threads[(pid, tid)] = threading.current_thread().name
+        with self._lock:
+            self.events.append((category, name, start, end - start, pid, tid, args))
+            self.total_events += 1
+
+    def add_file_trace(self, file_path, language, trace):
+        """记录工作线程或工作进程返回的一个文件的扫描过程
+
+        Args:
+            file_path: 文件路径
+            language: 语言名称
+            trace: 文件记录中的trace字典，包含pid、tid、thread、start、end和spans
+        """
+        pid = trace['pid']
+        tid = trace['tid']
+        if (pid, tid) not in self.threads:
+            self.threads[(pid, tid)] = trace.get('thread') or str(tid)
+        args = {'path': file_path, 'language': language}
+        if trace.get('dropped_spans'):
+            args['dropped_spans'] = trace['dropped_spans']
+        self.add('file', os.path.basename(file_path), trace['start'], trace['end'], pid, tid, args)
+        for category, name, start, end in trace['spans']:
+            self.add(category, name, start, end, pid, tid)
+        self.traced_files += 1
+
+    def summary(self):
+        """获取记录统计，写入扫描结果的trace字段"""
+        retained = len(self.events)
+        return {
+            'enabled': True,
+            'events': retained,
+            'dropped_events': self.total_events - retained,
+            'buffer_size': self.buffer_size,
+            'sample_rate': self.sample_rate,
+            'traced_files': self.traced_files
+        }
+
+    def _metadata_events(self):
+        """进程和线程名称的元数据事件"""
+        events = []
+        pids = sorted({pid for pid, _ in self.threads} | {self.pid})
+        for pid in pids:
+            name = 'CodeAuditX' if pid == self.pid else f"扫描工作进程 {pid}"
+            events.append({'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': name}})
+            # 主进程排在最前面
+            events.append({'name': 'process_sort_index', 'ph': 'M', 'pid': pid, 'tid': 0,
+                           'args': {'sort_index': 0 if pid == self.pid else 1}})
+        for (pid, tid), name in sorted(self.threads.items()):
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        return events
+
+    def export(self, output_path):
+        """把缓冲区中的时间段导出为Chrome Trace Event JSON
+
+        Args:
+            output_path: 输出文件路径
+
+        Returns:
+            int: 导出的时间段数
+        """
+        with self._lock:
+            events = list(self.events)
+        events.sort(key=lambda event: event[2])
+
+        temp_path = f"{output_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write('{"traceEvents":[\n')
+            first = True
+            for event in self._metadata_events():
+                if not first:
+                    f.write(',\n')
+                f.write(json.dumps(event, ensure_ascii=False))
+                first = False
+            for category, name, start, duration, pid, tid, args in events:
+                # 时间单位为微秒
+                event = {'name': name, 'cat': category, 'ph': 'X',
+                         'ts': round((start - self.epoch) * 1e6, 3), 'dur': round(duration * 1e6, 3),
+                         'pid': pid, 'tid': tid}
+                if args:
+                    event['args'] = args
+                if not first:
+                    f.write(',\n')
+                f.write(json.dumps(event, ensure_ascii=False))
+                first = False
+            f.write('\n],"displayTimeUnit":"ms","otherData":')
+            f.write(json.dumps(self.summary(), ensure_ascii=False))
+            f.write('}\n')
+        os.replace(temp_path, output_path)
+        return len(events)
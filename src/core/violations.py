@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+违规详情的紧凑存储
+扫描结果的details字段中，每个违规原本是包含四个字符串键的字典，描述中反复出现相同的长中文消息，
+每个违规占用数百字节。ViolationList按列保存一个文件的全部违规：
+    规则名称: 规则表中的编号
+    描述: 消息模板表中的编号，加上模板中可变的参数（数字和引号中的名称）
+    行号: 整数，'未知'记为-1
+    严重性: 严重性表中的编号
+
+规则、消息模板和严重性表由一次扫描的结果（ScanResult.violation_tables）中的各文件共用，
+随扫描结果一起释放，长时间运行的界面进程多次扫描时不会累积。
+遍历ViolationList时逐个还原为原来的字典，报告生成和界面显示不需要修改；
+报告只需要某一严重性的违规时用filter_by_severity()，先比较严重性列，只为选中的违规还原字典。
+表中的编号只在所属的表中有效，跨进程传递（pickle）时按字典列表传递
+"""
+
+import re
+import array
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 违规字典的字段，顺序与format_violations()的输出相同
+VIOLATION_FIELDS = ('rule_name', 'description', 'line_number', 'severity')
+
+# 行号未知时format_violations()使用的值
+UNKNOWN_LINE = '未知'
+_UNKNOWN_LINE_VALUE = -1
+
+# 消息中的可变部分：引号中的名称和数字（包括小数和百分比）
+_PARAMETER_PATTERN = re.compile(r"('[^'\n]*'|\"[^\"\n]*\"|\d+(?:\.\d+)?%?)")
+
+
+class _InternTable:
+    """把值映射为连续编号的表，只增不减"""
+
+    def __init__(self, initial=()):
+        self.values = []
+        self.ids = {}
+        self._lock = threading.Lock()
+        for value in initial:
+            self.intern(value)
+
+    def intern(self, value):
+        """获取值的编号，新值追加到表末尾"""
+        value_id = self.ids.get(value)
+        if value_id is None:
+            with self._lock:
+                value_id = self.ids.get(value)
+                if value_id is None:
+                    value_id = len(self.values)
+                    self.values.append(value)
+                    self.ids[value] = value_id
+        return value_id
+
+    def __len__(self):
+        return len(self.values)
+
+
+class ViolationTables:
+    """一次扫描中各ViolationList共用的编号表"""
+
+    __slots__ = ('rules', 'messages', 'severities')
+
+    def __init__(self):
+        # 规则名称表
+        self.rules = _InternTable()
+        # 消息模板表，模板是消息去掉可变参数后剩下的文本片段组成的元组
+        self.messages = _InternTable()
+        # 严重性表，常用级别预先加入
+        self.severities = _InternTable(('high', 'medium', 'low'))
+
+    def __reduce__(self):
+        # ViolationList按字典列表pickle，接收方重新编号，不需要传递表的内容
+        return (ViolationTables, ())
+
+
+def split_message(message):
+    """把消息拆分为模板和参数
+
+    Args:
+        message: 违规描述
+
+    Returns:
+        tuple: (模板片段元组, 参数元组)，片段数比参数数多1，交替拼接即为原消息
+    """
+    pieces = _PARAMETER_PATTERN.split(message)
+    if len(pieces) == 1:
+        return (message,), ()
+    return tuple(pieces[0::2]), tuple(pieces[1::2])
+
+
+def join_message(template, parameters):
+    """按模板和参数还原消息"""
+    if len(template) == 1:
+        return template[0]
+    parts = [template[0]]
+    for parameter, piece in zip(parameters, template[1:]):
+        parts.append(parameter)
+        parts.append(piece)
+    return ''.join(parts)
+
+
+class ViolationList:
+    """一个文件的违规详情，按列紧凑保存
+
+    支持len()、遍历和下标访问，取出的每个违规都是新建的字典；
+    字段或类型与format_violations()的输出不一致的违规原样保存
+    """
+
+    __slots__ = ('_tables', '_rules', '_messages', '_lines', '_severities', '_parameters', '_irregular', '_offsets')
+
+    def __init__(self, tables=None):
+        self._tables = tables if tables is not None else ViolationTables()
+        self._rules = array.array('I')
+        self._messages = array.array('I')
+        self._lines = array.array('i')
+        self._severities = array.array('H')
+        # 各违规的消息参数依次拼接，按模板的参数个数切分
+        self._parameters = ()
+        # 下标 -> 无法按列保存的原始字典
+        self._irregular = None
+        # 各违规的参数在_parameters中的起始位置，首次按下标访问时计算
+        self._offsets = None
+
+    @classmethod
+    def from_dicts(cls, violations, tables=None):
+        """由违规字典列表创建
+
+        Args:
+            violations: format_violations()输出的违规字典列表
+            tables: 共用的ViolationTables，为None时使用单独的表
+
+        Returns:
+            ViolationList: 紧凑保存的违规详情
+        """
+        compact = cls(tables)
+        tables = compact._tables
+        parameters = []
+        # 同一文件中重复出现的参数（例如同一个名称）只保存一份
+        unique_parameters = {}
+        for index, violation in enumerate(violations):
+            line_number = violation.get('line_number')
+            if line_number == UNKNOWN_LINE:
+                line_number = _UNKNOWN_LINE_VALUE
+            elif type(line_number) is not int or line_number < 0:
+                line_number = None
+            if (line_number is None or len(violation) != len(VIOLATION_FIELDS)
+                    or not all(isinstance(violation.get(field), str)
+                               for field in ('rule_name', 'description', 'severity'))):
+                if compact._irregular is None:
+                    compact._irregular = {}
+                compact._irregular[index] = dict(violation)
+                compact._append(0, 0, 0, 0)
+                continue
+
+            template, message_parameters = split_message(violation['description'])
+            parameters.extend(unique_parameters.setdefault(parameter, parameter) for parameter in message_parameters)
+            compact._append(tables.rules.intern(violation['rule_name']), tables.messages.intern(template),
+                            line_number, tables.severities.intern(violation['severity']))
+        compact._parameters = tuple(parameters)
+        return compact
+
+    def _append(self, rule_id, message_id, line_number, severity_id):
+        self._rules.append(rule_id)
+        self._messages.append(message_id)
+        self._lines.append(line_number)
+        self._severities.append(severity_id)
+
+    def __len__(self):
+        return len(self._rules)
+
+    def _row(self, index, offset, count):
+        """还原第index个按列保存的违规，offset和count为它的参数位置和个数"""
+        tables = self._tables
+        line_number = self._lines[index]
+        return {
+            'rule_name': tables.rules.values[self._rules[index]],
+            'description': join_message(tables.messages.values[self._messages[index]],
+                                        self._parameters[offset:offset + count]),
+            'line_number': UNKNOWN_LINE if line_number == _UNKNOWN_LINE_VALUE else line_number,
+            'severity': tables.severities.values[self._severities[index]]
+        }
+
+    def __iter__(self):
+        templates = self._tables.messages.values
+        irregular = self._irregular
+        offset = 0
+        for index, message_id in enumerate(self._messages):
+            if irregular is not None and index in irregular:
+                yield dict(irregular[index])
+                continue
+            count = len(templates[message_id]) - 1
+            yield self._row(index, offset, count)
+            offset += count
+
+    def iter_by_severity(self, severity, default='medium'):
+        """只还原某一严重性的违规
+
+        先比较严重性列，其他违规只累加参数位置，不拼接消息也不创建字典
+
+        Args:
+            severity: 严重性
+            default: 无法按列保存的违规缺少严重性时使用的值
+        """
+        severity_id = self._tables.severities.ids.get(severity)
+        irregular = self._irregular
+        if irregular is None and (severity_id is None or severity_id not in self._severities):
+            return
+        templates = self._tables.messages.values
+        offset = 0
+        for index, (message_id, row_severity) in enumerate(zip(self._messages, self._severities)):
+            if irregular is not None and index in irregular:
+                violation = irregular[index]
+                if violation.get('severity', default) == severity:
+                    yield dict(violation)
+                continue
+            count = len(templates[message_id]) - 1
+            if row_severity == severity_id:
+                yield self._row(index, offset, count)
+            offset += count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.to_dicts()[index]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('violation index out of range')
+        irregular = self._irregular
+        if irregular is not None and index in irregular:
+            return dict(irregular[index])
+        if self._offsets is None:
+            self._offsets = self._compute_offsets()
+        offset = self._offsets[index]
+        return self._row(index, offset, len(self._tables.messages.values[self._messages[index]]) - 1)
+
+    def _compute_offsets(self):
+        """计算各违规的参数起始位置"""
+        templates = self._tables.messages.values
+        irregular = self._irregular
+        offsets = array.array('I')
+        offset = 0
+        for index, message_id in enumerate(self._messages):
+            offsets.append(offset)
+            if irregular is None or index not in irregular:
+                offset += len(templates[message_id]) - 1
+        return offsets
+
+    def __eq__(self, other):
+        if isinstance(other, ViolationList):
+            other = other.to_dicts()
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def __reduce__(self):
+        # 表中的编号只在所属的表中有效
+        return (self.__class__.from_dicts, (self.to_dicts(),))
+
+    def __repr__(self):
+        return f"<ViolationList {len(self)} violations>"
+
+    def to_dicts(self):
+        """还原为违规字典列表"""
+        return list(self)
+
+
+def compact_violations(violations, tables=None):
+    """把违规字典列表转换为ViolationList，已经是ViolationList时直接返回
+
+    Args:
+        violations: 违规字典列表
+        tables: 共用的ViolationTables，一般为扫描结果的violation_tables
+    """
+    if isinstance(violations, ViolationList):
+        return violations
+    return ViolationList.from_dicts(violations, tables)
+
+
+def filter_by_severity(violations, severity, default='medium'):
+    """遍历某一严重性的违规，ViolationList只还原选中的违规
+
+    Args:
+        violations: ViolationList或违规字典列表
+        severity: 严重性
+        default: 违规缺少严重性时使用的值
+    """
+    if isinstance(violations, ViolationList):
+        return violations.iter_by_severity(severity, default)
+    return (violation for violation in violations if violation.get('severity', default) == severity)
+
+
+def json_default(value):
+    """json.dump()的default参数，把ViolationList转换为字典列表"""
+    if isinstance(value, ViolationList):
+        return value.to_dicts()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
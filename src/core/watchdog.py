@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+单文件超时控制
+线程无法被强制终止，一个让正则表达式回溯失控的文件就能让工作线程永远卡住。
+WatchdogPool在可以终止的工作进程中逐个扫描文件，每个文件有独立的时间预算：
+超时的文件记为超时跳过，并记录当时所处的解析阶段，卡住的进程被终止后立即启动新进程，
+同一批中剩余的文件交给其他进程继续扫描
+
+工作进程把当前文件的开始时间和解析阶段写入共享内存，主进程不需要与工作进程通信就能判断是否超时
+"""
+
+import re
+import time
+import logging
+import threading
+import functools
+import collections
+import multiprocessing
+import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import connection
+
+logger = logging.getLogger(__name__)
+
+# 共享内存中解析阶段名称的最大字节数
+STAGE_BUFFER_SIZE = 128
+
+# 监控线程两次检查超时之间的最长间隔（秒）
+MONITOR_INTERVAL = 0.5
+
+# 工作进程在没有正在扫描的文件时（初始化、两个文件之间或发回记录时）连续异常退出的次数上限，
+# 达到上限后该批的Future以BrokenProcessPool结束，不再重新排队
+MAX_IDLE_CRASHES = 3
+
+# 需要记录解析阶段的解析器方法
+STAGE_METHOD_PATTERN = re.compile(
+    r'^(?:scan|parse|check_rules|_perform_basic_checks|_?run_\w+|_extract_\w+|_check_\w+)$')
+
+# 工作进程中当前解析阶段的共享内存，不在监控下运行时为None
+_stage_buffer = None
+
+
+def set_stage(stage):
+    """记录当前所处的扫描阶段，不在监控下的进程中不做任何事"""
+    if _stage_buffer is None:
+        return
+    _stage_buffer.value = stage.encode('utf-8')[:STAGE_BUFFER_SIZE - 1]
+
+
+def track_parser(parser):
+    """为解析器实例的解析和规则检查方法记录阶段名称，不在监控下的进程中不做任何事
+
+    只替换实例上的属性，不修改解析器类
+    """
+    if _stage_buffer is None:
+        return
+    class_name = type(parser).__name__
+    for name in dir(type(parser)):
+        if not STAGE_METHOD_PATTERN.match(name):
+            continue
+        method = getattr(parser, name, None)
+        if callable(method):
+            setattr(parser, name, _stage_wrapper(f"{class_name}.{name}", method))
+
+
+def _stage_wrapper(stage, method):
+    """调用方法期间把阶段名称设为该方法，返回后恢复为调用前的阶段"""
+    label = stage.encode('utf-8')[:STAGE_BUFFER_SIZE - 1]
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        buffer = _stage_buffer
+        previous = buffer.value
+        buffer.value = label
+        try:
+            return method(*args, **kwargs)
+        finally:
+            buffer.value = previous
+    return wrapper
+
+
+def _worker_main(conn, clock, stage_buffer, initializer, initargs):
+    """工作进程主循环
+
+    每次接收一批文件，逐个调用扫描函数，整批完成后一次发回所有记录以减少进程间通信。
+    clock[0]为当前文件的开始时间（0表示空闲），clock[1]为当前文件在批中的序号
+    """
+    global _stage_buffer
+    _stage_buffer = stage_buffer
+
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+
+        fn, items, args = task
+        records = []
+        for index, item in enumerate(items):
+            stage_buffer.value = b''
+            clock[1] = index
+            clock[0] = time.monotonic()
+            try:
+                records.append(fn(item, *args))
+            except Exception as e:
+                records.append(e)
+            clock[0] = 0.0
+        conn.send(records)
+
+
+class _Job:
+    """一次提交的一批文件，对应一个Future，结果为每个文件的记录列表"""
+
+    def __init__(self, future, fn, items, args):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.total = len(items)
+        # 尚未得到记录的文件
+        self.pending = items
+        self.records = []
+        self.started = False
+        # 连续在没有正在扫描的文件时异常退出的次数
+        self.idle_crashes = 0
+
+
+class _Worker:
+    """主进程中对一个工作进程的记录"""
+
+    def __init__(self, context, initializer, initargs):
+        self.conn, child_conn = context.Pipe()
+        self.clock = context.RawArray('d', 2)
+        self.stage = context.RawArray('c', STAGE_BUFFER_SIZE)
+        self.process = context.Process(target=_worker_main,
+                                       args=(child_conn, self.clock, self.stage, initializer, initargs),
+                                       daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.job = None
+        # 交给该进程的文件
+        self.items = None
+
+    def kill(self):
+        try:
+            self.process.kill()
+        except Exception:
+            pass
+        self.process.join(1)
+        self.conn.close()
+
+
+class WatchdogPool:
+    """可以终止单个工作进程的进程池
+
+    提供submit()和shutdown()，可以像concurrent.futures的执行器一样使用。
+    提交的函数对批中的每一项单独调用，Future的结果为各项返回值的列表（顺序不保证与提交时一致）；
+    超时或工作进程异常退出时由on_timeout生成该项的记录
+    """
+
+    def __init__(self, max_workers, file_timeout, on_timeout, initializer=None, initargs=(), mp_context=None):
+        """初始化进程池
+
+        Args:
+            max_workers: 工作进程数
+            file_timeout: 每一项的时间预算（秒）
+            on_timeout: 生成超时记录的函数，参数为(项, 阶段名称, 已用时间, 原因)，原因为'timeout'或'crash'
+            initializer: 工作进程启动时调用的初始化函数
+            initargs: 初始化函数的参数
+            mp_context: multiprocessing上下文，为None时使用默认上下文
+        """
+        self.max_workers = max(1, max_workers)
+        self.file_timeout = file_timeout
+        self.on_timeout = on_timeout
+        self.initializer = initializer
+        self.initargs = initargs
+        self.context = mp_context or multiprocessing.get_context()
+        self.stats = {'timeouts': 0, 'crashes': 0, 'restarts': 0}
+
+        self._jobs = collections.deque()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._cancelled = False
+        self._wakeup_reader, self._wakeup_writer = self.context.Pipe(duplex=False)
+        self._workers = [_Worker(self.context, initializer, initargs) for _ in range(self.max_workers)]
+        self._monitor = threading.Thread(target=self._monitor_loop, name='WatchdogPoolMonitor', daemon=True)
+        self._monitor.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True)
+        return False
+
+    def submit(self, fn, items, *args):
+        """提交一批项目
+
+        Args:
+            fn: 工作进程中对每一项调用的函数，参数为(项, *args)，必须可以被pickle
+            items: 项目列表
+            args: 传给fn的其他参数
+
+        Returns:
+            concurrent.futures.Future: 结果为各项返回值的列表
+        """
+        future = concurrent.futures.Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('进程池已关闭')
+            self._jobs.append(_Job(future, fn, list(items), args))
+        self._wake()
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """关闭进程池
+
+        Args:
+            wait: 是否等待已提交的任务完成
+            cancel_futures: 是否取消尚未开始的任务，并终止正在执行的工作进程
+        """
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                self._cancelled = True
+                while self._jobs:
+                    job = self._jobs.popleft()
+                    if not job.started:
+                        job.future.cancel()
+                    elif not job.future.done():
+                        job.future.set_exception(concurrent.futures.CancelledError())
+        self._wake()
+        if wait and self._monitor is not threading.current_thread():
+            self._monitor.join()
+
+    def _wake(self):
+        try:
+            self._wakeup_writer.send(None)
+        except (OSError, ValueError):
+            pass
+
+    def _monitor_loop(self):
+        """在后台线程中分派任务、接收记录并检查超时"""
+        try:
+            while True:
+                with self._lock:
+                    cancelled = self._cancelled
+                    finished = self._shutdown and not self._jobs and all(w.job is None for w in self._workers)
+                if cancelled or finished:
+                    break
+
+                self._dispatch()
+                waitables = [self._wakeup_reader] + [worker.conn for worker in self._workers if worker.job is not None]
+                for ready in connection.wait(waitables, timeout=self._next_deadline()):
+                    if ready is self._wakeup_reader:
+                        try:
+                            while self._wakeup_reader.poll():
+                                self._wakeup_reader.recv()
+                        except (EOFError, OSError):
+                            pass
+                        continue
+                    worker = next(w for w in self._workers if w.conn is ready)
+                    self._receive(worker)
+                self._check_timeouts()
+        except Exception as e:
+            logger.error(f"超时监控线程异常退出: {str(e)}")
+            with self._lock:
+                self._cancelled = True
+                jobs = list(self._jobs)
+                self._jobs.clear()
+            for job in jobs + [w.job for w in self._workers if w.job is not None]:
+                if not job.future.done():
+                    job.future.set_exception(e)
+        finally:
+            self._stop_workers()
+
+    def _dispatch(self):
+        """把排队的任务交给空闲的工作进程"""
+        for worker in self._workers:
+            if worker.job is not None:
+                continue
+            with self._lock:
+                if not self._jobs:
+                    return
+                job = self._jobs.popleft()
+            if not job.started:
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+                job.started = True
+            worker.job = job
+            worker.items = job.pending
+            job.pending = []
+            worker.clock[0] = 0.0
+            worker.clock[1] = 0
+            try:
+                worker.conn.send((job.fn, worker.items, job.args))
+            except (OSError, ValueError):
+                # 工作进程已经退出，例如初始化函数失败
+                self._replace(worker, 'crash')
+
+    def _receive(self, worker):
+        """接收工作进程发回的消息，工作进程异常退出时按崩溃处理"""
+        try:
+            if not worker.conn.poll():
+                return
+            records = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker, 'crash')
+            return
+
+        job = worker.job
+        worker.job = None
+        worker.items = None
+        if job.future.done():
+            return
+        for record in records:
+            if isinstance(record, Exception):
+                # 扫描函数本身抛出的异常，与ProcessPoolExecutor一样交给Future
+                job.future.set_exception(record)
+                return
+        job.records.extend(records)
+        if len(job.records) == job.total:
+            job.future.set_result(job.records)
+
+    def _next_deadline(self):
+        """距离最近一个文件超时还有多长时间，作为下次等待的超时"""
+        timeout = MONITOR_INTERVAL
+        now = time.monotonic()
+        for worker in self._workers:
+            started = worker.clock[0]
+            if worker.job is not None and started:
+                timeout = min(timeout, max(0.0, started + self.file_timeout - now))
+        return timeout
+
+    def _check_timeouts(self):
+        """终止当前文件超过时间预算的工作进程"""
+        now = time.monotonic()
+        for worker in list(self._workers):
+            # 工作进程在发回记录前清零开始时间，开始时间不为0说明仍在扫描该文件
+            started = worker.clock[0]
+            if worker.job is not None and started and now - started > self.file_timeout:
+                self._replace(worker, 'timeout')
+
+    def _replace(self, worker, reason):
+        """终止工作进程并启动新进程，当前文件按原因生成记录，同一批中的其他文件重新排队
+
+        记录在整批完成后才发回，被终止的进程已经扫描完的文件也需要重新扫描。
+        没有正在扫描的文件时无法确定是哪个文件导致的，整批重新排队，
+        连续MAX_IDLE_CRASHES次后该批的Future以BrokenProcessPool结束
+
+        Args:
+            worker: 需要替换的工作进程
+            reason: 'timeout'或'crash'
+        """
+        job = worker.job
+        items = worker.items or []
+        started = worker.clock[0]
+        current = int(worker.clock[1]) if started else None
+        elapsed = time.monotonic() - started if started else 0.0
+        stage = worker.stage.value.decode('utf-8', 'replace')
+        worker.kill()
+
+        index = self._workers.index(worker)
+        self.stats['restarts'] += 1
+        self._workers[index] = _Worker(self.context, self.initializer, self.initargs)
+        if job is None or job.future.done():
+            return
+
+        self.stats['timeouts' if reason == 'timeout' else 'crashes'] += 1
+        if current is not None and current < len(items):
+            job.idle_crashes = 0
+            job.records.append(self.on_timeout(items[current], stage, elapsed, reason))
+            items = items[:current] + items[current + 1:]
+        else:
+            job.idle_crashes += 1
+            if job.idle_crashes >= MAX_IDLE_CRASHES:
+                logger.error(f"工作进程连续 {job.idle_crashes} 次在没有扫描文件时异常退出，放弃该批 {job.total} 个文件")
+                job.future.set_exception(BrokenProcessPool(
+                    f"工作进程连续 {job.idle_crashes} 次在没有扫描文件时异常退出，可能是初始化失败"))
+                return
+        if len(job.records) == job.total:
+            job.future.set_result(job.records)
+            return
+        # 重新排队的文件优先交给下一个空闲的工作进程
+        job.pending = items + job.pending
+        with self._lock:
+            self._jobs.appendleft(job)
+
+    def _stop_workers(self):
+        """停止所有工作进程，取消时直接终止正在执行的进程"""
+        with self._lock:
+            cancelled = self._cancelled
+        for worker in self._workers:
+            if cancelled or worker.job is not None:
+                if worker.job is not None and not worker.job.future.done():
+                    worker.job.future.set_exception(concurrent.futures.CancelledError())
+                worker.kill()
+                continue
+            try:
+                worker.conn.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(5)
+            if worker.process.is_alive():
+                worker.kill()
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
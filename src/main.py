@@ -4,6 +4,7 @@
 import sys
 import os
 import platform
+import multiprocessing
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -160,4 +161,6 @@ def main():
     sys.exit(app.exec())
 
 if __name__ == '__main__':
+    # 打包后的应用使用多进程扫描时需要
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
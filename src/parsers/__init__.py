@@ -3,6 +3,7 @@
 
 import os
 import logging
+import threading
 from src.parsers.base_parser import BaseParser
 
 # 创建logger实例
@@ -18,31 +19,38 @@ _available_parsers = {
     'java': None
 }
 
-def get_parser_for_file(file_path, ruleset):
-    """根据文件路径获取合适的解析器"""
+def get_parser_name(file_path):
+    """根据文件路径获取解析器名称，不支持的文件类型返回None"""
     # 获取文件扩展名
     _, ext = os.path.splitext(file_path)
     ext = ext.lower()
     
     # 根据扩展名选择解析器
     if ext == '.py':
-        return _get_parser('python', ruleset)
+        return 'python'
     elif ext in ['.c', '.cpp', '.cc', '.h', '.hpp']:
-        return _get_parser('cpp', ruleset)
+        return 'cpp'
     elif ext == '.php':
-        return _get_parser('php', ruleset)
+        return 'php'
     elif ext in ['.js', '.jsx']:
-        return _get_parser('javascript', ruleset)
+        return 'javascript'
     elif ext == '.go':
-        return _get_parser('go', ruleset)
+        return 'go'
     elif ext == '.java':
-        return _get_parser('java', ruleset)
+        return 'java'
     
     # 不支持的文件类型
     return None
 
-def _get_parser(parser_name, ruleset):
-    """延迟加载并返回指定的解析器"""
+def get_parser_for_file(file_path, ruleset):
+    """根据文件路径获取合适的解析器"""
+    parser_name = get_parser_name(file_path)
+    if parser_name is None:
+        return None
+    return _get_parser(parser_name, ruleset)
+
+def _load_parser_class(parser_name):
+    """延迟加载并返回指定的解析器类"""
     if _available_parsers.get(parser_name) is None:
         try:
             # 动态导入解析器模块
@@ -62,10 +70,68 @@ def _get_parser(parser_name, ruleset):
             logger.error(f"无法导入解析器模块: src.parsers.{parser_name}_parser")
             return None
     
+    return _available_parsers[parser_name]
+
+def _get_parser(parser_name, ruleset):
+    """延迟加载并返回指定的解析器实例"""
+    parser_class = _load_parser_class(parser_name)
+    if parser_class is None:
+        return None
+    
     # 创建并返回解析器实例
-    parser_class = _available_parsers[parser_name]
     return parser_class(ruleset)
 
+def preload_parsers():
+    """预先导入所有解析器类，供多进程扫描的工作进程在启动时调用一次"""
+    for parser_name in list(_available_parsers.keys()):
+        _load_parser_class(parser_name)
+
+class ParserPool:
+    """解析器实例池
+
+    每个线程按解析器名称和语言各保留一个实例，创建时应用一次规则，之后在该线程扫描的文件间复用。
+    解析器在扫描过程中不修改自身状态，但实例不在线程间共享
+    """
+    
+    def __init__(self, ruleset):
+        self.ruleset = ruleset
+        self._local = threading.local()
+    
+    def get(self, file_path, language=None, rules=None):
+        """获取文件对应的解析器
+        
+        Args:
+            file_path: 文件路径
+            language: 语言名称，同一解析器用于不同语言时分别保留实例
+            rules: 新建解析器时应用的规则，RulePlan或规则字典；复用已有实例时不使用
+        
+        Returns:
+            tuple: (解析器实例, 是否为新建实例)，不支持的文件类型返回(None, False)
+        """
+        parser_name = get_parser_name(file_path)
+        if parser_name is None:
+            return None, False
+        
+        parsers = getattr(self._local, 'parsers', None)
+        if parsers is None:
+            parsers = self._local.parsers = {}
+        
+        key = (parser_name, language)
+        parser = parsers.get(key)
+        if parser is not None:
+            return parser, False
+        
+        parser = _get_parser(parser_name, self.ruleset)
+        if parser is None:
+            return None, False
+        if hasattr(rules, 'to_dict'):
+            # RulePlan只读，解析器拿到的是规则的普通字典副本
+            rules = rules.to_dict()
+        if rules:
+            parser.set_rules(rules)
+        parsers[key] = parser
+        return parser, True
+
 def register_parser(parser_name, parser_class):
     """注册自定义解析器"""
     _available_parsers[parser_name] = parser_class
@@ -3,6 +3,7 @@
 
 import logging
 from src.rules import rule_manager
+from src.parsers.source_buffer import SourceBuffer
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +14,12 @@ class BaseParser:
         self.ruleset = ruleset
         self.supported_extensions = []
         self.language_name = "Unknown"
+        # 切分注释和字符串时使用的语言，见src/parsers/lexer.py
+        self.lexer_language = None
+        # 名称提取模式，基于正则表达式提取名称的子类设置为ExtractionPlan，见src/parsers/extraction.py
+        self.extraction_plan = None
+        # 名称类别 -> NamingMatcher，子类用compile_naming_patterns()设置，见src/core/naming.py
+        self.naming_patterns = {}
         
         # 初始化规则为空，稍后在子类初始化后再加载
         self.rules = {}
@@ -110,12 +117,20 @@ class BaseParser:
         # 由子类实现具体的规则检查逻辑
         return violations
     
-    def scan(self, file_path):
-        """扫描文件并返回违规信息列表"""
+    def scan(self, file_path, content=None):
+        """扫描文件并返回违规信息列表
+
+        Args:
+            file_path: 文件路径
+            content: 已读取的文件内容，为None时从文件读取
+        """
         try:
-            # 读取文件内容
-            with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                content = f.read()
+            # 读取文件内容，调用方已读取时直接使用
+            if content is None:
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            # 解析和各项检查共用同一份行索引
+            content = SourceBuffer.wrap(content)
             
             # 验证内容不为空
             if not content.strip():
@@ -172,7 +187,7 @@ class BaseParser:
         
         try:
             # 检查行长度
-            lines = content.split('\n')
+            lines = SourceBuffer.wrap(content).lines
             max_length = self.rules.get('max_line_length', 120)
             
             for i, line in enumerate(lines, 1):
@@ -204,10 +219,16 @@ class BaseParser:
         return self.language_name
     
     # 辅助方法：检查命名规范
-    def _check_naming_convention(self, name, pattern, violation_type):
-        """检查名称是否符合指定的正则表达式模式"""
-        import re
-        if not re.match(pattern, name):
+    def _check_naming_convention(self, name, matcher, violation_type):
+        """检查名称是否符合命名规则
+
+        Args:
+            name: 名称
+            matcher: self.naming_patterns中的NamingMatcher，同一规则和名称的匹配结果在各文件间共用，
+                     见src/core/naming.py
+            violation_type: 违规类型
+        """
+        if not matcher.matches(name):
             return {
                 'type': violation_type,
                 'message': f"命名不符合规范: {name}",
@@ -217,42 +238,13 @@ class BaseParser:
     
     # 辅助方法：检查注释覆盖率
     def _check_comment_coverage(self, file_content, min_coverage=0.1):
-        """检查文件的注释覆盖率是否达到要求"""
-        import re
-        
-        # 去除字符串字面量，避免影响注释统计
-        # 这是一个简化的实现，实际情况可能更复杂
-        content = re.sub(r'"""(.*?)"""', '', file_content, flags=re.DOTALL)
-        content = re.sub(r"'''(.*?)'''", '', content, flags=re.DOTALL)
-        content = re.sub(r'"(.*?)"', '', content)
-        content = re.sub(r"'(.*?)'", '', content)
-        
-        # 提取注释行
-        lines = content.split('\n')
-        total_lines = len(lines)
-        comment_lines = 0
-        
-        in_multi_line_comment = False
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # 检查多行注释
-            if in_multi_line_comment:
-                comment_lines += 1
-                if '*/' in line:
-                    in_multi_line_comment = False
-                continue
-            
-            # 检查单行注释和多行注释开始
-            if line.startswith('#') or line.startswith('//'):
-                comment_lines += 1
-            elif '/*' in line:
-                comment_lines += 1
-                if '*/' not in line:
-                    in_multi_line_comment = True
+        """检查文件的注释覆盖率是否达到要求
+
+        只包含注释的行计为注释行；多行字符串从第二行起是字符串内容，不计入总行数
+        """
+        lexed = SourceBuffer.wrap(file_content).lexed(self.lexer_language)
+        total_lines = lexed.string_continuation_flags.count(False)
+        comment_lines = lexed.comment_only_flags.count(True)
         
         # 计算注释覆盖率
         if total_lines == 0:
@@ -273,13 +265,13 @@ class BaseParser:
     # 辅助方法：检查代码行长度
     def _check_line_length(self, file_content, max_length=100):
         """检查文件中的代码行长度是否符合规范"""
-        lines = file_content.split('\n')
+        source = SourceBuffer.wrap(file_content)
+        lexed = source.lexed(self.lexer_language)
         violations = []
         
-        for i, line in enumerate(lines):
+        for i, line in enumerate(source.lines):
             # 跳过注释行和空行
-            stripped_line = line.strip()
-            if not stripped_line or stripped_line.startswith('#') or stripped_line.startswith('//'):
+            if source.blank_flags[i] or lexed.comment_only_flags[i]:
                 continue
             
             # 检查行长度
@@ -295,21 +287,20 @@ class BaseParser:
     # 辅助方法：检查缩进规范
     def _check_indentation(self, file_content, expected_indent=4):
         """检查文件中的缩进是否符合规范"""
-        lines = file_content.split('\n')
+        source = SourceBuffer.wrap(file_content)
         violations = []
         
         # 获取语言特定的缩进规则设置
         language_indent_settings = self.rules.get('indentation', {})
         strict_check = language_indent_settings.get('strict_check', False)
         
-        for i, line in enumerate(lines):
+        for i, stripped_line in enumerate(source.stripped):
             # 跳过空行和只有空格的行
-            stripped_line = line.strip()
             if not stripped_line:
                 continue
             
             # 计算缩进空格数
-            indent_count = len(line) - len(line.lstrip(' '))
+            indent_count = source.indents[i]
             
             # 对于缩进为0的行（如类定义、函数定义的第一行），不需要检查是否为倍数
             if indent_count > 0 and indent_count % expected_indent != 0:
@@ -356,6 +347,20 @@ class BaseParser:
         
         return violations
     
+    # 辅助方法：一次遍历提取各类名称
+    def _extract_facts(self, file_content):
+        """按extraction_plan提取函数、变量、类、常量等名称，注释和字符串中的内容不参与匹配
+
+        Returns:
+            dict: 类别 -> [{'name': 名称, 'line': 行号}, ...]
+        """
+        lines = SourceBuffer.wrap(file_content).lexed(self.lexer_language).code_lines
+        return self.extraction_plan.run(lines, self._extraction_context(lines))
+    
+    def _extraction_context(self, lines):
+        """提取名称时传给各模式的附加信息，由需要跨行状态的子类实现"""
+        return None
+    
     # 辅助方法：提取函数和变量名称
     def _extract_names(self, parsed_data):
         """从解析后的数据中提取函数和变量名称"""
@@ -369,4 +374,4 @@ class BaseParser:
         
     def set_rules(self, rules):
         """动态设置规则"""
-        self.rules = rules
\ No newline at end of file
+        self.rules = rules
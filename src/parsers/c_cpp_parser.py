@@ -5,23 +5,60 @@ import re
 import subprocess
 import logging
 from src.parsers.base_parser import BaseParser
+from src.core.naming import compile_naming_patterns
+from src.parsers.source_buffer import SourceBuffer
+from src.parsers.extraction import ExtractionPlan, Extractor, is_not_upper
+from src.core import profiling
 
 # 创建logger实例
 logger = logging.getLogger(__name__)
 
+
+def _is_class_line(line):
+    """类成员函数声明所在的行（在.h文件中）"""
+    return 'class' in line or 'struct' in line
+
+
+def _is_function_line(line):
+    """函数定义行"""
+    return '(' in line and ')' in line and ('{' in line or ';' in line)
+
+
+# 名称提取模式
+EXTRACTION_PLAN = ExtractionPlan(('functions', 'variables', 'classes', 'constants'), [
+    # 函数声明和定义（简化版），这是一个复杂的问题，实际应用中可能需要更复杂的解析器
+    Extractor('functions', r'(\w+(?:\s*<[^>]*>)?\s+)+(\w+)\s*\([^)]*\)\s*(?:const\s*)?\{?',
+              group=2, required=('(', ')'), skip_line=_is_class_line),
+    # 简单变量声明（简化版），跳过函数定义行，排除常量
+    Extractor('variables', r'(\w+(?:\s*<[^>]*>)?(?:\s+\*)?\s+)+([a-z_]\w*)\s*(?:=|;)',
+              group=2, required=(('=', ';'),), skip_line=_is_function_line, accept=is_not_upper),
+    # 数组声明
+    Extractor('variables', r'(\w+(?:\s*<[^>]*>)?\s+)+([a-z_]\w*)\s*\[[^\]]*\]\s*(?:=|;)',
+              group=2, required=('[', ']', ('=', ';')), skip_line=_is_function_line, accept=is_not_upper),
+    # 类和结构体声明
+    Extractor('classes', r'(class|struct)\s+(\w+)', group=2, required=(('class', 'struct'),)),
+    # const常量
+    Extractor('constants', r'const\s+(\w+(?:\s*<[^>]*>)?(?:\s+\*)?)\s+([A-Z_][A-Z0-9_]*)\s*=',
+              group=-1, required=('const', '=')),
+    # #define常量
+    Extractor('constants', r'#define\s+([A-Z_][A-Z0-9_]*)', required=('#define',))
+])
+
 class CCppParser(BaseParser):
     def __init__(self, ruleset):
         super().__init__(ruleset)
         self.supported_extensions = ['.c', '.cc', '.cpp', '.cxx', '.h', '.hh', '.hpp', '.hxx']
         self.language_name = "C/C++"
+        self.lexer_language = 'cpp'
+        self.extraction_plan = EXTRACTION_PLAN
         
         # 根据规则集设置具体的检查规则
-        self.naming_patterns = {
+        self.naming_patterns = compile_naming_patterns({
             'function': self.rules.get('function_naming', '^[a-z][a-zA-Z0-9]*$'),  # 小驼峰或下划线风格
             'variable': self.rules.get('variable_naming', '^[a-z][a-zA-Z0-9]*$|^[a-z_][a-z0-9_]*$'),  # 小驼峰或下划线风格
             'class': self.rules.get('class_naming', '^[A-Z][a-zA-Z0-9]*$'),  # 大驼峰
             'constant': self.rules.get('constant_naming', '^[A-Z_][A-Z0-9_]*$')  # 全大写加下划线
-        }
+        })
         
         self.max_line_length = self.rules.get('max_line_length', 120)
         self.expected_indent = self.rules.get('expected_indent', 4)
@@ -31,10 +68,11 @@ class CCppParser(BaseParser):
         """解析C/C++代码，提取基本信息"""
         try:
             # 提取函数、变量、类和常量
-            functions = self._extract_functions(file_content)
-            variables = self._extract_variables(file_content)
-            classes = self._extract_classes(file_content)
-            constants = self._extract_constants(file_content)
+            facts = self._extract_facts(file_content)
+            functions = facts['functions']
+            variables = facts['variables']
+            classes = facts['classes']
+            constants = facts['constants']
             
             return {
                 'functions': functions,
@@ -154,104 +192,11 @@ class CCppParser(BaseParser):
         
         return violations
     
-    def _extract_functions(self, file_content):
-        """提取C/C++中的函数"""
-        functions = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配函数声明和定义（简化版）
-        # 这是一个复杂的问题，实际应用中可能需要更复杂的解析器
-        func_pattern = re.compile(r'(\w+(?:\s*<[^>]*>)?\s+)+(\w+)\s*\([^)]*\)\s*(?:const\s*)?\{?')
-        
-        for i, line in enumerate(lines):
-            matches = func_pattern.finditer(line)
-            for match in matches:
-                # 排除类成员函数声明（在.h文件中）
-                if 'class' not in line and 'struct' not in line:
-                    functions.append({
-                        'name': match.group(2),
-                        'line': i + 1
-                    })
-        
-        return functions
-    
-    def _extract_variables(self, file_content):
-        """提取C/C++中的变量"""
-        variables = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配变量声明（简化版）
-        var_patterns = [
-            # 简单变量声明
-            re.compile(r'(\w+(?:\s*<[^>]*>)?(?:\s+\*)?\s+)+([a-z_]\w*)\s*(?:=|;)'),
-            # 数组声明
-            re.compile(r'(\w+(?:\s*<[^>]*>)?\s+)+([a-z_]\w*)\s*\[[^\]]*\]\s*(?:=|;)')
-        ]
-        
-        for i, line in enumerate(lines):
-            # 跳过函数定义行
-            if '(' in line and ')' in line and ('{' in line or ';' in line):
-                continue
-            
-            for pattern in var_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    # 排除常量
-                    if not match.group(2).isupper():
-                        variables.append({
-                            'name': match.group(2),
-                            'line': i + 1
-                        })
-        
-        return variables
-    
-    def _extract_classes(self, file_content):
-        """提取C/C++中的类和结构体"""
-        classes = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配类和结构体声明
-        class_pattern = re.compile(r'(class|struct)\s+(\w+)')
-        
-        for i, line in enumerate(lines):
-            matches = class_pattern.finditer(line)
-            for match in matches:
-                classes.append({
-                    'name': match.group(2),
-                    'line': i + 1
-                })
-        
-        return classes
-    
-    def _extract_constants(self, file_content):
-        """提取C/C++中的常量"""
-        constants = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配常量定义
-        const_patterns = [
-            # const常量
-            re.compile(r'const\s+(\w+(?:\s*<[^>]*>)?(?:\s+\*)?)\s+([A-Z_][A-Z0-9_]*)\s*='),
-            # #define常量
-            re.compile(r'#define\s+([A-Z_][A-Z0-9_]*)')
-        ]
-        
-        for i, line in enumerate(lines):
-            for pattern in const_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    constants.append({
-                        'name': match.group(len(match.groups())),
-                        'line': i + 1
-                    })
-        
-        return constants
-    
     def _check_include_order(self, file_content):
         """检查头文件包含顺序是否符合规范"""
         # 提取头文件包含顺序
         includes = []
-        lines = file_content.split('\n')
+        lines = SourceBuffer.wrap(file_content).lines
         
         for i, line in enumerate(lines):
             if line.startswith('#include'):
@@ -298,7 +243,9 @@ class CCppParser(BaseParser):
     def _check_brace_style(self, file_content):
         """检查大括号风格是否规范"""
         violations = []
-        lines = file_content.split('\n')
+        source = SourceBuffer.wrap(file_content)
+        lines = source.lines
+        stripped = source.stripped
         
         # 检查大括号风格（Google C++ Style Guide推荐的风格）
         for i, line in enumerate(lines):
@@ -314,7 +261,7 @@ class CCppParser(BaseParser):
                 if match and i + 1 < len(lines):
                     # Google风格要求大括号在同一行
                     # 检查是否有大括号单独占一行的情况
-                    stripped_next_line = lines[i + 1].strip()
+                    stripped_next_line = stripped[i + 1]
                     if stripped_next_line == '{':
                         violations.append({
                             'type': '大括号风格不规范',
@@ -336,23 +283,24 @@ class CCppParser(BaseParser):
         return None
     
     # 重写基类的扫描方法，增加对cpplint的集成支持
-    def scan(self, file_path):
+    def scan(self, file_path, content=None):
         """扫描C/C++文件，集成cpplint的检查结果"""
         try:
             # 调用基类的扫描方法获取基本违规信息
-            violations = super().scan(file_path)
+            violations = super().scan(file_path, content)
             
             # 尝试使用cpplint进行额外检查
             try:
-                # 检查是否安装了cpplint
-                subprocess.run(['cpplint', '--version'], check=True, capture_output=True)
-                
-                # 运行cpplint检查
-                result = subprocess.run(
-                    ['cpplint', '--filter=-build/include_subdir,-build/header_guard', file_path],
-                    capture_output=True,
-                    text=True
-                )
+                with profiling.section('external_tools', 'cpplint'):
+                    # 检查是否安装了cpplint
+                    subprocess.run(['cpplint', '--version'], check=True, capture_output=True)
+                    
+                    # 运行cpplint检查
+                    result = subprocess.run(
+                        ['cpplint', '--filter=-build/include_subdir,-build/header_guard', file_path],
+                        capture_output=True,
+                        text=True
+                    )
                 
                 # 解析cpplint输出
                 if result.stdout:
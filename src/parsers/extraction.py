@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于正则表达式的名称提取
+各解析器把函数、变量、类、常量等的提取模式声明为一个ExtractionPlan，提取时只遍历一次文件的各行，
+每一行依次交给各个模式，匹配结果按模式所属的类别放入对应的列表。
+
+每个模式可以声明一组必需的关键字（例如'function'、'class'、'#define'），行中缺少任何一个时
+直接跳过该模式，不运行正则表达式；大部分行不包含任何关键字，只需做几次子串查找。
+各模式仍然单独匹配，同一位置被多个模式匹配时（例如JavaScript的const箭头函数既是函数也是常量）
+每个模式都会产生结果，与逐个模式提取的结果和顺序相同
+"""
+
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class Extractor:
+    """一个提取模式"""
+
+    __slots__ = ('fact', 'pattern', 'group', 'required', 'skip_line', 'accept', 'skip_indent')
+
+    def __init__(self, fact, pattern, group=1, required=(), skip_line=None, accept=None, skip_indent=False):
+        """创建提取模式
+
+        Args:
+            fact: 结果所属的类别，例如'functions'
+            pattern: 正则表达式（字符串或已编译的模式），对每一行调用finditer()
+            group: 名称所在的捕获组，-1表示最后一个捕获组
+            required: 模式能够匹配的行必须包含的关键字，每一项是一个字符串，
+                      或者是几个字符串组成的元组（包含其中任意一个即可）
+            skip_line: 可选，skip_line(line)为真时跳过该行
+            accept: 可选，accept(name, line, index, context)为假时丢弃该匹配，
+                    index为行的下标，context为ExtractionPlan.run()的context参数
+            skip_indent: 是否在去掉行首空白后的行上匹配。以\\s*开头、之后的部分不能匹配空白的模式，
+                         在去掉行首空白前后得到的名称相同，而行首的\\s*和后面的可选分组在长缩进上会大量回溯
+        """
+        self.fact = fact
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.group = self.pattern.groups if group == -1 else group
+        self.required = tuple(required)
+        self.skip_line = skip_line
+        self.accept = accept
+        self.skip_indent = skip_indent
+
+    def may_match(self, line):
+        """行中是否包含全部必需的关键字"""
+        for keyword in self.required:
+            if isinstance(keyword, str):
+                if keyword not in line:
+                    return False
+            elif not any(alternative in line for alternative in keyword):
+                return False
+        return True
+
+
+class ExtractionPlan:
+    """一种语言的全部提取模式"""
+
+    def __init__(self, facts, extractors):
+        """创建提取计划
+
+        Args:
+            facts: 结果中的类别名称，没有任何匹配的类别也会返回空列表
+            extractors: Extractor列表，同一类别中的结果按行号排列，同一行内按模式在列表中的顺序排列
+        """
+        self.facts = tuple(facts)
+        self.extractors = tuple(extractors)
+        for extractor in self.extractors:
+            if extractor.fact not in self.facts:
+                raise ValueError(f"提取模式的类别 {extractor.fact} 不在 {self.facts} 中")
+
+    def run(self, lines, context=None):
+        """遍历一次各行，提取全部类别的名称
+
+        Args:
+            lines: 文件的各行
+            context: 传给各模式accept()的附加信息
+
+        Returns:
+            dict: 类别 -> [{'name': 名称, 'line': 行号}, ...]
+        """
+        results = {fact: [] for fact in self.facts}
+        extractors = [(extractor, results[extractor.fact]) for extractor in self.extractors]
+        for index, line in enumerate(lines):
+            for extractor, found in extractors:
+                if not extractor.may_match(line):
+                    continue
+                if extractor.skip_line is not None and extractor.skip_line(line):
+                    continue
+                text = line.lstrip() if extractor.skip_indent else line
+                for match in extractor.pattern.finditer(text):
+                    name = match.group(extractor.group)
+                    if extractor.accept is None or extractor.accept(name, line, index, context):
+                        found.append({
+                            'name': name,
+                            'line': index + 1
+                        })
+        return results
+
+
+def is_not_upper(name, line, index, context):
+    """排除全大写的名称（常量）"""
+    return not name.isupper()
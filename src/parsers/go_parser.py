@@ -5,23 +5,51 @@ import re
 import subprocess
 import logging
 from src.parsers.base_parser import BaseParser
+from src.core.naming import compile_naming_patterns
+from src.parsers.source_buffer import SourceBuffer
+from src.parsers.extraction import ExtractionPlan, Extractor
 
 # 创建logger实例
 logger = logging.getLogger(__name__)
 
+
+def _in_const_block_or_upper(name, line, index, const_block_flags):
+    """const块内的声明必须是大写的"""
+    return not const_block_flags[index] or name.isupper()
+
+
+# 名称提取模式
+EXTRACTION_PLAN = ExtractionPlan(('functions', 'variables', 'types', 'constants'), [
+    # 函数声明
+    Extractor('functions', r'func\s+(?:\(\w+\s+\*?\w+\)\s+)?([a-zA-Z0-9_]+)\s*\(', required=('func', '(')),
+    # var 声明（简化版）
+    Extractor('variables', r'var\s+([a-z][a-z0-9]*)\s+(?:[\w\[\]\*]+)(?:\s*=|;)', required=('var', ('=', ';'))),
+    # 短变量声明
+    Extractor('variables', r'([a-z][a-z0-9]*)\s*:=', required=(':=',)),
+    # 类型定义
+    Extractor('types', r'type\s+([A-Z][a-zA-Z0-9]*)\s+', required=('type',)),
+    # const 声明
+    Extractor('constants', r'const\s+([A-Z_][A-Z0-9_]*)\s*=', required=('const', '='),
+              accept=_in_const_block_or_upper),
+    # const 块内声明
+    Extractor('constants', r'\s+([A-Z_][A-Z0-9_]*)\s*=', required=('=',), accept=_in_const_block_or_upper)
+])
+
 class GoParser(BaseParser):
     def __init__(self, ruleset):
         super().__init__(ruleset)
         self.supported_extensions = ['.go']
         self.language_name = "Go"
+        self.lexer_language = 'go'
+        self.extraction_plan = EXTRACTION_PLAN
         
         # 根据规则集设置具体的检查规则
-        self.naming_patterns = {
+        self.naming_patterns = compile_naming_patterns({
             'function': self.rules.get('function_naming', '^[A-Z][a-zA-Z0-9]*$|^[a-z][a-zA-Z0-9]*$'),  # 大驼峰(导出)或小驼峰(非导出)
             'variable': self.rules.get('variable_naming', '^[a-z][a-z0-9]*$'),  # 小驼峰
             'type': self.rules.get('type_naming', '^[A-Z][a-zA-Z0-9]*$'),  # 大驼峰
             'constant': self.rules.get('constant_naming', '^[A-Z_][A-Z0-9_]*$')  # 全大写加下划线
-        }
+        })
         
         self.max_line_length = self.rules.get('max_line_length', 120)
         self.expected_indent = self.rules.get('expected_indent', 4)
@@ -31,10 +59,11 @@ class GoParser(BaseParser):
         """解析Go代码，提取基本信息"""
         try:
             # 提取函数、变量、类型和常量
-            functions = self._extract_functions(file_content)
-            variables = self._extract_variables(file_content)
-            types = self._extract_types(file_content)
-            constants = self._extract_constants(file_content)
+            facts = self._extract_facts(file_content)
+            functions = facts['functions']
+            variables = facts['variables']
+            types = facts['types']
+            constants = facts['constants']
             
             return {
                 'functions': functions,
@@ -148,104 +177,6 @@ class GoParser(BaseParser):
         
         return violations
     
-    def _extract_functions(self, file_content):
-        """提取Go中的函数"""
-        functions = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配函数声明
-        func_pattern = re.compile(r'func\s+(?:\(\w+\s+\*?\w+\)\s+)?([a-zA-Z0-9_]+)\s*\(')
-        
-        for i, line in enumerate(lines):
-            matches = func_pattern.finditer(line)
-            for match in matches:
-                functions.append({
-                    'name': match.group(1),
-                    'line': i + 1
-                })
-        
-        return functions
-    
-    def _extract_variables(self, file_content):
-        """提取Go中的变量"""
-        variables = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配变量声明（简化版）
-        var_patterns = [
-            # var 声明
-            re.compile(r'var\s+([a-z][a-z0-9]*)\s+(?:[\w\[\]\*]+)(?:\s*=|;)'),
-            # 短变量声明
-            re.compile(r'([a-z][a-z0-9]*)\s*:=')
-        ]
-        
-        for i, line in enumerate(lines):
-            for pattern in var_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    variables.append({
-                        'name': match.group(1),
-                        'line': i + 1
-                    })
-        
-        return variables
-    
-    def _extract_types(self, file_content):
-        """提取Go中的类型定义"""
-        types = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配类型定义
-        type_pattern = re.compile(r'type\s+([A-Z][a-zA-Z0-9]*)\s+')
-        
-        for i, line in enumerate(lines):
-            matches = type_pattern.finditer(line)
-            for match in matches:
-                types.append({
-                    'name': match.group(1),
-                    'line': i + 1
-                })
-        
-        return types
-    
-    def _extract_constants(self, file_content):
-        """提取Go中的常量"""
-        constants = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配常量定义
-        const_patterns = [
-            # const 声明
-            re.compile(r'const\s+([A-Z_][A-Z0-9_]*)\s*='),
-            # const 块内声明
-            re.compile(r'\s+([A-Z_][A-Z0-9_]*)\s*=')
-        ]
-        
-        # 标记是否在const块内
-        in_const_block = False
-        
-        for i, line in enumerate(lines):
-            stripped_line = line.strip()
-            
-            # 检查是否进入const块
-            if stripped_line.startswith('const') and ('=' not in stripped_line or '(' in stripped_line):
-                in_const_block = True
-            # 检查是否离开const块
-            elif in_const_block and stripped_line == '}':
-                in_const_block = False
-            
-            for pattern in const_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    # 如果是const块内的声明，确保它是大写的
-                    if not in_const_block or match.group(1).isupper():
-                        constants.append({
-                            'name': match.group(1),
-                            'line': i + 1
-                        })
-        
-        return constants
-    
     def _check_unused_imports(self, file_content):
         """检查未使用的导入"""
         violations = []
@@ -262,10 +193,29 @@ class GoParser(BaseParser):
         
         return violations
     
+    def _extraction_context(self, lines):
+        """标记各行是否在const块内，const块内的声明只提取大写的名称"""
+        const_block_flags = []
+        in_const_block = False
+        for line in lines:
+            stripped_line = line.strip()
+            
+            # 检查是否进入const块
+            if stripped_line.startswith('const') and ('=' not in stripped_line or '(' in stripped_line):
+                in_const_block = True
+            # 检查是否离开const块
+            elif in_const_block and stripped_line == '}':
+                in_const_block = False
+            const_block_flags.append(in_const_block)
+        
+        return const_block_flags
+    
     def _check_brace_style(self, file_content):
         """检查大括号风格是否规范"""
         violations = []
-        lines = file_content.split('\n')
+        source = SourceBuffer.wrap(file_content)
+        lines = source.lines
+        stripped = source.stripped
         
         # Go语言要求大括号在同一行（K&R风格）
         for i, line in enumerate(lines):
@@ -276,10 +226,10 @@ class GoParser(BaseParser):
             ]
             
             for pattern in brace_patterns:
-                match = pattern.match(line.strip())
+                match = pattern.match(stripped[i])
                 if match:
                     # 检查下一行是否以{开头
-                    if i + 1 < len(lines) and lines[i + 1].strip().startswith('{'):
+                    if i + 1 < len(lines) and stripped[i + 1].startswith('{'):
                         violations.append({
                             'type': '大括号风格不规范',
                             'message': 'Go语言要求将大括号放在同一行',
@@ -289,11 +239,11 @@ class GoParser(BaseParser):
         return violations
     
     # 重写基类的扫描方法，增加对go fmt和go vet的集成支持
-    def scan(self, file_path):
+    def scan(self, file_path, content=None):
         """扫描Go文件，集成go fmt和go vet的检查结果"""
         try:
             # 调用基类的扫描方法获取基本违规信息
-            violations = super().scan(file_path)
+            violations = super().scan(file_path, content)
             
             # 尝试使用go工具链进行额外检查
             try:
@@ -5,24 +5,63 @@ import re
 import subprocess
 import logging
 from src.parsers.base_parser import BaseParser
+from src.core.naming import compile_naming_patterns
+from src.parsers.source_buffer import SourceBuffer
+from src.parsers.extraction import ExtractionPlan, Extractor
 
 # 创建logger实例
 logger = logging.getLogger(__name__)
 
+
+def _is_method_line(line):
+    """方法定义行"""
+    return '(' in line and ')' in line and ('{' in line or ';' in line)
+
+
+def _is_not_final_upper(name, line, index, context):
+    """排除final修饰的全大写名称（常量）"""
+    return 'final' not in line or not name.isupper()
+
+
+# 名称提取模式
+EXTRACTION_PLAN = ExtractionPlan(('functions', 'variables', 'classes', 'constants', 'packages'), [
+    # 方法声明，方法名在第五个捕获组
+    Extractor('functions', r'\s*(public|protected|private|static|final|abstract)?\s*(public|protected|private|static|final|abstract)?\s*(public|protected|private|static|final|abstract)?\s*(\w+(?:\<[^>]*\>)?(?:\[\])?)\s+([a-zA-Z0-9_]+)\s*\(',
+              group=5, required=('(',), skip_indent=True),
+    # 成员变量和局部变量（简化版），跳过方法定义行
+    Extractor('variables', r'\s*(public|protected|private|static|final|volatile|transient)?\s*(public|protected|private|static|final|volatile|transient)?\s*(\w+(?:\<[^>]*\>)?(?:\[\])?)\s+([a-z][a-zA-Z0-9_]*)\s*(?:=|;)',
+              group=-1, required=(('=', ';'),), skip_line=_is_method_line, accept=_is_not_final_upper,
+              skip_indent=True),
+    # 数组声明
+    Extractor('variables', r'\s*(\w+(?:\<[^>]*\>)?(?:\[\])?)\s+([a-z][a-zA-Z0-9_]*)\s*\[[^\]]*\]\s*(?:=|;)',
+              group=-1, required=('[', ']', ('=', ';')), skip_line=_is_method_line, accept=_is_not_final_upper,
+              skip_indent=True),
+    # 类和接口声明
+    Extractor('classes', r'\s*(public|protected|private|abstract|final)?\s*(class|interface|enum)\s+([A-Z][a-zA-Z0-9]*)',
+              group=3, required=(('class', 'interface', 'enum'),), skip_indent=True),
+    # 常量定义
+    Extractor('constants', r'\s*(public|protected|private)?\s*static\s+final\s+(\w+(?:\<[^>]*\>)?(?:\[\])?)\s+([A-Z_][A-Z0-9_]*)\s*=',
+              group=3, required=('static', 'final', '='), skip_indent=True),
+    # 包声明
+    Extractor('packages', r'package\s+([a-zA-Z0-9_.]+);', required=('package', ';'))
+])
+
 class JavaParser(BaseParser):
     def __init__(self, ruleset):
         super().__init__(ruleset)
         self.supported_extensions = ['.java']
         self.language_name = "Java"
+        self.lexer_language = 'java'
+        self.extraction_plan = EXTRACTION_PLAN
         
         # 根据规则集设置具体的检查规则
-        self.naming_patterns = {
+        self.naming_patterns = compile_naming_patterns({
             'function': self.rules.get('function_naming', '^[a-z][a-zA-Z0-9]*$'),  # 小驼峰
             'variable': self.rules.get('variable_naming', '^[a-z][a-zA-Z0-9]*$'),  # 小驼峰
             'class': self.rules.get('class_naming', '^[A-Z][a-zA-Z0-9]*$'),  # 大驼峰
             'constant': self.rules.get('constant_naming', '^[A-Z_][A-Z0-9_]*$'),  # 全大写加下划线
             'package': self.rules.get('package_naming', '^[a-z]+(\.[a-z0-9]+)*$')  # 小写字母和数字
-        }
+        })
         
         self.max_line_length = self.rules.get('max_line_length', 120)
         self.expected_indent = self.rules.get('expected_indent', 4)
@@ -32,11 +71,12 @@ class JavaParser(BaseParser):
         """解析Java代码，提取基本信息"""
         try:
             # 提取函数、变量、类和常量
-            functions = self._extract_functions(file_content)
-            variables = self._extract_variables(file_content)
-            classes = self._extract_classes(file_content)
-            constants = self._extract_constants(file_content)
-            packages = self._extract_packages(file_content)
+            facts = self._extract_facts(file_content)
+            functions = facts['functions']
+            variables = facts['variables']
+            classes = facts['classes']
+            constants = facts['constants']
+            packages = facts['packages']
             
             return {
                 'functions': functions,
@@ -167,116 +207,12 @@ class JavaParser(BaseParser):
         
         return violations
     
-    def _extract_functions(self, file_content):
-        """提取Java中的方法"""
-        functions = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配方法声明
-        func_pattern = re.compile(r'\s*(public|protected|private|static|final|abstract)?\s*(public|protected|private|static|final|abstract)?\s*(public|protected|private|static|final|abstract)?\s*(\w+(?:\<[^>]*\>)?(?:\[\])?)\s+([a-zA-Z0-9_]+)\s*\(')
-        
-        for i, line in enumerate(lines):
-            matches = func_pattern.finditer(line)
-            for match in matches:
-                # 提取方法名（第五个捕获组）
-                func_name = match.group(5)
-                functions.append({
-                    'name': func_name,
-                    'line': i + 1
-                })
-        
-        return functions
-    
-    def _extract_variables(self, file_content):
-        """提取Java中的变量"""
-        variables = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配变量声明（简化版）
-        var_patterns = [
-            # 成员变量和局部变量
-            re.compile(r'\s*(public|protected|private|static|final|volatile|transient)?\s*(public|protected|private|static|final|volatile|transient)?\s*(\w+(?:\<[^>]*\>)?(?:\[\])?)\s+([a-z][a-zA-Z0-9_]*)\s*(?:=|;)'),
-            # 数组声明
-            re.compile(r'\s*(\w+(?:\<[^>]*\>)?(?:\[\])?)\s+([a-z][a-zA-Z0-9_]*)\s*\[[^\]]*\]\s*(?:=|;)')
-        ]
-        
-        for i, line in enumerate(lines):
-            # 跳过方法定义行
-            if '(' in line and ')' in line and ('{' in line or ';' in line):
-                continue
-            
-            for pattern in var_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    # 提取变量名（最后一个捕获组）
-                    var_name = match.group(len(match.groups()))
-                    # 排除常量
-                    if 'final' not in line or not var_name.isupper():
-                        variables.append({
-                            'name': var_name,
-                            'line': i + 1
-                        })
-        
-        return variables
-    
-    def _extract_classes(self, file_content):
-        """提取Java中的类和接口"""
-        classes = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配类和接口声明
-        class_pattern = re.compile(r'\s*(public|protected|private|abstract|final)?\s*(class|interface|enum)\s+([A-Z][a-zA-Z0-9]*)')
-        
-        for i, line in enumerate(lines):
-            matches = class_pattern.finditer(line)
-            for match in matches:
-                classes.append({
-                    'name': match.group(3),
-                    'line': i + 1
-                })
-        
-        return classes
-    
-    def _extract_constants(self, file_content):
-        """提取Java中的常量"""
-        constants = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配常量定义
-        const_pattern = re.compile(r'\s*(public|protected|private)?\s*static\s+final\s+(\w+(?:\<[^>]*\>)?(?:\[\])?)\s+([A-Z_][A-Z0-9_]*)\s*=')
-        
-        for i, line in enumerate(lines):
-            matches = const_pattern.finditer(line)
-            for match in matches:
-                constants.append({
-                    'name': match.group(3),
-                    'line': i + 1
-                })
-        
-        return constants
-    
-    def _extract_packages(self, file_content):
-        """提取Java中的包声明"""
-        packages = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配包声明
-        package_pattern = re.compile(r'package\s+([a-zA-Z0-9_.]+);')
-        
-        for i, line in enumerate(lines):
-            matches = package_pattern.finditer(line)
-            for match in matches:
-                packages.append({
-                    'name': match.group(1),
-                    'line': i + 1
-                })
-        
-        return packages
-    
     def _check_brace_style(self, file_content):
         """检查大括号风格是否规范"""
         violations = []
-        lines = file_content.split('\n')
+        source = SourceBuffer.wrap(file_content)
+        lines = source.lines
+        stripped = source.stripped
         
         # 检查大括号风格（Google Java Style Guide推荐的风格）
         for i, line in enumerate(lines):
@@ -288,11 +224,11 @@ class JavaParser(BaseParser):
             ]
             
             for pattern in brace_patterns:
-                match = pattern.match(line.strip())
+                match = pattern.match(stripped[i])
                 if match and i + 1 < len(lines):
                     # Google风格要求大括号在同一行
                     # 检查是否有大括号单独占一行的情况
-                    stripped_next_line = lines[i + 1].strip()
+                    stripped_next_line = stripped[i + 1]
                     if stripped_next_line == '{':
                         violations.append({
                             'type': '大括号风格不规范',
@@ -306,7 +242,7 @@ class JavaParser(BaseParser):
         """检查import语句顺序是否符合规范"""
         # 提取import语句
         imports = []
-        lines = file_content.split('\n')
+        lines = SourceBuffer.wrap(file_content).lines
         
         for i, line in enumerate(lines):
             if line.startswith('import'):
@@ -352,11 +288,11 @@ class JavaParser(BaseParser):
         return None
     
     # 重写基类的扫描方法，增加对Checkstyle的集成支持
-    def scan(self, file_path):
+    def scan(self, file_path, content=None):
         """扫描Java文件，集成Checkstyle的检查结果"""
         try:
             # 调用基类的扫描方法获取基本违规信息
-            violations = super().scan(file_path)
+            violations = super().scan(file_path, content)
             
             # 尝试使用Checkstyle进行额外检查
             try:
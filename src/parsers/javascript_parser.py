@@ -7,15 +7,35 @@ import subprocess
 import sys
 import logging
 from src.parsers.base_parser import BaseParser
+from src.core.naming import compile_naming_patterns
+from src.parsers.source_buffer import SourceBuffer
+from src.parsers.extraction import ExtractionPlan, Extractor, is_not_upper
 
 # 创建logger实例
 logger = logging.getLogger(__name__)
 
+# 名称提取模式
+EXTRACTION_PLAN = ExtractionPlan(('functions', 'variables', 'classes', 'constants'), [
+    # 函数声明: function funcName(...)
+    Extractor('functions', r'function\s+([a-zA-Z0-9_$]+)\s*\(', required=('function', '(')),
+    # 箭头函数表达式: const funcName = (...) => {}
+    Extractor('functions', r'const\s+([a-zA-Z0-9_$]+)\s*=\s*\([^)]*\)\s*=>', required=('const', '=>')),
+    # 变量声明，排除全大写的常量
+    Extractor('variables', r'var\s+([a-zA-Z0-9_$]+)', required=('var',), accept=is_not_upper),
+    Extractor('variables', r'let\s+([a-zA-Z0-9_$]+)', required=('let',), accept=is_not_upper),
+    # 类声明
+    Extractor('classes', r'class\s+([a-zA-Z0-9_$]+)', required=('class',)),
+    # 常量声明
+    Extractor('constants', r'const\s+([A-Z_][A-Z0-9_]*)', required=('const',))
+])
+
 class JavascriptParser(BaseParser):
     def __init__(self, ruleset):
         super().__init__(ruleset)
         self.supported_extensions = ['.js', '.jsx', '.ts', '.tsx']
         self.language_name = "JavaScript/TypeScript"
+        self.lexer_language = 'javascript'
+        self.extraction_plan = EXTRACTION_PLAN
         
         # 现在语言名称已设置，可以加载规则了
         self.rules = self._load_ruleset(self._ruleset_name)
@@ -26,12 +46,12 @@ class JavascriptParser(BaseParser):
             self.rules = self._get_default_rules()
         
         # 根据规则集设置具体的检查规则
-        self.naming_patterns = {
+        self.naming_patterns = compile_naming_patterns({
             'function': self.rules.get('function_naming', '^(function\s+)?[a-z][a-zA-Z0-9]*$|^(function\s+)?[_$][a-zA-Z0-9]*$'),  # 小驼峰或下划线/美元符号开头
             'variable': self.rules.get('variable_naming', '^[a-z][a-zA-Z0-9]*$|^_[a-zA-Z0-9]*$'),  # 小驼峰或下划线开头
             'class': self.rules.get('class_naming', '^[A-Z][a-zA-Z0-9]*$'),  # 大驼峰
             'constant': self.rules.get('constant_naming', '^[A-Z_][A-Z0-9_]*$')  # 全大写加下划线
-        }
+        })
         
         self.max_line_length = self.rules.get('max_line_length', 120)
         self.expected_indent = self.rules.get('expected_indent', 2)  # JavaScript通常使用2空格缩进
@@ -41,10 +61,11 @@ class JavascriptParser(BaseParser):
         """解析JavaScript代码，提取基本信息"""
         try:
             # 提取函数、变量、类和常量
-            functions = self._extract_functions(file_content)
-            variables = self._extract_variables(file_content)
-            classes = self._extract_classes(file_content)
-            constants = self._extract_constants(file_content)
+            facts = self._extract_facts(file_content)
+            functions = facts['functions']
+            variables = facts['variables']
+            classes = facts['classes']
+            constants = facts['constants']
             
             return {
                 'functions': functions,
@@ -160,90 +181,6 @@ class JavascriptParser(BaseParser):
         
         return violations
     
-    def _extract_functions(self, file_content):
-        """提取JavaScript中的函数"""
-        functions = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配函数声明和函数表达式
-        func_patterns = [
-            # 函数声明: function funcName(...)
-            re.compile(r'function\s+([a-zA-Z0-9_$]+)\s*\('),
-            # 箭头函数表达式: const funcName = (...) => {}
-            re.compile(r'const\s+([a-zA-Z0-9_$]+)\s*=\s*\([^)]*\)\s*=>')
-        ]
-        
-        for i, line in enumerate(lines):
-            for pattern in func_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    functions.append({
-                        'name': match.group(1),
-                        'line': i + 1
-                    })
-        
-        return functions
-    
-    def _extract_variables(self, file_content):
-        """提取JavaScript中的变量"""
-        variables = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配变量声明
-        var_patterns = [
-            re.compile(r'var\s+([a-zA-Z0-9_$]+)'),
-            re.compile(r'let\s+([a-zA-Z0-9_$]+)')
-        ]
-        
-        for i, line in enumerate(lines):
-            for pattern in var_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    # 排除全大写的常量
-                    if not match.group(1).isupper():
-                        variables.append({
-                            'name': match.group(1),
-                            'line': i + 1
-                        })
-        
-        return variables
-    
-    def _extract_classes(self, file_content):
-        """提取JavaScript中的类"""
-        classes = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配类声明
-        class_pattern = re.compile(r'class\s+([a-zA-Z0-9_$]+)')
-        
-        for i, line in enumerate(lines):
-            matches = class_pattern.finditer(line)
-            for match in matches:
-                classes.append({
-                    'name': match.group(1),
-                    'line': i + 1
-                })
-        
-        return classes
-    
-    def _extract_constants(self, file_content):
-        """提取JavaScript中的常量"""
-        constants = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配常量声明
-        const_pattern = re.compile(r'const\s+([A-Z_][A-Z0-9_]*)')
-        
-        for i, line in enumerate(lines):
-            matches = const_pattern.finditer(line)
-            for match in matches:
-                constants.append({
-                    'name': match.group(1),
-                    'line': i + 1
-                })
-        
-        return constants
-    
     def _check_semicolon_usage(self, file_content):
         """检查分号使用是否规范"""
         # 首先检查规则集中是否要求使用分号
@@ -254,12 +191,10 @@ class JavascriptParser(BaseParser):
             return []
         
         violations = []
-        lines = file_content.split('\n')
         
         # 检查每行是否缺少分号（简化版）
-        for i, line in enumerate(lines):
+        for i, stripped_line in enumerate(SourceBuffer.wrap(file_content).stripped):
             # 跳过空行、注释行
-            stripped_line = line.strip()
             if not stripped_line or stripped_line.startswith('//') or stripped_line.startswith('/*'):
                 continue
             
@@ -280,7 +215,9 @@ class JavascriptParser(BaseParser):
     def _check_brace_style(self, file_content):
         """检查大括号风格是否规范"""
         violations = []
-        lines = file_content.split('\n')
+        source = SourceBuffer.wrap(file_content)
+        lines = source.lines
+        stripped = source.stripped
         
         # 检查大括号是否在同一行（K&R风格）
         for i, line in enumerate(lines):
@@ -290,10 +227,10 @@ class JavascriptParser(BaseParser):
             ]
             
             for pattern in brace_patterns:
-                match = pattern.match(line.strip())
+                match = pattern.match(stripped[i])
                 if match:
                     # 检查下一行是否以{开头
-                    if i + 1 < len(lines) and lines[i + 1].strip().startswith('{'):
+                    if i + 1 < len(lines) and stripped[i + 1].startswith('{'):
                         violations.append({
                             'type': '大括号风格不规范',
                             'message': '建议使用K&R风格：将大括号放在同一行',
@@ -303,11 +240,11 @@ class JavascriptParser(BaseParser):
         return violations
     
     # 重写基类的扫描方法，增加对ESLint的集成支持
-    def scan(self, file_path):
+    def scan(self, file_path, content=None):
         """扫描JavaScript文件，集成ESLint的检查结果"""
         try:
             # 调用基类的扫描方法获取基本违规信息
-            violations = super().scan(file_path)
+            violations = super().scan(file_path, content)
             
             # 尝试使用ESLint进行额外检查
             try:
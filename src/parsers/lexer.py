@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+注释和字符串的词法切分
+按语言一次扫描整个文件，得到注释和字符串字面量所在的区间，其余部分为代码。
+注释覆盖率、行长度检查和各解析器的名称提取共用同一份切分结果（见SourceBuffer.lexed()）。
+
+扫描时用一个只包含各种起始符号的正则表达式查找下一个注释或字符串的开头，
+再按类型查找它的结尾；所有正则表达式都由互不重叠的字符类组成，不会回溯，
+每个字符最多被检查常数次，耗时与文件大小成正比
+
+支持的语言:
+    python: # 注释，单引号、双引号和三引号字符串（包括前缀r、b、f等）
+    javascript: // 和 /* */ 注释，单引号、双引号字符串，模板字符串（包括嵌套的${...}），正则表达式字面量
+    cpp: // 和 /* */ 注释，字符串和字符字面量，原始字符串R"delim(...)delim"，# 为预处理指令
+    java: // 和 /* */ 注释，字符串和字符字面量，文本块\"\"\"...\"\"\"
+    go: // 和 /* */ 注释，字符串和rune字面量，反引号原始字符串
+    php: #、// 和 /* */ 注释（行注释在?>处结束），单引号、双引号和反引号字符串，heredoc和nowdoc
+    其他（None）: #、// 和 /* */ 注释，单引号和双引号字符串
+"""
+
+import re
+import bisect
+import logging
+from functools import cached_property
+
+logger = logging.getLogger(__name__)
+
+# 区间类型
+COMMENT = 'comment'
+STRING = 'string'
+
+# 单行字符串的内容：遇到引号、换行或文件结尾为止，反斜杠转义下一个字符（包括换行）
+_QUOTED_BODIES = {
+    quote: re.compile(r"[^%s\\\n]*(?:\\.[^%s\\\n]*)*" % (quote, quote), re.DOTALL)
+    for quote in ("'", '"', '`')
+}
+
+# 三引号字符串和Java文本块的内容：遇到三个连续的引号或文件结尾为止
+_TRIPLE_QUOTED_BODIES = {
+    quote: re.compile(r"[^%s\\]*(?:(?:\\.|%s(?!%s%s))[^%s\\]*)*" % ((quote,) * 5), re.DOTALL)
+    for quote in ("'", '"')
+}
+
+# Go原始字符串和PHP反引号字符串的内容：没有转义，遇到反引号为止
+_GO_RAW_BODY = re.compile(r"[^`]*")
+
+# 模板字符串的内容：遇到反引号、${或文件结尾为止
+_TEMPLATE_BODY = re.compile(r"[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*", re.DOTALL)
+
+# 正则表达式字面量的内容：遇到/或换行为止，字符类[...]中的/不结束字面量
+_REGEX_BODY = re.compile(r"[^/\\\[\n]*(?:(?:\\.|\[[^\]\\\n]*(?:\\.[^\]\\\n]*)*\]?)[^/\\\[\n]*)*")
+_REGEX_FLAGS = re.compile(r"[A-Za-z]*")
+
+# JavaScript中在这些字符之后出现的/是正则表达式的开头，而不是除号
+_REGEX_PRECEDING_CHARS = frozenset('(,=:[!&|?{};+-*%<>~^')
+_REGEX_PRECEDING_KEYWORDS = frozenset(('return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                                       'throw', 'case', 'do', 'else', 'yield', 'await'))
+
+# 各语言注释和字符串的起始符号，分组名称决定起始符号的类型
+_OPENERS = {
+    'python': re.compile(
+        r"(?P<line>#)"
+        r"|(?:(?<![\w])[rRbBuUfF]{1,2})?(?:(?P<triple>'''|\"\"\")|(?P<quote>['\"]))"
+    ),
+    'javascript': re.compile(
+        r"(?P<line>//)|(?P<block>/\*)|(?P<slash>/)|(?P<quote>['\"])|(?P<template>`)"
+    ),
+    'cpp': re.compile(
+        r"(?P<line>//)|(?P<block>/\*)"
+        r"|(?<![\w])(?:u8|[uUL])?R\"(?P<raw>[^()\\\s\"]{0,16})\("
+        r"|(?P<quote>\")|(?<![\w])(?:u8|[uUL])(?P<prefixed_char>')|(?<![\w])(?P<char>')"
+    ),
+    'java': re.compile(
+        r"(?P<line>//)|(?P<block>/\*)|(?P<triple>\"\"\")|(?P<quote>['\"])"
+    ),
+    'go': re.compile(
+        r"(?P<line>//)|(?P<block>/\*)|(?P<quote>['\"])|(?P<backtick>`)"
+    ),
+    'php': re.compile(
+        r"(?P<line>//|#(?!\[))|(?P<block>/\*)"
+        r"|(?P<heredoc><<<[ \t]*(?P<heredoc_quote>[\"']?)(?P<heredoc_name>[A-Za-z_]\w*)(?P=heredoc_quote)\r?\n)"
+        r"|(?P<quote>['\"])|(?P<backtick>`)"
+    ),
+    None: re.compile(
+        r"(?P<line>//|#)|(?P<block>/\*)|(?P<quote>['\"])"
+    )
+}
+
+# JavaScript模板字符串的${...}中还需要跟踪大括号，找到结束的}
+_JAVASCRIPT_IN_TEMPLATE = re.compile(
+    r"(?P<line>//)|(?P<block>/\*)|(?P<slash>/)|(?P<quote>['\"])|(?P<template>`)|(?P<brace>[{}])"
+)
+
+def _line_comment_end(content, start, language):
+    """行注释的结束位置（不包括换行）"""
+    end = content.find('\n', start)
+    if end == -1:
+        end = len(content)
+    if language == 'php':
+        # PHP的行注释在?>处结束
+        close_tag = content.find('?>', start, end)
+        if close_tag != -1:
+            end = close_tag
+    return end
+
+
+def _block_comment_end(content, start):
+    """块注释的结束位置，没有结束符时到文件结尾"""
+    end = content.find('*/', start + 2)
+    return len(content) if end == -1 else end + 2
+
+
+def _quoted_end(content, body_start, quote):
+    """单行字符串的结束位置，没有结束引号时到行尾"""
+    end = _QUOTED_BODIES[quote].match(content, body_start).end()
+    if end < len(content) and content[end] == quote:
+        end += 1
+    return end
+
+
+def _triple_quoted_end(content, body_start, quote):
+    """三引号字符串的结束位置，没有结束符时到文件结尾"""
+    end = _TRIPLE_QUOTED_BODIES[quote].match(content, body_start).end()
+    return min(end + 3, len(content))
+
+
+def _regex_literal_end(content, body_start):
+    """正则表达式字面量的结束位置（包括标志）"""
+    end = _REGEX_BODY.match(content, body_start).end()
+    if end < len(content) and content[end] == '/':
+        end = _REGEX_FLAGS.match(content, end + 1).end()
+    return end
+
+
+def _regex_allowed(code, previous):
+    """根据两个区间之间的代码判断接下来的/是否是正则表达式的开头
+
+    Args:
+        code: 上一个区间结束到当前位置之间的代码
+        previous: 代码为空白时沿用的上一次判断结果
+
+    Returns:
+        bool: 是否可以开始正则表达式字面量
+    """
+    code = code.rstrip()
+    if not code:
+        return previous
+    last = code[-1]
+    if last in _REGEX_PRECEDING_CHARS:
+        return True
+    if last.isalnum() or last in '_$':
+        # 从结尾向前取出最后一个单词，只检查单词本身的长度
+        start = len(code) - 1
+        while start > 0 and (code[start - 1].isalnum() or code[start - 1] in '_$'):
+            start -= 1
+        return code[start:] in _REGEX_PRECEDING_KEYWORDS
+    return False
+
+
+def tokenize(content, language=None):
+    """切分出文件中的注释和字符串
+
+    Args:
+        content: 文件内容
+        language: 语言，取值见模块说明，不支持的语言按None处理
+
+    Returns:
+        list: (类型, 开始位置, 结束位置)元组的列表，按位置排列且互不重叠，类型为COMMENT或STRING；
+              字符串区间从引号开始（不包括r、u8等前缀），到结束引号为止
+    """
+    if language not in _OPENERS:
+        language = None
+    openers = _OPENERS[language]
+    spans = []
+    length = len(content)
+    position = 0
+    # JavaScript: 上一段代码之后能否开始正则表达式，以及每层${...}中未闭合的{个数
+    regex_allowed = True
+    template_braces = []
+
+    while position < length:
+        pattern = _JAVASCRIPT_IN_TEMPLATE if template_braces else openers
+        match = pattern.search(content, position)
+        if match is None:
+            break
+        start = match.start()
+        kind = match.lastgroup
+        if language == 'javascript':
+            regex_allowed = _regex_allowed(content[position:start], regex_allowed)
+
+        if kind == 'line':
+            end = _line_comment_end(content, start, language)
+            spans.append((COMMENT, start, end))
+        elif kind == 'block':
+            end = _block_comment_end(content, start)
+            spans.append((COMMENT, start, end))
+        elif kind == 'slash':
+            end = match.end()
+            if regex_allowed:
+                end = _regex_literal_end(content, end)
+                spans.append((STRING, start, end))
+                regex_allowed = False
+            else:
+                regex_allowed = True
+        elif kind == 'brace':
+            end = match.end()
+            if content[start] == '{':
+                template_braces[-1] += 1
+                regex_allowed = True
+            elif template_braces[-1] > 0:
+                template_braces[-1] -= 1
+                regex_allowed = True
+            else:
+                # ${...}结束，回到模板字符串中
+                template_braces.pop()
+                end = _TEMPLATE_BODY.match(content, end).end()
+                regex_allowed = content.startswith('${', end)
+                if regex_allowed:
+                    template_braces.append(0)
+                    end += 2
+                elif end < length:
+                    end += 1
+                spans.append((STRING, start, end))
+        elif kind == 'template':
+            end = _TEMPLATE_BODY.match(content, start + 1).end()
+            regex_allowed = content.startswith('${', end)
+            if regex_allowed:
+                template_braces.append(0)
+                end += 2
+            elif end < length:
+                end += 1
+            spans.append((STRING, start, end))
+        elif kind == 'triple':
+            start = match.start('triple')
+            end = _triple_quoted_end(content, start + 3, content[start])
+            spans.append((STRING, start, end))
+        elif kind in ('quote', 'char', 'prefixed_char'):
+            start = match.start(kind)
+            end = _quoted_end(content, start + 1, content[start])
+            spans.append((STRING, start, end))
+            regex_allowed = False
+        elif kind == 'raw':
+            # C++原始字符串R"delim(...)delim"
+            start = match.start() + match.group(0).index('"')
+            terminator = f"){match.group('raw')}\""
+            end = content.find(terminator, match.end())
+            end = length if end == -1 else end + len(terminator)
+            spans.append((STRING, start, end))
+        elif kind == 'backtick':
+            end = _GO_RAW_BODY.match(content, start + 1).end()
+            end = min(end + 1, length)
+            spans.append((STRING, start, end))
+        elif kind == 'heredoc':
+            # heredoc和nowdoc在只包含（可缩进的）结束标识符的行结束
+            terminator = re.compile(r"^[ \t]*%s\b" % re.escape(match.group('heredoc_name')), re.MULTILINE)
+            closing = terminator.search(content, match.end())
+            end = length if closing is None else closing.end()
+            spans.append((STRING, start, end))
+        else:
+            end = match.end()
+
+        position = max(end, start + 1)
+
+    return spans
+
+
+class LexedSource:
+    """一个文件按语言切分后的结果，以及由此得到的各行信息
+
+    各行信息在首次使用时计算，都是按行号下标排列的只读列表
+    """
+
+    def __init__(self, source, language=None):
+        """切分文件内容
+
+        Args:
+            source: SourceBuffer形式的文件内容
+            language: 语言，取值见模块说明
+        """
+        self.source = source
+        self.language = language
+        self.spans = tokenize(source, language)
+
+    @cached_property
+    def masked(self):
+        """去除注释和字符串内容后的文件内容，只保留其中的换行，行号不变
+
+        字符串保留开头和结尾的引号，代码中的字符串仍然是一个值，只是不再包含可以匹配的名称。
+        去除的内容不替换为空格，避免产生很长的空白，使名称提取中的正则表达式大量回溯
+        """
+        source = self.source
+        pieces = []
+        position = 0
+        for kind, start, end in self.spans:
+            pieces.append(source[position:start])
+            newlines = '\n' * source.count('\n', start, end)
+            if kind == STRING and end - start >= 2:
+                pieces.append(source[start] + newlines + source[end - 1])
+            else:
+                pieces.append(newlines)
+            position = end
+        pieces.append(source[position:])
+        return ''.join(pieces)
+
+    @cached_property
+    def code_lines(self):
+        """去除注释和字符串内容后的各行，用于名称提取等只关心代码的检查"""
+        return self.masked.split('\n')
+
+    @cached_property
+    def code_flags(self):
+        """各行是否包含代码（注释和字符串内容以外的非空白字符）"""
+        return [bool(line.strip()) for line in self.code_lines]
+
+    def _span_lines(self, kind):
+        """某类区间覆盖的各行的行号范围（从0开始，包括两端）"""
+        offsets = self.source.line_offsets
+        for span_kind, start, end in self.spans:
+            if span_kind == kind and end > start:
+                yield bisect.bisect_right(offsets, start) - 1, bisect.bisect_right(offsets, end - 1) - 1
+
+    @cached_property
+    def comment_flags(self):
+        """各行是否包含注释文本（空行不算）"""
+        flags = [False] * len(self.source.lines)
+        blank_flags = self.source.blank_flags
+        for first, last in self._span_lines(COMMENT):
+            for index in range(first, last + 1):
+                if not blank_flags[index]:
+                    flags[index] = True
+        return flags
+
+    @cached_property
+    def comment_only_flags(self):
+        """各行是否只有注释，没有代码"""
+        return [comment and not code for comment, code in zip(self.comment_flags, self.code_flags)]
+
+    @cached_property
+    def string_continuation_flags(self):
+        """各行是否从多行字符串的中间开始，这些行是字符串内容而不是单独的代码行"""
+        flags = [False] * len(self.source.lines)
+        for first, last in self._span_lines(STRING):
+            for index in range(first + 1, last + 1):
+                flags[index] = True
+        return flags
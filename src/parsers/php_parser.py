@@ -5,23 +5,45 @@ import re
 import subprocess
 import logging
 from src.parsers.base_parser import BaseParser
+from src.core.naming import compile_naming_patterns
+from src.parsers.source_buffer import SourceBuffer
+from src.parsers.extraction import ExtractionPlan, Extractor, is_not_upper
 
 # 创建logger实例
 logger = logging.getLogger(__name__)
 
+# 名称提取模式
+EXTRACTION_PLAN = ExtractionPlan(('functions', 'variables', 'classes', 'constants'), [
+    # 普通函数: function func_name(...)
+    Extractor('functions', r'function\s+([a-zA-Z0-9_]+)\s*\(', required=('function', '(')),
+    # 类成员函数: public function func_name(...)
+    Extractor('functions', r'\s*(public|protected|private|static)?\s*(final|abstract)?\s*function\s+([a-zA-Z0-9_]+)\s*\(',
+              group=-1, required=('function', '('), skip_indent=True),
+    # 变量声明和使用，这会提取所有变量引用，排除常量（全大写）
+    Extractor('variables', r'(\$[a-zA-Z0-9_]+)', required=('$',), accept=is_not_upper),
+    # 类声明
+    Extractor('classes', r'class\s+([a-zA-Z0-9_]+)', required=('class',)),
+    # define() 常量
+    Extractor('constants', r'define\s*\(\s*[\'"]([A-Z_][A-Z0-9_]*)[\'"]', required=('define', '(')),
+    # const 常量
+    Extractor('constants', r'const\s+([A-Z_][A-Z0-9_]*)\s*=', required=('const', '='))
+])
+
 class PhpParser(BaseParser):
     def __init__(self, ruleset):
         super().__init__(ruleset)
         self.supported_extensions = ['.php']
         self.language_name = "PHP"
+        self.lexer_language = 'php'
+        self.extraction_plan = EXTRACTION_PLAN
         
         # 根据规则集设置具体的检查规则
-        self.naming_patterns = {
+        self.naming_patterns = compile_naming_patterns({
             'function': self.rules.get('function_naming', '^[a-z_][a-z0-9_]*$'),  # 蛇形命名法
             'variable': self.rules.get('variable_naming', '^\$[a-z_][a-z0-9_]*$'),  # 美元符号+蛇形命名法
             'class': self.rules.get('class_naming', '^[A-Z][a-zA-Z0-9]*$'),  # 大驼峰
             'constant': self.rules.get('constant_naming', '^[A-Z_][A-Z0-9_]*$')  # 全大写加下划线
-        }
+        })
         
         self.max_line_length = self.rules.get('max_line_length', 120)
         self.expected_indent = self.rules.get('expected_indent', 4)
@@ -31,10 +53,12 @@ class PhpParser(BaseParser):
         """解析PHP代码，提取基本信息"""
         try:
             # 提取函数、变量、类和常量
-            functions = self._extract_functions(file_content)
-            variables = self._extract_variables(file_content)
-            classes = self._extract_classes(file_content)
-            constants = self._extract_constants(file_content)
+            facts = self._extract_facts(file_content)
+            functions = facts['functions']
+            # 变量引用可能重复，按名称和行号去重
+            variables = list({(v['name'], v['line']): v for v in facts['variables']}.values())
+            classes = facts['classes']
+            constants = facts['constants']
             
             return {
                 'functions': functions,
@@ -140,99 +164,6 @@ class PhpParser(BaseParser):
         
         return violations
     
-    def _extract_functions(self, file_content):
-        """提取PHP中的函数"""
-        functions = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配函数声明
-        func_patterns = [
-            # 普通函数: function func_name(...)
-            re.compile(r'function\s+([a-zA-Z0-9_]+)\s*\('),
-            # 类成员函数: public function func_name(...)
-            re.compile(r'\s*(public|protected|private|static)?\s*(final|abstract)?\s*function\s+([a-zA-Z0-9_]+)\s*\(')
-        ]
-        
-        for i, line in enumerate(lines):
-            for pattern in func_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    # 提取函数名
-                    func_name = match.group(len(match.groups()))
-                    functions.append({
-                        'name': func_name,
-                        'line': i + 1
-                    })
-        
-        return functions
-    
-    def _extract_variables(self, file_content):
-        """提取PHP中的变量"""
-        variables = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配变量声明和使用
-        # 注意：这会提取所有变量引用，可能会有重复
-        var_pattern = re.compile(r'\$([a-zA-Z0-9_]+)')
-        
-        for i, line in enumerate(lines):
-            matches = var_pattern.finditer(line)
-            for match in matches:
-                # 排除常量（全大写）
-                var_name = '$' + match.group(1)
-                if not match.group(1).isupper():
-                    variables.append({
-                        'name': var_name,
-                        'line': i + 1
-                    })
-        
-        # 去重（基于名称和行号）
-        variables = list({(v['name'], v['line']): v for v in variables}.values())
-        
-        return variables
-    
-    def _extract_classes(self, file_content):
-        """提取PHP中的类"""
-        classes = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配类声明
-        class_pattern = re.compile(r'class\s+([a-zA-Z0-9_]+)')
-        
-        for i, line in enumerate(lines):
-            matches = class_pattern.finditer(line)
-            for match in matches:
-                classes.append({
-                    'name': match.group(1),
-                    'line': i + 1
-                })
-        
-        return classes
-    
-    def _extract_constants(self, file_content):
-        """提取PHP中的常量"""
-        constants = []
-        lines = file_content.split('\n')
-        
-        # 正则表达式匹配常量定义
-        const_patterns = [
-            # define() 常量
-            re.compile(r'define\s*\(\s*[\'"]([A-Z_][A-Z0-9_]*)[\'"]'),
-            # const 常量
-            re.compile(r'const\s+([A-Z_][A-Z0-9_]*)\s*=')
-        ]
-        
-        for i, line in enumerate(lines):
-            for pattern in const_patterns:
-                matches = pattern.finditer(line)
-                for match in matches:
-                    constants.append({
-                        'name': match.group(1),
-                        'line': i + 1
-                    })
-        
-        return constants
-    
     def _check_closing_tag_usage(self, file_content):
         """检查PHP闭合标签使用是否规范"""
         # PSR-2规范建议在只包含PHP代码的文件中省略闭合标签
@@ -251,7 +182,7 @@ class PhpParser(BaseParser):
     def _check_short_tag_usage(self, file_content):
         """检查PHP短标签使用是否规范"""
         violations = []
-        lines = file_content.split('\n')
+        lines = SourceBuffer.wrap(file_content).lines
         
         # 检查是否使用了短标签（不包括 <?=）
         short_tag_pattern = re.compile(r'<\?\s')
@@ -267,11 +198,11 @@ class PhpParser(BaseParser):
         return violations
     
     # 重写基类的扫描方法，增加对PHP_CodeSniffer的集成支持
-    def scan(self, file_path):
+    def scan(self, file_path, content=None):
         """扫描PHP文件，集成PHP_CodeSniffer的检查结果"""
         try:
             # 调用基类的扫描方法获取基本违规信息
-            violations = super().scan(file_path)
+            violations = super().scan(file_path, content)
             
             # 尝试使用PHP_CodeSniffer进行额外检查
             try:
@@ -1,22 +1,34 @@
 # -*- coding: utf-8 -*-
 
 import ast
-import re
 from src.parsers.base_parser import BaseParser
+from src.parsers.source_buffer import SourceBuffer
+from src.parsers.python_facts import collect_python_facts
+from src.core.naming import compile_naming_patterns
+from src.core import profiling
 
 class PythonParser(BaseParser):
+    # 违规类型 -> 命名规范解释
+    CONVENTION_EXPLANATIONS = {
+        '函数命名不规范': '函数名称应使用蛇形命名法（全部小写字母，单词间用下划线分隔）',
+        '变量命名不规范': '变量名称应使用蛇形命名法（全部小写字母，单词间用下划线分隔）',
+        '类命名不规范': '类名称应使用驼峰命名法（首字母大写，其余单词首字母大写，无下划线）',
+        '常量命名不规范': '常量名称应使用全大写字母，单词间用下划线分隔'
+    }
+
     def __init__(self, ruleset):
         super().__init__(ruleset)
         self.supported_extensions = ['.py']
         self.language_name = "Python"
+        self.lexer_language = 'python'
         
         # 根据规则集设置具体的检查规则
-        self.naming_patterns = {
+        self.naming_patterns = compile_naming_patterns({
             'function': self.rules.get('function_naming', '^[a-z_][a-z0-9_]*$'),  # 蛇形命名法
             'variable': self.rules.get('variable_naming', '^[a-z_][a-z0-9_]*$'),  # 蛇形命名法
             'class': self.rules.get('class_naming', '^[A-Z][a-zA-Z0-9]*$'),  # 驼峰命名法
             'constant': self.rules.get('constant_naming', '^[A-Z_][A-Z0-9_]*$')  # 全大写加下划线
-        }
+        })
         
         self.max_line_length = self.rules.get('max_line_length', 120)
         self.expected_indent = self.rules.get('expected_indent', 4)
@@ -31,45 +43,17 @@ class PythonParser(BaseParser):
             # 解析代码为AST
             tree = ast.parse(file_content)
             
-            # 提取基本信息
-            functions = []
-            variables = []
-            classes = []
-            constants = []
-            
-            # 遍历AST，提取函数、变量、类和常量
-            class NameExtractor(ast.NodeVisitor):
-                def visit_FunctionDef(self, node):
-                    functions.append({"name": node.name, "line": node.lineno})
-                    self.generic_visit(node)
-                
-                def visit_ClassDef(self, node):
-                    classes.append({"name": node.name, "line": node.lineno})
-                    self.generic_visit(node)
-                
-                def visit_Name(self, node):
-                    # 简单的变量检测，实际情况可能更复杂
-                    if hasattr(node, 'name') and hasattr(node, 'ctx'):
-                        if isinstance(node.ctx, ast.Store):
-                            # 检查是否是常量（全大写）
-                            if node.name.isupper() and '_' in node.name:
-                                constants.append({"name": node.name, "line": node.lineno})
-                            else:
-                                variables.append({"name": node.name, "line": node.lineno})
-                    self.generic_visit(node)
-            
-            # 执行提取
-            extractor = NameExtractor()
-            extractor.visit(tree)
+            # 遍历一次语法树，提取函数、变量、类、常量、导入和函数度量
+            facts = self._extract_ast_facts(tree)
             
             # 去重（基于名称）
-            functions = list({f['name']: f for f in functions}.values())
-            variables = list({v['name']: v for v in variables}.values())
-            classes = list({c['name']: c for c in classes}.values())
-            constants = list({con['name']: con for con in constants}.values())
+            functions = self._unique_names(facts.functions)
+            variables = self._unique_names(facts.variables)
+            classes = self._unique_names(facts.classes)
+            constants = self._unique_names(facts.constants)
             
             return {
-                'ast': tree,
+                'facts': facts,
                 'functions': functions,
                 'variables': variables,
                 'classes': classes,
@@ -91,6 +75,18 @@ class PythonParser(BaseParser):
                 'content': file_content
             }
     
+    def _extract_ast_facts(self, tree):
+        """遍历一次语法树生成事实表，见src/parsers/python_facts.py"""
+        return collect_python_facts(tree)
+    
+    @staticmethod
+    def _unique_names(entries):
+        """按名称去重，保留名称首次出现的位置和最后一次出现的行号"""
+        unique = {}
+        for name, line in entries:
+            unique[name] = line
+        return [{"name": name, "line": line} for name, line in unique.items()]
+    
     def check_rules(self, parsed_data):
         """应用规则检查Python代码"""
         violations = []
@@ -174,7 +170,7 @@ class PythonParser(BaseParser):
         violations.extend(tab_violations)
         
         # 检查导入语句顺序
-        import_violation = self._check_import_order(parsed_data['ast'])
+        import_violation = self._check_import_order(parsed_data['facts'].imports)
         if import_violation:
             violations.append(import_violation)
         
@@ -182,12 +178,11 @@ class PythonParser(BaseParser):
     
     def _check_tab_indentation(self, file_content):
         """检查是否使用了制表符进行缩进"""
-        lines = file_content.split('\n')
         violations = []
         
-        for i, line in enumerate(lines):
+        for i, has_tab in enumerate(SourceBuffer.wrap(file_content).tab_flags):
             # 检查行首是否有制表符
-            if line.startswith('\t'):
+            if has_tab:
                 violations.append({
                     'type': '使用制表符缩进',
                     'message': 'Python代码应使用空格而非制表符进行缩进',
@@ -196,31 +191,18 @@ class PythonParser(BaseParser):
         
         return violations
     
-    def _check_import_order(self, ast_tree):
-        """检查导入语句的顺序是否符合规范"""
-        # 提取导入语句
-        imports = []
-        std_imports = []
-        third_party_imports = []
-        local_imports = []
-        
+    def _check_import_order(self, imports):
+        """检查导入语句的顺序是否符合规范
+
+        Args:
+            imports: 事实表中模块顶层的导入，(顶层包名, 行号)的列表
+        """
         # 预定义的标准库模块（简化版本）
         std_modules = {
             'os', 'sys', 're', 'math', 'datetime', 'collections',
             'json', 'csv', 'io', 'random', 'itertools', 'functools'
         }
         
-        for node in ast.iter_child_nodes(ast_tree):
-            if isinstance(node, (ast.Import, ast.ImportFrom)):
-                # 记录导入语句的行号和模块名
-                if isinstance(node, ast.Import):
-                    for alias in node.names:
-                        module_name = alias.name.split('.')[0]
-                        imports.append((module_name, node.lineno))
-                elif isinstance(node, ast.ImportFrom):
-                    module_name = node.module.split('.')[0] if node.module else ''
-                    imports.append((module_name, node.lineno))
-        
         # 简单检查：标准库导入应在第三方库导入之前
         # 这是一个简化的实现，实际情况可能更复杂
         for i, (module_name, lineno) in enumerate(imports):
@@ -234,25 +216,16 @@ class PythonParser(BaseParser):
         return None
     
     # 覆盖基类的方法，提供更详细的命名规范解释
-    def _check_naming_convention(self, name, pattern, violation_type):
-        """检查名称是否符合指定的正则表达式模式"""
-        import re
-        
+    def _check_naming_convention(self, name, matcher, violation_type):
+        """检查名称是否符合命名规则"""
         # 检查是否允许包含Error/ERROR的命名
         allow_error_naming = self.rules.get('allow_error_naming', False)
         if allow_error_naming and ('Error' in name or 'ERROR' in name):
             return None
         
-        if not re.match(pattern, name):
+        if not matcher.matches(name):
             # 提供更详细的命名规范解释
-            convention_explanation = {
-                '函数命名不规范': '函数名称应使用蛇形命名法（全部小写字母，单词间用下划线分隔）',
-                '变量命名不规范': '变量名称应使用蛇形命名法（全部小写字母，单词间用下划线分隔）',
-                '类命名不规范': '类名称应使用驼峰命名法（首字母大写，其余单词首字母大写，无下划线）',
-                '常量命名不规范': '常量名称应使用全大写字母，单词间用下划线分隔'
-            }
-            
-            explanation = convention_explanation.get(violation_type, '命名不符合项目规范')
+            explanation = self.CONVENTION_EXPLANATIONS.get(violation_type, '命名不符合项目规范')
             return {
                 'type': violation_type,
                 'message': f"{explanation}: '{name}'",
@@ -261,11 +234,11 @@ class PythonParser(BaseParser):
         return None
     
     # 重写基类的扫描方法，增加对pycodestyle和pylint的可选集成支持
-    def scan(self, file_path):
+    def scan(self, file_path, content=None):
         """扫描Python文件，根据配置选择是否集成pycodestyle和pylint的检查结果"""
         try:
             # 调用基类的扫描方法获取基本违规信息
-            violations = super().scan(file_path)
+            violations = super().scan(file_path, content)
             
             # 只有在启用外部工具时才执行额外检查
             if not self.use_external_tools:
@@ -331,10 +304,11 @@ class PythonParser(BaseParser):
                         return False
                 
                 # 使用线程执行pycodestyle检查，防止超时
-                pycodestyle_thread = threading.Thread(target=run_pycodestyle_check)
-                pycodestyle_thread.daemon = True
-                pycodestyle_thread.start()
-                pycodestyle_thread.join(self.external_tool_timeout)
+                with profiling.section('external_tools', 'pycodestyle'):
+                    pycodestyle_thread = threading.Thread(target=run_pycodestyle_check)
+                    pycodestyle_thread.daemon = True
+                    pycodestyle_thread.start()
+                    pycodestyle_thread.join(self.external_tool_timeout)
                 
                 # 添加pycodestyle发现的问题到违规列表
                 if errors:
@@ -398,10 +372,11 @@ class PythonParser(BaseParser):
                         return []
                 
                 # 使用线程执行pylint检查，防止超时
-                pylint_thread = threading.Thread(target=run_pylint_check)
-                pylint_thread.daemon = True
-                pylint_thread.start()
-                pylint_thread.join(self.external_tool_timeout)
+                with profiling.section('external_tools', 'pylint'):
+                    pylint_thread = threading.Thread(target=run_pylint_check)
+                    pylint_thread.daemon = True
+                    pylint_thread.start()
+                    pylint_thread.join(self.external_tool_timeout)
                 
                 # 添加pylint发现的问题到违规列表
                 if pylint_thread.is_alive():
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+源文件行索引
+BaseParser.scan()把文件内容包装为SourceBuffer，解析和各项规则检查共用同一份按行拆分的结果，
+每一项行信息在首次使用时计算一次，不再由每个检查各自拆分整个文件
+"""
+
+import bisect
+from functools import cached_property
+
+from src.parsers.lexer import LexedSource
+
+
+class SourceBuffer(str):
+    """带行索引的文件内容
+
+    SourceBuffer是str的子类，可以直接传给正则表达式和原有的字符串处理代码；
+    各项行信息都是只读的列表，按下标与lines一一对应，使用方不应修改
+    """
+
+    @classmethod
+    def wrap(cls, content):
+        """把文件内容包装为SourceBuffer，已经是SourceBuffer时直接返回"""
+        if isinstance(content, cls):
+            return content
+        return cls(content)
+
+    @cached_property
+    def lines(self):
+        """按\\n拆分的各行，与content.split('\\n')相同"""
+        return self.split('\n')
+
+    @cached_property
+    def line_offsets(self):
+        """各行第一个字符在内容中的位置"""
+        offsets = [0]
+        position = 0
+        for line in self.lines[:-1]:
+            position += len(line) + 1
+            offsets.append(position)
+        return offsets
+
+    @cached_property
+    def stripped(self):
+        """去除首尾空白后的各行"""
+        return [line.strip() for line in self.lines]
+
+    @cached_property
+    def blank_flags(self):
+        """各行是否为空行（只包含空白字符）"""
+        return [not line for line in self.stripped]
+
+    @cached_property
+    def indents(self):
+        """各行行首的空格数"""
+        return [len(line) - len(line.lstrip(' ')) for line in self.lines]
+
+    @cached_property
+    def tab_flags(self):
+        """各行是否以制表符开头"""
+        return [line.startswith('\t') for line in self.lines]
+
+    def line_number(self, offset):
+        """内容中某个位置所在的行号（从1开始）"""
+        return bisect.bisect_right(self.line_offsets, offset)
+
+    def lexed(self, language=None):
+        """按语言切分出注释和字符串后的结果，每种语言只切分一次
+
+        Args:
+            language: 词法语言，取值见src/parsers/lexer.py
+
+        Returns:
+            LexedSource: 切分结果
+        """
+        cache = self.__dict__.setdefault('_lexed', {})
+        lexed = cache.get(language)
+        if lexed is None:
+            lexed = LexedSource(self, language)
+            cache[language] = lexed
+        return lexed
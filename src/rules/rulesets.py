@@ -244,6 +244,42 @@ all_rulesets = {
     "Standard": standard_rules
 }
 
+# 违规严重性级别
+severity_levels = ("high", "medium", "low")
+
+# 消息固定的违规类型的严重性，这些类型直接查表，不再在消息中匹配关键词
+severity_rules = {
+    "文件编码错误": "medium",
+    "行长度过长": "medium",
+    "代码行过长": "medium",
+    "缺少注释": "low",
+    "注释覆盖率不足": "low",
+    "使用制表符缩进": "medium",
+    "缺少分号": "medium",
+    "命名空间使用不规范": "medium",  # 消息中包含"命名"，命名相关的违规统一为中等严重性
+    "头文件包含顺序不规范": "low",
+    "import语句顺序不规范": "low",
+    "可能存在未使用的导入": "medium",
+    "Go代码格式不规范": "medium",
+    "闭合标签使用不规范": "low",
+    "短标签使用不规范": "low",
+}
+
+# 其他违规类型按关键词判断：违规类型或消息中包含这些关键词时为低严重性，否则为中等严重性
+low_severity_keywords = ["注释", "空白", "空行", "导入顺序", "可读性", "建议", "info"]
+
+# 外部工具输出的统计信息，违规类型或消息中包含这些文本时不作为违规
+filtered_messages = ["done processing", "total errors found"]
+
+# 各规则集对违规类型严重性的覆盖，优先于解析器给出的严重性和上面的默认值，例如
+# "PEP8": {"使用制表符缩进": "high"}
+severity_overrides = {
+    "Google": {},
+    "PEP8": {},
+    "Airbnb": {},
+    "Standard": {}
+}
+
 # 规则类型映射
 type_mapping = {
     "naming": "命名规范",
@@ -17,6 +17,9 @@ from src.core.scanner import CodeScanner
 from src.core.report_generator import ReportGenerator
 from src.core.config_manager import ConfigManager
 
+# 详细结果表格最多显示的违规数，完整列表需要导出报告查看
+DETAIL_TABLE_MAX_ROWS = 10000
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -619,10 +622,16 @@ class MainWindow(QMainWindow):
         # 清空表格
         self.details_table.setRowCount(0)
         
-        # 添加详细结果到表格
+        # 添加详细结果到表格，违规详情转存到磁盘时按文件逐个读回
         if 'details' in results:
+            truncated = False
             for file_path, violations in results['details'].items():
                 for violation in violations:
+                    # 达到行数上限后不再添加，单个文件的违规也可能超过上限
+                    if self.details_table.rowCount() >= DETAIL_TABLE_MAX_ROWS:
+                        truncated = True
+                        break
+                    
                     # 获取违规描述
                     description = violation.get("description", "")
                     rule_name = violation.get("rule_name", "")
@@ -670,6 +679,9 @@ class MainWindow(QMainWindow):
                     self.details_table.setItem(row_position, 2, desc_item)
                     self.details_table.setItem(row_position, 3, line_item)
                     self.details_table.setItem(row_position, 4, severity_item)
+                if truncated:
+                    self.update_log(f"详细结果只显示前 {DETAIL_TABLE_MAX_ROWS} 条违规，完整列表请导出报告查看")
+                    break
     
     def open_license_scanner(self):
         """打开开源协议扫描窗口"""
@@ -694,8 +706,13 @@ class MainWindow(QMainWindow):
             # 创建许可证扫描器
             scanner = LicenseScanner()
             
+            # 代码扫描时已读取的文件直接复用其中的许可证检测结果，只读取其余文件
+            detected_licenses = self.last_scan_results.get('licenses_by_file', {})
+            known_files = {file_path: detected_licenses.get(file_path, [])
+                           for file_path in self.last_scan_results.get('lines_by_file', {})}
+            
             # 执行扫描
-            scan_results = scanner.scan_directory(project_path)
+            scan_results = scanner.scan_directory(project_path, known_files=known_files)
             
             # 显示许可证扫描结果
             self._display_license_results(scan_results)